@@ -0,0 +1,55 @@
+import random
+
+from pacai.agents.base import BaseAgent
+from pacai.core import endgame
+from pacai.core.directions import Directions
+
+class EndgameAgent(BaseAgent):
+    """
+    A Pacman agent that plays perfectly (against ghosts that also play perfectly)
+    by looking up each successor in an endgame table (see `pacai.core.endgame`).
+
+    The table for the layout is built when the game starts,
+    or loaded from `tableDir` if it was built (and saved there) before.
+    Only small layouts without capsules can be solved.
+    """
+
+    def __init__(self, index, tableDir = None, maxStates = endgame.DEFAULT_MAX_STATES, **kwargs):
+        super().__init__(index, **kwargs)
+
+        self._tableDir = tableDir
+        self._maxStates = int(maxStates)
+        self._table = None
+
+    def getAction(self, state):
+        legal = state.getLegalActions(self.index)
+        if (len(legal) > 1 and Directions.STOP in legal):
+            legal.remove(Directions.STOP)
+
+        bestValue = None
+        bestActions = []
+
+        for action in legal:
+            successor = state.generateSuccessor(self.index, action)
+
+            value = self._table.getValue(successor)
+            if (value is None):
+                value = 0
+
+            value += successor.getScore()
+
+            if (bestValue is None or value > bestValue):
+                bestValue = value
+                bestActions = [action]
+            elif (value == bestValue):
+                bestActions.append(action)
+
+        return random.choice(bestActions)
+
+    def getTable(self):
+        return self._table
+
+    def registerInitialState(self, state):
+        layout = state.getInitialLayout()
+        if (self._table is None or self._table.getLayout() != layout):
+            self._table = endgame.loadTable(state, self._tableDir, maxStates = self._maxStates)
@@ -3,25 +3,68 @@ import abc
 from pacai.agents.base import BaseAgent
 from pacai.core.directions import Directions
 from pacai.util import probability
+from pacai.util import util
 
 class GhostAgent(BaseAgent):
     """
     The base class for ghost agents.
     Ghosts provide a distribution of possible actions,
     which is then sampled from to get the next action.
+
+    When `cacheDistributions` is set, distributions are memoized by
+    `GhostAgent.getDistributionKey` (see `GhostAgent.getCachedDistribution`).
+    This pays off when the same ghost is asked about many states,
+    like when it is used as an opponent model in a search.
     """
 
-    def __init__(self, index, **kwargs):
+    def __init__(self, index, cacheDistributions = False, **kwargs):
         super().__init__(index, **kwargs)
 
+        self._cacheDistributions = util.parseBool(cacheDistributions)
+
+        # {distribution key: distribution}
+        self._distributionCache = {}
+
+        self.distributionHits = 0
+        self.distributionMisses = 0
+
+    def clearDistributionCache(self):
+        self._distributionCache = {}
+
     def getAction(self, state):
-        dist = self.getDistribution(state)
+        dist = self.getCachedDistribution(state)
 
         if (len(dist) == 0):
             return Directions.STOP
         else:
             return probability.sample(dist)
 
+    def getCachedDistribution(self, state):
+        """
+        Get the distribution for a state, reusing the distribution of an earlier state
+        with the same key when caching is enabled.
+        The returned distribution should not be modified.
+        """
+
+        if (not self._cacheDistributions):
+            return self.getDistribution(state)
+
+        key = self.getDistributionKey(state)
+        if (key is None):
+            return self.getDistribution(state)
+
+        dist = self._distributionCache.get(key)
+        if (dist is not None):
+            self.distributionHits += 1
+            return dist
+
+        self.distributionMisses += 1
+
+        dist = self.getDistribution(state)
+        self._distributionCache[key] = dist
+
+        return dist
+
     @abc.abstractmethod
     def getDistribution(self, state):
         """
@@ -29,3 +72,24 @@ class GhostAgent(BaseAgent):
         """
 
         pass
+
+    def getDistributionHitRate(self):
+        total = self.distributionHits + self.distributionMisses
+        if (total == 0):
+            return 0.0
+
+        return self.distributionHits / total
+
+    def getDistributionKey(self, state):
+        """
+        Get the features of the state that this ghost's distribution depends on
+        (the walls aside, since they never change during a game),
+        or None if the distribution depends on more than can be put in a key.
+        States with equal keys must have equal distributions.
+        """
+
+        return None
+
+    def registerInitialState(self, state):
+        # The walls may have changed.
+        self.clearDistributionCache()
@@ -14,6 +14,12 @@ class DirectionalGhost(GhostAgent):
         self.prob_attack = prob_attack
         self.prob_scaredFlee = prob_scaredFlee
 
+    def getDistributionKey(self, state):
+        ghostState = state.getGhostState(self.index)
+
+        return (ghostState.getPosition(), ghostState.getDirection(), ghostState.isScared(),
+                state.getPacmanPosition(), state.isOver())
+
     def getDistribution(self, state):
         # Read variables from state.
         ghostState = state.getGhostState(self.index)
@@ -9,6 +9,10 @@ class RandomGhost(GhostAgent):
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
 
+    def getDistributionKey(self, state):
+        ghostState = state.getGhostState(self.index)
+        return (ghostState.getPosition(), ghostState.getDirection(), state.isOver())
+
     def getDistribution(self, state):
         dist = {}
         for a in state.getLegalActions(self.index):
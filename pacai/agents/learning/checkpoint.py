@@ -0,0 +1,113 @@
+"""
+Checkpoints for learning agents (`pacai.agents.learning.reinforcement.ReinforcementAgent`).
+
+A checkpoint holds everything an agent needs to pick up where it left off
+(see `pacai.agents.learning.reinforcement.ReinforcementAgent.getLearningState`):
+how many episodes it has played, its rewards so far, its learning parameters,
+its Q-values or weights, and the state of the random number generator
+(so a resumed run plays the same games the original run would have).
+
+Each directory holds a single (most recent) checkpoint.
+It is written to a temp file first and then moved into place,
+so a crash while saving leaves the previous checkpoint intact.
+Q-values and weights are stored as packed arrays (not one object per value).
+"""
+
+import os
+import pickle
+import random
+import tempfile
+
+CHECKPOINT_FILENAME = 'checkpoint.bin'
+FORMAT_VERSION = 1
+
+def exists(directory):
+    return os.path.isfile(getPath(directory))
+
+def getPath(directory):
+    return os.path.join(directory, CHECKPOINT_FILENAME)
+
+def load(agent, directory, restoreRandom = True, numTraining = None):
+    """
+    Restore an agent from the checkpoint in a directory.
+    The agent must be the same type of agent that was saved.
+
+    If numTraining is given, it replaces the checkpoint's number of training episodes
+    (e.g. more to train for longer, or 0 to only evaluate).
+    An agent that has no training left does not explore or learn (or save checkpoints),
+    and an agent whose checkpoint had finished training but now has training left
+    goes back to the exploration and learning rates it was constructed with.
+
+    If restoreRandom is True and the agent still has training left,
+    the random number generator is also restored
+    (evaluation runs with a trained agent keep using their own seed).
+    """
+
+    path = getPath(directory)
+    if (not os.path.isfile(path)):
+        raise ValueError('No checkpoint found in %s.' % (directory))
+
+    with open(path, 'rb') as file:
+        components = pickle.load(file)
+
+    if (components['version'] != FORMAT_VERSION):
+        raise ValueError('Checkpoint %s has an unknown format version: %s.' %
+                (path, components['version']))
+
+    if (components['agent'] != _agentName(agent)):
+        raise ValueError('Checkpoint %s is for a %s, not a %s.' %
+                (path, components['agent'], _agentName(agent)))
+
+    epsilon = agent.getEpsilon()
+    alpha = agent.getAlpha()
+
+    agent.setLearningState(components['learning'])
+
+    if (numTraining is not None):
+        finishedTraining = agent.isInTesting()
+        agent.numTraining = int(numTraining)
+
+        if (agent.isInTesting()):
+            agent.setEpsilon(0.0)
+            agent.setLearningRate(0.0)
+        elif (finishedTraining):
+            agent.setEpsilon(epsilon)
+            agent.setLearningRate(alpha)
+
+    if (restoreRandom and agent.isInTraining()):
+        random.setstate(components['random'])
+
+def save(agent, directory):
+    """
+    Save a checkpoint of an agent to a directory (replacing the last one).
+    """
+
+    os.makedirs(directory, exist_ok = True)
+
+    components = {
+        'version': FORMAT_VERSION,
+        'agent': _agentName(agent),
+        'learning': agent.getLearningState(),
+        'random': random.getstate(),
+    }
+
+    path = getPath(directory)
+
+    # A unique temp file, so concurrent saves to the same directory never share one.
+    handle, tempPath = tempfile.mkstemp(prefix = CHECKPOINT_FILENAME + '.', suffix = '.tmp',
+            dir = directory)
+
+    try:
+        with os.fdopen(handle, 'wb') as file:
+            pickle.dump(components, file, protocol = pickle.HIGHEST_PROTOCOL)
+            file.flush()
+            os.fsync(file.fileno())
+
+        os.replace(tempPath, path)
+    except BaseException:
+        if (os.path.exists(tempPath)):
+            os.remove(tempPath)
+        raise
+
+def _agentName(agent):
+    return type(agent).__module__ + '.' + type(agent).__qualname__
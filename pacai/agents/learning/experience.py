@@ -0,0 +1,175 @@
+"""
+Experience replay for reinforcement agents (see `pacai.agents.learning.reinforcement`).
+
+A replay buffer remembers the most recent transitions (state, action, next state, reward)
+so an agent can learn from each of them more than once.
+Transitions are kept in a ring: preallocated slots that are overwritten oldest first.
+
+ - `ReplayBuffer`: samples transitions uniformly.
+ - `PrioritizedReplayBuffer`: samples transitions in proportion to their last TD error
+   (so surprising transitions are learned from more often),
+   and weights each one to correct for the bias that introduces.
+"""
+
+import array
+import random
+
+# The defaults for `PrioritizedReplayBuffer`.
+DEFAULT_PRIORITY_EXPONENT = 0.6
+DEFAULT_IMPORTANCE_EXPONENT = 0.4
+
+# Added to every error, so no transition stops being sampled.
+MIN_PRIORITY = 1e-6
+
+class ReplayBuffer:
+    """
+    A ring buffer of transitions with uniform sampling.
+    """
+
+    def __init__(self, capacity):
+        capacity = int(capacity)
+        if (capacity <= 0):
+            raise ValueError('Replay buffers need a positive capacity, got %d.' % (capacity))
+
+        self._capacity = capacity
+        # The slot the next transition goes in, and the number of slots in use.
+        self._next = 0
+        self._size = 0
+
+        self._states = [None] * capacity
+        self._actions = [None] * capacity
+        self._nextStates = [None] * capacity
+        self._rewards = array.array('d', [0.0]) * capacity
+
+    def add(self, state, action, nextState, reward):
+        """
+        Add a transition (replacing the oldest one if the buffer is full).
+        Returns the slot it was stored in.
+        """
+
+        slot = self._next
+
+        self._states[slot] = state
+        self._actions[slot] = action
+        self._nextStates[slot] = nextState
+        self._rewards[slot] = reward
+
+        self._next = (slot + 1) % self._capacity
+        self._size = min(self._size + 1, self._capacity)
+
+        return slot
+
+    def getCapacity(self):
+        return self._capacity
+
+    def getTransition(self, slot):
+        return (self._states[slot], self._actions[slot], self._nextStates[slot],
+                self._rewards[slot])
+
+    def sample(self, batchSize):
+        """
+        Sample a minibatch of transitions (with replacement).
+        Returns the slots, the transitions as [(state, action, next state, reward), ...],
+        and the weight of each transition in the update (all 1.0 for uniform sampling).
+        """
+
+        if (self._size == 0):
+            raise ValueError('Cannot sample from an empty replay buffer.')
+
+        slots = [random.randrange(self._size) for i in range(batchSize)]
+        return slots, [self.getTransition(slot) for slot in slots], [1.0] * batchSize
+
+    def updatePriorities(self, slots, errors):
+        """
+        Tell the buffer the TD errors of transitions that were just learned from.
+        Uniform buffers ignore them.
+        """
+
+        pass
+
+    def __len__(self):
+        return self._size
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    A ring buffer of transitions that samples each one with probability proportional to
+    (|TD error| + `MIN_PRIORITY`) ^ priorityExponent.
+    New transitions get the highest priority seen so far, so each is sampled soon.
+
+    Priorities are kept in a sum tree (a binary tree where each node holds the sum of its children)
+    stored in a single array, so adding, updating, and sampling all take O(log capacity).
+    To undo the bias of sampling, each sampled transition is weighted by
+    (1 / (size * probability)) ^ importanceExponent, scaled so the largest weight in a batch is 1.
+    """
+
+    def __init__(self, capacity, priorityExponent = DEFAULT_PRIORITY_EXPONENT,
+            importanceExponent = DEFAULT_IMPORTANCE_EXPONENT):
+        super().__init__(capacity)
+
+        self._priorityExponent = float(priorityExponent)
+        self._importanceExponent = float(importanceExponent)
+        self._maxPriority = 1.0
+
+        # The leaves (one per slot) start at _treeSize, and node i has children 2i and 2i + 1.
+        self._treeSize = 1
+        while (self._treeSize < self._capacity):
+            self._treeSize *= 2
+
+        self._tree = array.array('d', [0.0]) * (2 * self._treeSize)
+
+    def add(self, state, action, nextState, reward):
+        slot = super().add(state, action, nextState, reward)
+        self._setPriority(slot, self._maxPriority)
+
+        return slot
+
+    def sample(self, batchSize):
+        if (self._size == 0):
+            raise ValueError('Cannot sample from an empty replay buffer.')
+
+        total = self._tree[1]
+
+        slots = []
+        weights = []
+
+        for i in range(batchSize):
+            slot = self._find(random.random() * total)
+            slots.append(slot)
+
+            probability = self._tree[self._treeSize + slot] / total
+            weights.append((self._size * probability) ** -self._importanceExponent)
+
+        maxWeight = max(weights)
+        weights = [weight / maxWeight for weight in weights]
+
+        return slots, [self.getTransition(slot) for slot in slots], weights
+
+    def updatePriorities(self, slots, errors):
+        for (slot, error) in zip(slots, errors):
+            priority = (abs(error) + MIN_PRIORITY) ** self._priorityExponent
+            self._maxPriority = max(self._maxPriority, priority)
+            self._setPriority(slot, priority)
+
+    def _find(self, target):
+        """
+        Find the slot whose range of the cumulative priorities holds the target.
+        """
+
+        node = 1
+        while (node < self._treeSize):
+            node *= 2
+            if (target >= self._tree[node] and self._tree[node + 1] > 0.0):
+                target -= self._tree[node]
+                node += 1
+
+        return min(node - self._treeSize, self._size - 1)
+
+    def _setPriority(self, slot, priority):
+        node = self._treeSize + slot
+        self._tree[node] = priority
+
+        # Sum the children again (instead of adding the change) so rounding errors can't build up.
+        node //= 2
+        while (node >= 1):
+            self._tree[node] = self._tree[2 * node] + self._tree[2 * node + 1]
+            node //= 2
@@ -0,0 +1,148 @@
+"""
+Parallel training for approximate Q-learning agents
+(`pacai.student.qlearningAgents.ApproximateQAgent`).
+
+Playing games is the slow part of training, so it is spread over actor processes.
+Each actor plays its share of the training episodes with its own copy of the agent,
+acting with the most recent weights it was sent.
+Instead of learning, actors extract the features of every transition and send each episode
+back over a queue to the learner (the calling process), which applies the updates to the agent
+and sends the new weights to every actor after every few episodes.
+
+Actors act on weights that are a little out of date,
+so the learned weights will not be exactly the same as training in a single process.
+"""
+
+import logging
+import multiprocessing
+import queue
+import random
+import traceback
+
+from pacai.core.featureExtractors import SparseFeatures
+from pacai.ui.pacman.null import PacmanNullView
+
+# The number of episodes the learner applies between sending weights to the actors.
+DEFAULT_SYNC_INTERVAL = 10
+
+# The most finished episodes (per actor) that can wait for the learner before actors block.
+MAX_QUEUED_EPISODES = 4
+
+def train(agent, layout, ghosts, rules, numEpisodes, numActors,
+        syncInterval = DEFAULT_SYNC_INTERVAL):
+    """
+    Train the agent for numEpisodes episodes of the layout played by numActors actor processes.
+    The agent is updated in place, and is out of training afterwards
+    (just like after the same number of training episodes with `pacai.bin.pacman.runGames`).
+    The rules (`pacai.bin.pacman.ClassicGameRules`) are used to make each actor's games.
+    Experience replay is not supported (actors do not learn, and the learner only sees features).
+    """
+
+    numEpisodes = int(numEpisodes)
+    numActors = int(numActors)
+    if (numActors <= 0):
+        raise ValueError('The number of actors must be positive, got %d.' % (numActors))
+
+    if (agent.replayBuffer is not None):
+        raise ValueError('Experience replay is not supported when training with actors.')
+
+    # Split the episodes as evenly as possible.
+    shares = [numEpisodes // numActors + int(i < numEpisodes % numActors)
+            for i in range(numActors)]
+
+    transitionQueue = multiprocessing.Queue(MAX_QUEUED_EPISODES * numActors)
+    weightQueues = [multiprocessing.Queue() for i in range(numActors)]
+
+    actors = []
+    for actorIndex in range(numActors):
+        actor = multiprocessing.Process(target = _runActor, args = (actorIndex, agent, layout,
+                ghosts, rules, shares[actorIndex], random.getrandbits(64),
+                weightQueues[actorIndex], transitionQueue))
+        actor.daemon = True
+        actor.start()
+        actors.append(actor)
+
+    logging.info('Playing %d training games with %d actors.' % (numEpisodes, numActors))
+
+    # The learner's index of each feature index of each actor.
+    featureMaps = [[] for i in range(numActors)]
+    episodesLeft = list(shares)
+
+    try:
+        for episode in range(numEpisodes):
+            message = transitionQueue.get()
+            if (message[0] == 'error'):
+                raise RuntimeError('Training actor failed:\n' + message[1])
+
+            actorIndex, newFeatures, transitions, episodeRewards = message
+
+            featureMap = featureMaps[actorIndex]
+            featureMap += [agent.getFeatureIndex(feature) for feature in newFeatures]
+
+            for (features, reward, nextFeatures) in transitions:
+                agent.updateFeatures(_mapFeatures(features, featureMap), reward,
+                        [_mapFeatures(nextFeature, featureMap) for nextFeature in nextFeatures])
+
+            agent.startEpisode()
+            agent.episodeRewards = episodeRewards
+            agent.stopEpisode()
+            episodesLeft[actorIndex] -= 1
+
+            if ((episode + 1) % syncInterval == 0):
+                weights = agent.getWeights()
+                for (actorIndex, weightQueue) in enumerate(weightQueues):
+                    if (episodesLeft[actorIndex] > 0):
+                        weightQueue.put(weights)
+    finally:
+        # Only actors that failed (or were interrupted) have episodes left.
+        for (actor, left) in zip(actors, episodesLeft):
+            if (left > 0):
+                actor.terminate()
+
+        for actor in actors:
+            actor.join()
+
+    logging.info('Finished training, weights: %s' % (agent.getWeights()))
+
+    return agent
+
+def _mapFeatures(features, featureMap):
+    return SparseFeatures([featureMap[index] for index in features.indexes], features.values)
+
+def _runActor(actorIndex, agent, layout, ghosts, rules, numEpisodes, seed,
+        weightQueue, transitionQueue):
+    try:
+        random.seed(seed)
+
+        # Keep exploring (with the agent's epsilon) for every episode this actor plays.
+        agent.episodesSoFar = 0
+        agent.numTraining = numEpisodes + 1
+
+        # Only the learner saves checkpoints (an actor's episode counts are its own).
+        agent.checkpointDir = None
+
+        display = PacmanNullView()
+        sentFeatures = 0
+
+        for episode in range(numEpisodes):
+            weights = None
+            while (True):
+                try:
+                    weights = weightQueue.get_nowait()
+                except queue.Empty:
+                    break
+
+            if (weights is not None):
+                agent.setWeights(weights)
+
+            agent.transitionSink = []
+            game = rules.newGame(layout, agent, ghosts, display)
+            game.run()
+
+            # Send the names of any features the learner has not seen from this actor yet.
+            features = agent.interner.getFeatures()
+            transitionQueue.put((actorIndex, features[sentFeatures:], agent.transitionSink,
+                    agent.episodeRewards))
+            sentFeatures = len(features)
+    except Exception:
+        transitionQueue.put(('error', traceback.format_exc()))
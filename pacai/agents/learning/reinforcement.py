@@ -2,8 +2,16 @@ import abc
 import logging
 import time
 
+from pacai.agents.learning import checkpoint
+from pacai.agents.learning import experience
 from pacai.agents.learning.value import ValueEstimationAgent
 
+# The kinds of experience replay (see `pacai.agents.learning.experience`).
+REPLAY_BUFFERS = {
+    'uniform': experience.ReplayBuffer,
+    'prioritized': experience.PrioritizedReplayBuffer,
+}
+
 class ReinforcementAgent(ValueEstimationAgent):
     """
     An abstract value estimation agent that learns by estimating Q-values from experience.
@@ -12,10 +20,18 @@ class ReinforcementAgent(ValueEstimationAgent):
     The environment will call `ReinforcementAgent.observeTransition`,
     which will then call `ReinforcementAgent.update` (which you should override).
     Use `ReinforcementAgent.getLegalActions` to know which actions are available in a state.
+
+    With experience replay on, training transitions are also kept in a replay buffer,
+    and every replayFrequency transitions a minibatch sampled from the buffer is learned from
+    (through `ReinforcementAgent.updateBatch`).
+
+    With a checkpoint directory, a checkpoint (see `pacai.agents.learning.checkpoint`)
+    is saved every checkpointInterval training episodes and at the end of training.
     """
 
     def __init__(self, index, actionFn = None, numTraining = 100, epsilon = 0.5,
-            alpha = 0.5, gamma = 1, **kwargs):
+            alpha = 0.5, gamma = 1, replay = None, replaySize = 10000, replayBatchSize = 32,
+            replayFrequency = 4, checkpointDir = None, checkpointInterval = 100, **kwargs):
         """
         Args:
             actionFn: A function which takes a state and returns the list of legal actions.
@@ -23,11 +39,17 @@ class ReinforcementAgent(ValueEstimationAgent):
             epsilon: The exploration rate.
             gamma: The discount factor.
             numTraining: The number of training episodes.
+            replay: The kind of experience replay ('uniform' or 'prioritized'), None for no replay.
+            replaySize: The number of transitions the replay buffer holds.
+            replayBatchSize: The number of transitions in each replayed minibatch.
+            replayFrequency: The number of transitions between replayed minibatches.
+            checkpointDir: The directory to save checkpoints in, None for no checkpoints.
+            checkpointInterval: The number of training episodes between checkpoints.
         """
         super().__init__(index, **kwargs)
 
         if (actionFn is None):
-            actionFn = lambda state: state.getLegalActions()
+            actionFn = _getLegalActions
 
         self.actionFn = actionFn
         self.episodesSoFar = 0
@@ -38,6 +60,20 @@ class ReinforcementAgent(ValueEstimationAgent):
         self.alpha = float(alpha)
         self.discountRate = float(gamma)
 
+        self.replayBuffer = None
+        if (replay is not None):
+            if (replay not in REPLAY_BUFFERS):
+                raise ValueError('Unknown experience replay: %s.' % (replay))
+
+            self.replayBuffer = REPLAY_BUFFERS[replay](replaySize)
+
+        self.replayBatchSize = int(replayBatchSize)
+        self.replayFrequency = int(replayFrequency)
+        self._transitionsSinceReplay = 0
+
+        self.checkpointDir = checkpointDir
+        self.checkpointInterval = int(checkpointInterval)
+
     @abc.abstractmethod
     def update(self, state, action, nextState, reward):
         """
@@ -46,6 +82,27 @@ class ReinforcementAgent(ValueEstimationAgent):
 
         pass
 
+    def updateBatch(self, transitions, weights):
+        """
+        Learn from a minibatch of replayed transitions, [(state, action, next state, reward), ...].
+        Each transition's weight scales its learning rate.
+        Returns the TD error of each transition (used to prioritize replay),
+        or None if they are not known.
+
+        By default, this calls `ReinforcementAgent.update` on each transition.
+        Agents can override it to update more efficiently (or to return the errors).
+        """
+
+        alpha = self.alpha
+
+        for ((state, action, nextState, reward), weight) in zip(transitions, weights):
+            self.alpha = alpha * weight
+            self.update(state, action, nextState, reward)
+
+        self.alpha = alpha
+
+        return None
+
     def getAlpha(self):
         return self.alpha
 
@@ -58,6 +115,23 @@ class ReinforcementAgent(ValueEstimationAgent):
     def getGamma(self):
         return self.discountRate
 
+    def getLearningState(self):
+        """
+        Get everything that is needed to continue learning (or to act as trained) later,
+        as a dict that can be pickled.
+        Agents that learn more should add to it (and to `ReinforcementAgent.setLearningState`).
+        """
+
+        return {
+            'episodesSoFar': self.episodesSoFar,
+            'accumTrainRewards': self.accumTrainRewards,
+            'accumTestRewards': self.accumTestRewards,
+            'numTraining': self.numTraining,
+            'epsilon': self.epsilon,
+            'alpha': self.alpha,
+            'discountRate': self.discountRate,
+        }
+
     def getLegalActions(self, state):
         """
         Get the actions available for a given state.
@@ -76,6 +150,26 @@ class ReinforcementAgent(ValueEstimationAgent):
         self.episodeRewards += deltaReward
         self.update(state, action, nextState, deltaReward)
 
+        if (self.replayBuffer is not None and self.isInTraining()):
+            self.replayBuffer.add(state, action, nextState, deltaReward)
+            self._transitionsSinceReplay += 1
+
+            if (self._transitionsSinceReplay >= self.replayFrequency
+                    and len(self.replayBuffer) >= self.replayBatchSize):
+                self._transitionsSinceReplay = 0
+                self.replay()
+
+    def replay(self):
+        """
+        Learn from a minibatch sampled from the replay buffer.
+        """
+
+        slots, transitions, weights = self.replayBuffer.sample(self.replayBatchSize)
+
+        errors = self.updateBatch(transitions, weights)
+        if (errors is not None):
+            self.replayBuffer.updatePriorities(slots, errors)
+
     def startEpisode(self):
         """
         Called by environment when a new episode is starting.
@@ -95,18 +189,39 @@ class ReinforcementAgent(ValueEstimationAgent):
         else:
             self.accumTestRewards += self.episodeRewards
 
+        wasTraining = self.isInTraining()
+
         self.episodesSoFar += 1
         if (self.episodesSoFar >= self.numTraining):
             # Take off the training wheels.
             self.epsilon = 0.0  # No exploration.
             self.alpha = 0.0  # No learning.
 
+        if (self.checkpointDir is not None and wasTraining
+                and (self.episodesSoFar % self.checkpointInterval == 0
+                    or self.episodesSoFar == self.numTraining)):
+            checkpoint.save(self, self.checkpointDir)
+            logging.debug('Saved a checkpoint after %d episodes.' % (self.episodesSoFar))
+
     def isInTraining(self):
         return (self.episodesSoFar < self.numTraining)
 
     def isInTesting(self):
         return not self.isInTraining()
 
+    def setLearningState(self, state):
+        """
+        Restore the state from `ReinforcementAgent.getLearningState`.
+        """
+
+        self.episodesSoFar = state['episodesSoFar']
+        self.accumTrainRewards = state['accumTrainRewards']
+        self.accumTestRewards = state['accumTestRewards']
+        self.numTraining = state['numTraining']
+        self.epsilon = state['epsilon']
+        self.alpha = state['alpha']
+        self.discountRate = state['discountRate']
+
     def setEpsilon(self, epsilon):
         self.epsilon = epsilon
 
@@ -181,3 +296,7 @@ class ReinforcementAgent(ValueEstimationAgent):
         if (self.episodesSoFar == self.numTraining):
             msg = 'Training Done (turning off epsilon and alpha)'
             logging.debug('%s\n%s' % (msg, '-' * len(msg)))
+
+def _getLegalActions(state):
+    # A module level function (unlike a lambda) can be pickled along with the agent.
+    return state.getLegalActions()
@@ -5,11 +5,15 @@ from typing import Callable, Union
 from pacai.agents.base import BaseAgent
 from pacai.core.directions import Directions
 from pacai.core.gamestate import AbstractGameState
+from pacai.core.search.anytime import AnytimeSearch
 from pacai.core.search.heuristic import null as nullHeuristic
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
+from pacai.core.search.stats import InstrumentedProblem
+from pacai.core.search.stats import SearchStats
 from pacai.student.search import depthFirstSearch
 from pacai.util import reflection
+from pacai.util import util
 
 class SearchAgent(BaseAgent):
     """
@@ -19,15 +23,42 @@ class SearchAgent(BaseAgent):
 
     As a default, this agent runs `pacai.student.search.depthFirstSearch` on a
     `pacai.core.search.position.PositionSearchProblem` to find location (1, 1).
+
+    When `stats` is set (or a `statsPath` is given), the search is instrumented with
+    `pacai.core.search.stats` and the stats for each query are logged
+    (and appended as JSON to `statsPath`).
+
+    When a `deadline` (in seconds) is given, the search function is replaced with
+    `pacai.core.search.anytime.AnytimeSearch` using the supplied heuristic.
+    The best path found before the deadline is used,
+    and `SearchAgent.improvePath` can be called to keep improving it.
     """
 
     def __init__(self, index,
             fn: Union[str, Callable[[SearchProblem], any]] = depthFirstSearch,
             prob: Union[str, Callable[[AbstractGameState], SearchProblem]] = PositionSearchProblem,
             heuristic: Union[str, Callable] = nullHeuristic,
+            stats = False, statsPath = None, deadline = None,
             **kwargs):
         super().__init__(index, **kwargs)
 
+        self._deadline = None
+        if (deadline is not None):
+            self._deadline = float(deadline)
+
+        if (isinstance(heuristic, str)):
+            heuristic = reflection.qualifiedImport(heuristic)
+        self._heuristic = heuristic
+
+        # The anytime search for the last problem (when using a deadline).
+        self._anytimeSearch = None
+
+        self._statsPath = statsPath
+        self._recordStats = (statsPath is not None or util.parseBool(stats))
+
+        # The stats for the last search (if recorded).
+        self._stats = None
+
         if isinstance(prob, str):
             # Get the search problem type from the name.
             self.searchType = reflection.qualifiedImport(prob)
@@ -36,7 +67,10 @@ class SearchAgent(BaseAgent):
             self.searchType = prob
         logging.info('[SearchAgent] using problem type %s.' % (self.searchType))
 
-        if isinstance(fn, str):
+        if (self._deadline is not None):
+            # Ignore the search function and search until the deadline.
+            self.searchFunction = self._anytimeSearchFunction
+        elif isinstance(fn, str):
             # Get the search function from the name and heuristic.
             self.searchFunction = self._fetchSearchFunction(fn, heuristic)
         else:
@@ -65,11 +99,23 @@ class SearchAgent(BaseAgent):
         starttime = time.time()
         problem = self.searchType(state)  # Makes a new search problem.
 
+        if (self._recordStats):
+            self._stats = SearchStats(name = type(self).__name__)
+            problem = InstrumentedProblem(problem, self._stats)
+            self._stats.start()
+
         self._actions = self.searchFunction(problem)  # Find a path.
         self._actionIndex = 0
 
         totalCost = problem.actionsCost(self._actions)
 
+        if (self._recordStats):
+            self._stats.stop(self._actions, totalCost)
+            logging.info('Search stats: %s' % (self._stats))
+
+            if (self._statsPath is not None):
+                self._stats.write(self._statsPath)
+
         state.setHighlightLocations(problem.getVisitHistory())
 
         logging.info('Path found with total cost of %d in %.1f seconds' %
@@ -113,4 +159,63 @@ class SearchAgent(BaseAgent):
                 (functionName, heuristic))
 
         # Bind the heuristic.
-        return lambda x: function(x, heuristic = heuristic)
+        def search(problem):
+            boundHeuristic = heuristic
+            if (isinstance(problem, InstrumentedProblem)):
+                boundHeuristic = problem.instrumentHeuristic(heuristic)
+
+            return function(problem, heuristic = boundHeuristic)
+
+        return search
+
+    def improvePath(self, seconds):
+        """
+        Give the anytime search more time to improve the path.
+        The improved path is used for the rest of the moves if it still starts with
+        the moves that were already taken.
+        Returns True if the path was replaced.
+        """
+
+        if (self._anytimeSearch is None):
+            return False
+
+        path = self._anytimeSearch.improve(seconds)
+        if (path is None or path == self._actions):
+            return False
+
+        if (path[:self._actionIndex] != self._actions[:self._actionIndex]):
+            return False
+
+        self._actions = path
+        return True
+
+    def _anytimeSearchFunction(self, problem):
+        heuristic = self._heuristic
+        if (isinstance(problem, InstrumentedProblem)):
+            heuristic = problem.instrumentHeuristic(heuristic)
+
+        self._anytimeSearch = AnytimeSearch(problem, heuristic)
+        deadline = time.time() + self._deadline
+        path = self._anytimeSearch.run(deadline, untilFound = True)
+
+        if (path is None):
+            logging.warning('[SearchAgent] no path exists.')
+            return []
+
+        if (time.time() > deadline):
+            logging.warning('[SearchAgent] the first path took longer than the deadline of '
+                    + '%.2f seconds.' % (self._deadline))
+
+        if (not self._anytimeSearch.isOptimal()):
+            logging.info('[SearchAgent] deadline reached, using a path of cost %s.'
+                    % (str(self._anytimeSearch.getBestCost())))
+
+        return path
+
+    def getStats(self):
+        """
+        Get the `pacai.core.search.stats.SearchStats` for the last search,
+        or None if stats are not being recorded.
+        """
+
+        return self._stats
@@ -0,0 +1,118 @@
+"""
+Memoized and batched evaluation functions.
+
+Adversarial search evaluates a leaf every time it is reached,
+and the same positions are reached many times (through different orders of moves,
+on later iterations of iterative deepening, and on later turns).
+"""
+
+import collections
+
+DEFAULT_SIZE = 2 ** 16
+
+class EvaluationCache:
+    """
+    Wraps an evaluation function (`state -> value`) and remembers the values of the
+    most recently evaluated states (up to size of them, the least recently used are dropped).
+
+    A cache is called just like the evaluation function it wraps.
+    `EvaluationCache.evaluateAll` evaluates many states (e.g. all the children of a node) at once.
+    If a batch function (`[state, ...] -> [value, ...]`) is given, then all the states that are
+    not already cached are passed to it in a single call,
+    which lets it share work between the states.
+    """
+
+    def __init__(self, evaluationFunction, size = DEFAULT_SIZE, batchFunction = None):
+        size = int(size)
+        if (size <= 0):
+            raise ValueError('Evaluation cache size must be positive, got %d.' % (size))
+
+        self._evaluationFunction = evaluationFunction
+        self._batchFunction = batchFunction
+        self._size = size
+
+        # {state: value}, least recently used first.
+        self._values = collections.OrderedDict()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def clear(self):
+        self._values.clear()
+
+    def evaluateAll(self, states):
+        """
+        Evaluate a list of states and return a list of their values.
+        """
+
+        values = [None] * len(states)
+        missing = []
+
+        for i in range(len(states)):
+            value = self._get(states[i])
+            if (value is None):
+                missing.append(i)
+            else:
+                values[i] = value
+
+        if (len(missing) == 0):
+            return values
+
+        missingStates = [states[i] for i in missing]
+        if (self._batchFunction is not None):
+            missingValues = self._batchFunction(missingStates)
+        else:
+            missingValues = [self._evaluationFunction(state) for state in missingStates]
+
+        for (i, value) in zip(missing, missingValues):
+            values[i] = value
+            self._put(states[i], value)
+
+        return values
+
+    def getEvaluationFunction(self):
+        return self._evaluationFunction
+
+    def getHitRate(self):
+        if (self.hits + self.misses == 0):
+            return 0.0
+
+        return self.hits / (self.hits + self.misses)
+
+    def getSize(self):
+        return self._size
+
+    def _get(self, state):
+        value = self._values.get(state)
+        if (value is None):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._values.move_to_end(state)
+        return value
+
+    def _put(self, state, value):
+        self._values[state] = value
+
+        if (len(self._values) > self._size):
+            self._values.popitem(last = False)
+            self.evictions += 1
+
+    def __call__(self, state):
+        value = self._get(state)
+        if (value is None):
+            value = self._evaluationFunction(state)
+            self._put(state, value)
+
+        return value
+
+    def __getstate__(self):
+        # Don't ship the cached states along with a pickled cache.
+        state = self.__dict__.copy()
+        state['_values'] = collections.OrderedDict()
+        return state
+
+    def __len__(self):
+        return len(self._values)
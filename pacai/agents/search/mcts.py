@@ -0,0 +1,458 @@
+"""
+Monte Carlo Tree Search (MCTS).
+
+Instead of searching every line of play to a fixed depth,
+MCTS grows a tree towards the most promising moves,
+estimating the value of each new node by playing the game out (a rollout) for a while.
+The search can be stopped at any time, so it fits a time budget regardless of the size of the board.
+"""
+
+import logging
+import math
+import random
+import time
+
+from pacai.agents.base import BaseAgent
+from pacai.agents.search import parallel
+from pacai.core.directions import Directions
+from pacai.util import reflection
+from pacai.util import util
+
+RANDOM_ROLLOUT = 'random'
+GREEDY_ROLLOUT = 'greedy'
+REFLEX_ROLLOUT = 'reflex'
+
+DEFAULT_EXPLORATION = math.sqrt(2)
+
+class MCTSNode:
+    """
+    A node in the search tree.
+    The values of a node are totaled from the point of view of the searching agent.
+    """
+
+    __slots__ = ('state', 'agentIndex', 'parent', 'action', 'children', 'untried',
+            'visits', 'totalValue')
+
+    def __init__(self, state, agentIndex, actions, parent = None, action = None):
+        self.state = state
+        # The agent to move at this node.
+        self.agentIndex = agentIndex
+        self.parent = parent
+        # The action that led to this node.
+        self.action = action
+
+        # {action: MCTSNode}
+        self.children = {}
+        # Actions that do not have a child yet.
+        self.untried = list(actions)
+        random.shuffle(self.untried)
+
+        self.visits = 0
+        self.totalValue = 0.0
+
+    def getMeanValue(self):
+        if (self.visits == 0):
+            return 0.0
+
+        return self.totalValue / self.visits
+
+    def isLeaf(self):
+        return len(self.untried) > 0 or len(self.children) == 0
+
+class MCTSAgent(BaseAgent):
+    """
+    An agent that picks its moves with UCT (MCTS using upper confidence bounds to select moves).
+
+    Each turn, the agent searches for `moveTime` seconds (or for `maxIterations` iterations).
+    Every agent is modeled as picking the moves that are best for its team:
+    in Pacman, the ghosts work against Pacman,
+    and in capture, teammates work with this agent while the other team works against it.
+    States are judged by the evaluation function (`evalFn`) at the end of each rollout.
+    Like the game score, evaluation functions should give the value of a state for Pacman
+    (or, in capture, for the red team).
+
+    Rollouts last up to `rolloutDepth` moves (by any agent) and pick moves using one of:
+    `RANDOM_ROLLOUT`: uniformly random moves,
+    `GREEDY_ROLLOUT`: the move that most improves the score for the moving agent's team,
+    `REFLEX_ROLLOUT`: the move with the best evaluation for the moving agent's team,
+    or a rollout function `(agent, state, agentIndex) -> action` given by its qualified name.
+
+    With `reuseTree`, the part of the tree under the actual moves made since the last turn is kept.
+    With more than one of `workers`, rollouts are run in parallel by a persistent pool of
+    processes (see `pacai.agents.search.parallel`), one leaf per worker each iteration.
+    """
+
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', moveTime = 0.5,
+            maxIterations = None, exploration = DEFAULT_EXPLORATION,
+            rollout = RANDOM_ROLLOUT, rolloutDepth = 20, reuseTree = True, workers = 0,
+            **kwargs):
+        super().__init__(index, **kwargs)
+
+        self._evaluationFunction = reflection.qualifiedImport(evalFn)
+
+        self._moveTime = float(moveTime)
+
+        self._maxIterations = None
+        if (maxIterations is not None):
+            self._maxIterations = int(maxIterations)
+
+        self._exploration = float(exploration)
+        self._rolloutDepth = int(rolloutDepth)
+        self._reuseTree = util.parseBool(reuseTree)
+        self._workers = int(workers)
+
+        if (rollout in ROLLOUT_POLICIES):
+            self._rolloutPolicy = ROLLOUT_POLICIES[rollout]
+        elif (isinstance(rollout, str)):
+            self._rolloutPolicy = reflection.qualifiedImport(rollout)
+        else:
+            self._rolloutPolicy = rollout
+
+        # Identifies this agent (and game) to the rollout workers.
+        self._agentKey = parallel.newAgentKey()
+
+        self._root = None
+
+        # The range of rollout values seen in the tree, used to scale values for selection.
+        self._minValue = math.inf
+        self._maxValue = -math.inf
+
+        # The number of iterations run by the last search.
+        self._iterations = 0
+
+    def getAction(self, state):
+        return self.searchAction(state)
+
+    def getEvaluationFunction(self):
+        return self._evaluationFunction
+
+    def getIterations(self):
+        return self._iterations
+
+    def getRoot(self):
+        return self._root
+
+    def registerInitialState(self, state):
+        self._root = None
+        self._minValue = math.inf
+        self._maxValue = -math.inf
+
+        # The rollout workers' copies of this agent are from the last game.
+        self._agentKey = parallel.newAgentKey(self._agentKey)
+
+    def evaluate(self, state):
+        """
+        The value of a state for this agent's team.
+        """
+
+        return self.getTeamSign(state, self.index) * self.getEvaluationFunction()(state)
+
+    def getSearchActions(self, state, agentIndex):
+        """
+        The actions to search for an agent.
+        This agent never considers stopping (unless it has to).
+        """
+
+        if (state.isOver()):
+            return []
+
+        actions = state.getLegalActions(agentIndex)
+
+        if (agentIndex == self.index and len(actions) > 1):
+            actions = [action for action in actions if action != Directions.STOP]
+
+        return actions
+
+    def getTeamSign(self, state, agentIndex):
+        """
+        1 if the agent's team wants the score to go up, -1 if it wants it to go down.
+        """
+
+        if (hasattr(state, 'isOnRedTeam')):
+            return 1 if state.isOnRedTeam(agentIndex) else -1
+
+        # In Pacman, Pacman (index 0) wants the score to go up and the ghosts want it to go down.
+        return 1 if agentIndex == 0 else -1
+
+    def isTeammate(self, state, agentIndex):
+        return self.getTeamSign(state, agentIndex) == self.getTeamSign(state, self.index)
+
+    def rollout(self, state, agentIndex):
+        """
+        Play the game out from a state (with the given agent to move)
+        and return the value of where it ends up.
+        """
+
+        numAgents = state.getNumAgents()
+
+        for i in range(self._rolloutDepth):
+            if (state.isOver()):
+                break
+
+            actions = state.getLegalActions(agentIndex)
+            if (len(actions) == 0):
+                break
+
+            action = self._rolloutPolicy(self, state, agentIndex)
+            state = state.generateSuccessor(agentIndex, action)
+            agentIndex = (agentIndex + 1) % numAgents
+
+        return self.evaluate(state)
+
+    def searchAction(self, state, moveTime = None):
+        """
+        Search from the given state (for moveTime seconds, the agent's move time by default)
+        and return the most visited action.
+        """
+
+        if (moveTime is None):
+            moveTime = self._moveTime
+
+        starttime = time.time()
+        deadline = starttime + moveTime
+
+        self._root = self._findRoot(state)
+        self._iterations = 0
+
+        actions = self.getSearchActions(state, self.index)
+        if (len(actions) <= 1):
+            return actions[0] if len(actions) == 1 else Directions.STOP
+
+        while (self._maxIterations is None or self._iterations < self._maxIterations):
+            if (time.time() >= deadline):
+                break
+
+            if (self._workers > 1):
+                # Never run more rollouts than the iterations left.
+                rollouts = self._workers
+                if (self._maxIterations is not None):
+                    rollouts = min(rollouts, self._maxIterations - self._iterations)
+
+                self._iterations += self._parallelIteration(rollouts)
+            else:
+                self._iteration()
+                self._iterations += 1
+
+        children = list(self._root.children.values())
+        if (len(children) == 0):
+            # No iterations ran (no time or no iterations were allowed), so nothing is known.
+            logging.debug('MCTS ran no iterations, picking a random action.')
+            return random.choice(actions)
+
+        best = max(children, key = lambda child: (child.visits, child.getMeanValue()))
+
+        logging.debug('MCTS ran %d iterations in %.3f seconds, %s has %d visits (mean %.2f).' %
+                (self._iterations, time.time() - starttime, best.action, best.visits,
+                best.getMeanValue()))
+
+        return best.action
+
+    def _backup(self, node, value):
+        self._minValue = min(self._minValue, value)
+        self._maxValue = max(self._maxValue, value)
+
+        while (node is not None):
+            node.visits += 1
+            node.totalValue += value
+            node = node.parent
+
+    def _expand(self, node):
+        action = node.untried.pop()
+        successor = node.state.generateSuccessor(node.agentIndex, action)
+        nextAgent = (node.agentIndex + 1) % successor.getNumAgents()
+
+        child = MCTSNode(successor, nextAgent, self.getSearchActions(successor, nextAgent),
+                node, action)
+        node.children[action] = child
+
+        return child
+
+    def _findRoot(self, state):
+        """
+        Find the node for the state in the last search's tree (so it can be reused),
+        or start a new tree.
+        """
+
+        if (self._reuseTree and self._root is not None):
+            # The state should be one full round of moves below the last root.
+            frontier = [self._root]
+            for i in range(state.getNumAgents()):
+                frontier = [child for node in frontier for child in node.children.values()]
+
+            for node in frontier:
+                if (node.agentIndex == self.index and node.state == state):
+                    node.parent = None
+                    node.action = None
+                    return node
+
+        return MCTSNode(state, self.index, self.getSearchActions(state, self.index))
+
+    def _iteration(self):
+        node = self._select()
+        if (len(node.untried) > 0):
+            node = self._expand(node)
+
+        self._backup(node, self.rollout(node.state, node.agentIndex))
+
+    def _parallelIteration(self, rollouts):
+        """
+        Select a leaf for each rollout (at most one per worker),
+        roll them out in parallel, and back up the results.
+        Leaves being rolled out get a virtual loss (see `MCTSAgent._selectLeaves`)
+        so that the next selection tends to pick a different leaf.
+        Returns the number of rollouts done.
+        """
+
+        losses = self._getVirtualLosses()
+        leaves = self._selectLeaves(rollouts, losses)
+
+        jobs = [(self._agentKey, self, node.state, node.agentIndex, random.getrandbits(32))
+                for node in leaves]
+        values = parallel.getPool(self._workers).map(_rolloutJob, jobs)
+
+        for (node, value) in zip(leaves, values):
+            self._addVirtualLoss(node, -1, losses)
+            self._backup(node, value)
+
+        return len(leaves)
+
+    def _addVirtualLoss(self, node, visits, losses):
+        """
+        Add (or with negative visits, remove) visits with a losing value
+        to a node and its ancestors.
+        Each node loses from the point of view of the agent that chose it (the agent to move at
+        its parent): the worst value for the searching agent's team, the best value otherwise.
+        """
+
+        worst, best = losses
+
+        while (node is not None):
+            value = worst
+            if (node.parent is not None
+                    and not self.isTeammate(node.parent.state, node.parent.agentIndex)):
+                value = best
+
+            node.visits += visits
+            node.totalValue += visits * value
+            node = node.parent
+
+    def _getVirtualLosses(self):
+        """
+        Get the (worst, best) values seen (from the searching agent's point of view)
+        to use as virtual losses.
+        They are fixed for a whole parallel iteration, so losses are removed exactly as added.
+        """
+
+        if (self._minValue == math.inf):
+            return (0.0, 0.0)
+
+        return (self._minValue, self._maxValue)
+
+    def _selectLeaves(self, rollouts, losses):
+        """
+        Select (and expand) a leaf for each rollout.
+        Each leaf gets a virtual loss as soon as it is selected.
+        """
+
+        leaves = []
+        for i in range(rollouts):
+            node = self._select()
+            if (len(node.untried) > 0):
+                node = self._expand(node)
+
+            leaves.append(node)
+            self._addVirtualLoss(node, 1, losses)
+
+        return leaves
+
+    def _scale(self, value):
+        if (self._maxValue <= self._minValue):
+            return 0.5
+
+        return (value - self._minValue) / (self._maxValue - self._minValue)
+
+    def _select(self):
+        """
+        Walk down the tree picking the child with the best upper confidence bound
+        (for the agent to move) until reaching a node that is not fully expanded.
+        """
+
+        node = self._root
+
+        while (not node.isLeaf()):
+            teammate = self.isTeammate(node.state, node.agentIndex)
+            logVisits = math.log(max(1, node.visits))
+
+            def bound(child):
+                if (child.visits == 0):
+                    return math.inf
+
+                value = self._scale(child.getMeanValue())
+                if (not teammate):
+                    value = 1.0 - value
+
+                return value + self._exploration * math.sqrt(logVisits / child.visits)
+
+            node = max(node.children.values(), key = bound)
+
+        return node
+
+    def __getstate__(self):
+        # Rollout workers don't need the tree.
+        state = self.__dict__.copy()
+        state['_root'] = None
+        return state
+
+def randomRollout(agent, state, agentIndex):
+    return random.choice(state.getLegalActions(agentIndex))
+
+def greedyRollout(agent, state, agentIndex):
+    """
+    Pick the move that most improves the score for the moving agent's team
+    (breaking ties randomly).
+    """
+
+    sign = agent.getTeamSign(state, agentIndex)
+    return _bestAction(state, agentIndex,
+            lambda successor: sign * successor.getScore())
+
+def reflexRollout(agent, state, agentIndex):
+    """
+    Pick the move with the best evaluation for the moving agent's team
+    (breaking ties randomly).
+    """
+
+    sign = agent.getTeamSign(state, agentIndex)
+    evaluationFunction = agent.getEvaluationFunction()
+
+    return _bestAction(state, agentIndex,
+            lambda successor: sign * evaluationFunction(successor))
+
+ROLLOUT_POLICIES = {
+    RANDOM_ROLLOUT: randomRollout,
+    GREEDY_ROLLOUT: greedyRollout,
+    REFLEX_ROLLOUT: reflexRollout,
+}
+
+def _bestAction(state, agentIndex, valueFunction):
+    bestValue = -math.inf
+    bestActions = []
+
+    for action in state.getLegalActions(agentIndex):
+        value = valueFunction(state.generateSuccessor(agentIndex, action))
+
+        if (value > bestValue):
+            bestValue = value
+            bestActions = [action]
+        elif (value == bestValue):
+            bestActions.append(action)
+
+    return random.choice(bestActions)
+
+def _rolloutJob(job):
+    agentKey, agent, state, agentIndex, seed = job
+
+    # Worker processes start with the same random state, so each rollout gets its own seed.
+    random.seed(seed)
+
+    return parallel.getWorkerAgent(agentKey, agent).rollout(state, agentIndex)
@@ -1,19 +1,678 @@
+import logging
+import math
+import time
+
 from pacai.agents.base import BaseAgent
+from pacai.agents.search import parallel
+from pacai.agents.search import evaluation
+from pacai.agents.search.evaluation import EvaluationCache
+from pacai.agents.search import transposition
+from pacai.agents.search.ordering import MoveOrderer
+from pacai.core.directions import Directions
+from pacai.util import probability
 from pacai.util import reflection
+from pacai.util import util
+
+MINIMAX = 'minimax'
+ALPHA_BETA = 'alphabeta'
+EXPECTIMAX = 'expectimax'
+
+# When iteratively deepening, the deepest search to try.
+DEFAULT_MAX_DEPTH = 64
+
+# Don't start another iteration if more than this fraction of the move time has been used,
+# since it would almost certainly not finish.
+NEXT_ITERATION_FRACTION = 0.5
+
+# How many nodes to search between checks of the clock.
+TIME_CHECK_INTERVAL = 32
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its deadline has passed.
+    """
+
+    pass
 
 class MultiAgentSearchAgent(BaseAgent):
     """
     A common class for all multi-agent searchers.
+
+    This class also provides a framework-level adversarial search
+    (`MultiAgentSearchAgent.searchAction`) for minimax, alpha-beta, and expectimax.
+    Plies go through the agents in index order,
+    and one level of depth is a move by every agent.
+    This agent maximizes the evaluation function, every other agent minimizes it
+    (or, for expectimax, picks uniformly at random).
+
+    Searched positions are kept in a `pacai.agents.search.transposition.TranspositionTable`
+    (of `tableSize` entries, 0 to disable) that is reused across the turns of a game.
+
+    When a `moveTime` (in seconds) is given, the search iteratively deepens
+    (up to `maxDepth`) until the time is up instead of searching to a fixed `depth`.
+    Each iteration searches the best moves of the previous iteration first,
+    and the best move from the deepest completed iteration is used.
+
+    Alpha-beta searches the moves of each node in the order given by a
+    `pacai.agents.search.ordering.MoveOrderer`:
+    the hash move first, then (with `ordering`) killer moves and the history table.
+    `staticOrdering` additionally orders moves by the evaluation of their successors.
+
+    With more than one of `workers`, the root actions are searched in parallel by a
+    persistent pool of processes (see `pacai.agents.search.parallel`),
+    sharing the best root value as alpha.
+    With `youngBrothersWait`, the first root action is searched (by this process) before the
+    others are sent out, so the workers start with a good alpha.
+
+    With an `evalCacheSize`, evaluations are memoized in a
+    `pacai.agents.search.evaluation.EvaluationCache`.
+    A `batchEvalFn` (`[state, ...] -> [value, ...]`) evaluates all the children of a node
+    just above the leaves in a single call.
+
+    Expectimax models the other agents as picking uniformly at random,
+    or, with a `ghostModel` (the qualified name of a `pacai.agents.ghost.base.GhostAgent`),
+    by the model's action distribution.
+    Unless `ghostModelCache` is turned off, the models memoize their distributions
+    (see `pacai.agents.ghost.base.GhostAgent.getCachedDistribution`).
+    Outcomes less likely than `chanceThreshold` are not searched,
+    and with `chanceSamples`, only that many sampled outcomes are searched at each chance node.
     """
 
-    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2, **kwargs):
+    def __init__(self, index, evalFn = 'pacai.core.eval.score', depth = 2,
+            tableSize = transposition.DEFAULT_SIZE, tablePolicy = transposition.REPLACE_DEPTH,
+            moveTime = None, maxDepth = DEFAULT_MAX_DEPTH,
+            ordering = True, staticOrdering = False,
+            workers = 0, youngBrothersWait = False,
+            evalCacheSize = 0, batchEvalFn = None,
+            ghostModel = None, ghostModelCache = True, chanceThreshold = 0.0, chanceSamples = 0,
+            **kwargs):
         super().__init__(index, **kwargs)
 
         self._evaluationFunction = reflection.qualifiedImport(evalFn)
+
+        if (isinstance(batchEvalFn, str)):
+            batchEvalFn = reflection.qualifiedImport(batchEvalFn)
+        self._batchEvaluation = (batchEvalFn is not None)
+
+        self._evaluationCache = None
+        if (int(evalCacheSize) > 0 or self._batchEvaluation):
+            size = int(evalCacheSize) if int(evalCacheSize) > 0 else evaluation.DEFAULT_SIZE
+            self._evaluationCache = EvaluationCache(self._evaluationFunction, size, batchEvalFn)
+            self._evaluationFunction = self._evaluationCache
         self._treeDepth = int(depth)
 
+        self._moveTime = None
+        if (moveTime is not None):
+            self._moveTime = float(moveTime)
+
+        self._maxDepth = int(maxDepth)
+
+        # The depth limit of the running search.
+        self._depthLimit = self._treeDepth
+
+        # When the running search must stop (a time.time() value), or None.
+        self._deadline = None
+
+        # The depth of the last completed search.
+        self._depthReached = 0
+
+        self._tableSize = int(tableSize)
+        self._tablePolicy = tablePolicy
+
+        self._transpositionTable = None
+        if (self._tableSize > 0):
+            self._transpositionTable = transposition.TranspositionTable(tableSize, tablePolicy)
+
+        ordering = util.parseBool(ordering)
+        self._moveOrderer = MoveOrderer(killers = ordering, history = ordering,
+                staticOrdering = util.parseBool(staticOrdering))
+
+        self._opponentModelClass = None
+        if (ghostModel is not None):
+            self._opponentModelClass = reflection.qualifiedImport(ghostModel)
+
+        self._cacheOpponentModels = util.parseBool(ghostModelCache)
+
+        # {agentIndex: model}, created as needed.
+        self._opponentModels = {}
+
+        self._chanceThreshold = float(chanceThreshold)
+        self._chanceSamples = int(chanceSamples)
+
+        self._workers = int(workers)
+        self._youngBrothersWait = util.parseBool(youngBrothersWait)
+
+        # Identifies this agent (and game) to the search workers (which keep their own copy of it).
+        self._agentKey = parallel.newAgentKey()
+
+        # The number of nodes visited by the last search.
+        self._nodesSearched = 0
+
+    def getDepthReached(self):
+        """
+        The depth of the deepest search completed for the last move.
+        """
+
+        return self._depthReached
+
     def getEvaluationFunction(self):
         return self._evaluationFunction
 
+    def getEvaluationCache(self):
+        return self._evaluationCache
+
+    def getOpponentModel(self, agentIndex):
+        """
+        Get the model (a `pacai.agents.ghost.base.GhostAgent`) used to predict the actions of
+        another agent in expectimax, or None if the agents are modeled as uniformly random.
+        """
+
+        if (self._opponentModelClass is None):
+            return None
+
+        if (agentIndex not in self._opponentModels):
+            self._opponentModels[agentIndex] = self._opponentModelClass(agentIndex,
+                    cacheDistributions = self._cacheOpponentModels)
+
+        return self._opponentModels[agentIndex]
+
+    def getMoveOrderer(self):
+        return self._moveOrderer
+
+    def getNodesSearched(self):
+        return self._nodesSearched
+
+    def getTranspositionTable(self):
+        return self._transpositionTable
+
     def getTreeDepth(self):
         return self._treeDepth
+
+    def __getstate__(self):
+        # Search workers start with an empty table (rather than pickling the whole table).
+        state = self.__dict__.copy()
+        state['_transpositionTable'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+
+        if (self._tableSize > 0):
+            self._transpositionTable = transposition.TranspositionTable(self._tableSize,
+                    self._tablePolicy)
+
+    def registerInitialState(self, state):
+        # Positions from a previous game are of no use.
+        if (self._transpositionTable is not None):
+            self._transpositionTable.clear()
+
+        self._moveOrderer.clear()
+
+        if (self._evaluationCache is not None):
+            self._evaluationCache.clear()
+
+        # Models cache what they learn about the layout.
+        self._opponentModels = {}
+
+        # The search workers' copies of this agent are from the last game.
+        self._agentKey = parallel.newAgentKey(self._agentKey)
+
+    def searchAction(self, state, mode = ALPHA_BETA):
+        """
+        Search from the given state and return the best action for this agent.
+        The mode is one of `MINIMAX`, `ALPHA_BETA`, or `EXPECTIMAX`.
+        """
+
+        if (self._moveTime is not None):
+            return self.iterativeDeepening(state, mode, self._moveTime)[1]
+
+        return self.searchRoot(state, mode)[1]
+
+    def iterativeDeepening(self, state, mode = ALPHA_BETA, moveTime = 1.0):
+        """
+        Search to increasing depths until the time (in seconds) runs out.
+        A search that runs out of time is abandoned,
+        and (value, best action) from the deepest completed search is returned.
+        """
+
+        starttime = time.time()
+        deadline = starttime + moveTime
+
+        bestValue = None
+        bestAction = None
+        rootOrder = None
+        nodes = 0
+
+        self._depthReached = 0
+        self._moveOrderer.newSearch()
+
+        for depth in range(1, self._maxDepth + 1):
+            try:
+                value, action, rootOrder = self._searchRoot(state, mode, depth, deadline,
+                        rootOrder)
+            except SearchTimeout:
+                break
+            finally:
+                nodes += self._nodesSearched
+
+            bestValue = value
+            bestAction = action
+            self._depthReached = depth
+
+            if ((time.time() - starttime) > (moveTime * NEXT_ITERATION_FRACTION)):
+                break
+
+        self._nodesSearched = nodes
+
+        if (bestAction is None):
+            # Not even the shallowest search finished.
+            actions = self._getSearchActions(state, self.index)
+            if (len(actions) > 0):
+                bestAction = actions[0]
+
+        logging.debug('Iterative deepening reached depth %d (%d nodes) in %.3f seconds.' %
+                (self._depthReached, self._nodesSearched, time.time() - starttime))
+        self._logOrdering(mode)
+
+        return bestValue, bestAction
+
+    def searchRoot(self, state, mode = ALPHA_BETA, depth = None):
+        """
+        Search from the given state (to the given depth, the tree depth by default)
+        and return (value, best action) for this agent.
+        """
+
+        if (depth is None):
+            depth = self._treeDepth
+
+        self._moveOrderer.newSearch()
+
+        value, action, order = self._searchRoot(state, mode, depth)
+        self._depthReached = depth
+        self._logOrdering(mode)
+
+        return value, action
+
+    def _searchRoot(self, state, mode, depth, deadline = None, rootOrder = None):
+        """
+        Search the root to a fixed depth.
+        The root actions are searched in the given order (if any),
+        and (value, best action, actions ordered by value) is returned.
+        """
+
+        if (mode not in [MINIMAX, ALPHA_BETA, EXPECTIMAX]):
+            raise ValueError('Unknown search mode: %s.' % (mode))
+
+        self._startSearch(depth, deadline)
+
+        actions = self._getSearchActions(state, self.index)
+        if (rootOrder is not None):
+            actions = ([action for action in rootOrder if action in actions]
+                    + [action for action in actions if action not in rootOrder])
+
+        if (self._workers > 1 and len(actions) > 1):
+            values = self._searchChildrenParallel(state, actions, mode)
+        else:
+            values = self._searchChildrenSerial(state, actions, mode)
+
+        bestValue = -math.inf
+        bestAction = None
+
+        for (value, action, exact) in values:
+            if (exact and value > bestValue):
+                bestValue = value
+                bestAction = action
+
+        # The best action first, the rest by their (possibly bounded) values.
+        order = [bestAction] + [action for (value, action, exact)
+                in sorted(values, key = lambda value: -value[0]) if action != bestAction]
+
+        return bestValue, bestAction, order
+
+    def searchChild(self, state, action, mode, depth, alpha = -math.inf, deadline = None):
+        """
+        Search the child of a root state (reached by this agent taking the action)
+        as a search of its own.
+        This is how search workers (see `pacai.agents.search.parallel`) search root children.
+
+        Returns (value, nodes searched), where the value is None if the search ran out of time.
+        """
+
+        self._startSearch(depth, deadline)
+
+        try:
+            value = self._searchChild(state, action, mode, alpha)
+        except SearchTimeout:
+            value = None
+
+        return value, self._nodesSearched
+
+    def _searchChild(self, state, action, mode, alpha):
+        successor = state.generateSuccessor(self.index, action)
+        nextAgent, nextDepth = self._nextPly(state, self.index, 0)
+
+        if (mode == EXPECTIMAX):
+            return self._expectimax(successor, nextAgent, nextDepth)
+
+        return self._alphaBeta(successor, nextAgent, nextDepth, alpha, math.inf,
+                mode == ALPHA_BETA, 1)
+
+    def _searchChildrenParallel(self, state, actions, mode):
+        """
+        Search the root children with the worker pool.
+        Returns [(value, action, exact), ...].
+        """
+
+        pool = parallel.getPool(self._workers)
+        pool.resetAlpha()
+
+        shareAlpha = (mode == ALPHA_BETA)
+        values = []
+
+        if (self._youngBrothersWait):
+            # The eldest brother is searched first, the younger ones wait for its alpha.
+            value = self._searchChild(state, actions[0], mode, -math.inf)
+            values.append((value, actions[0], True))
+
+            if (shareAlpha):
+                pool.raiseAlpha(value)
+
+            actions = actions[1:]
+
+        results = pool.searchChildren(self._agentKey, self, state, actions, mode,
+                self._depthLimit, shareAlpha, self._deadline)
+
+        timedOut = False
+        for (action, value, alpha, nodes) in results:
+            self._nodesSearched += nodes
+
+            if (value is None):
+                timedOut = True
+                continue
+
+            # A (fail-soft) value at or below the alpha it was searched with is only a bound.
+            values.append((value, action, alpha == -math.inf or value > alpha))
+
+        if (timedOut):
+            raise SearchTimeout()
+
+        return values
+
+    def _searchChildrenSerial(self, state, actions, mode):
+        """
+        Search the root children one after another.
+        Returns [(value, action, exact), ...].
+        """
+
+        alpha = -math.inf
+        values = []
+
+        for action in actions:
+            value = self._searchChild(state, action, mode, alpha)
+            values.append((value, action, True))
+
+            if (mode == ALPHA_BETA):
+                alpha = max(alpha, value)
+
+        return values
+
+    def _startSearch(self, depth, deadline):
+        self._nodesSearched = 0
+        self._depthLimit = depth
+        self._deadline = deadline
+
+        if (self._transpositionTable is not None):
+            self._transpositionTable.newSearch()
+
+    def _checkTime(self):
+        if (self._deadline is None):
+            return
+
+        if (self._nodesSearched % TIME_CHECK_INTERVAL == 0 and time.time() >= self._deadline):
+            raise SearchTimeout()
+
+    def _alphaBeta(self, state, agentIndex, depth, alpha, beta, prune, ply):
+        """
+        The (fail-soft) alpha-beta value of a state with the given agent to move,
+        ply moves below the root.
+        Without pruning, this is just minimax.
+        """
+
+        self._nodesSearched += 1
+        self._checkTime()
+
+        actions = self._getSearchActions(state, agentIndex)
+        if (depth == self._depthLimit or len(actions) == 0):
+            return self.getEvaluationFunction()(state)
+
+        remaining = self._depthLimit - depth
+        key = (hash(state), agentIndex)
+
+        # The best move from an earlier search (e.g. the last iteration).
+        hashMove = None
+
+        if (self._transpositionTable is not None):
+            entry = self._transpositionTable.get(key)
+            if (entry is not None and entry.depth >= remaining):
+                if (entry.bound == transposition.EXACT):
+                    return entry.value
+                elif (prune and entry.bound == transposition.LOWER_BOUND):
+                    alpha = max(alpha, entry.value)
+                elif (prune and entry.bound == transposition.UPPER_BOUND):
+                    beta = min(beta, entry.value)
+
+                if (alpha >= beta):
+                    return entry.value
+
+            if (entry is not None):
+                hashMove = entry.bestMove
+
+        originalAlpha = alpha
+        originalBeta = beta
+
+        maximizing = (agentIndex == self.index)
+        nextAgent, nextDepth = self._nextPly(state, agentIndex, depth)
+
+        # {action: successor}, generated up front only when needed to order the moves.
+        successors = {}
+
+        if (prune):
+            if (self._moveOrderer.isStatic()):
+                successors = {action: state.generateSuccessor(agentIndex, action)
+                        for action in actions}
+
+            actions = self._moveOrderer.order(state, agentIndex, ply, actions, hashMove,
+                    successors, self.getEvaluationFunction(), maximizing)
+
+        leafValues = self._evaluateLeaves(state, agentIndex, nextDepth, actions, successors)
+
+        bestValue = -math.inf if maximizing else math.inf
+        bestAction = None
+        cutoffAction = None
+        cutoffNumber = None
+
+        for (moveNumber, action) in enumerate(actions):
+            if (leafValues is not None):
+                self._nodesSearched += 1
+                value = leafValues[moveNumber]
+            else:
+                successor = successors.get(action)
+                if (successor is None):
+                    successor = state.generateSuccessor(agentIndex, action)
+
+                value = self._alphaBeta(successor, nextAgent, nextDepth, alpha, beta, prune,
+                        ply + 1)
+
+            if (maximizing and value > bestValue) or (not maximizing and value < bestValue):
+                bestValue = value
+                bestAction = action
+
+            if (not prune):
+                continue
+
+            if (maximizing):
+                alpha = max(alpha, bestValue)
+            else:
+                beta = min(beta, bestValue)
+
+            if (alpha >= beta):
+                cutoffAction = action
+                cutoffNumber = moveNumber
+                break
+
+        if (prune):
+            self._moveOrderer.recordNode(state, agentIndex, ply, cutoffAction, remaining,
+                    cutoffNumber)
+
+        if (self._transpositionTable is not None):
+            bound = transposition.EXACT
+            if (prune and bestValue <= originalAlpha):
+                bound = transposition.UPPER_BOUND
+            elif (prune and bestValue >= originalBeta):
+                bound = transposition.LOWER_BOUND
+
+            self._transpositionTable.put(key, remaining, bestValue, bound, bestAction)
+
+        return bestValue
+
+    def _expectimax(self, state, agentIndex, depth):
+        """
+        The expectimax value of a state with the given agent to move,
+        where every other agent picks its action by chance (see `_chanceOutcomes`).
+        """
+
+        self._nodesSearched += 1
+        self._checkTime()
+
+        actions = self._getSearchActions(state, agentIndex)
+        if (depth == self._depthLimit or len(actions) == 0):
+            return self.getEvaluationFunction()(state)
+
+        remaining = self._depthLimit - depth
+        key = (hash(state), agentIndex)
+
+        if (self._transpositionTable is not None):
+            entry = self._transpositionTable.get(key)
+            if (entry is not None and entry.depth >= remaining):
+                return entry.value
+
+        nextAgent, nextDepth = self._nextPly(state, agentIndex, depth)
+
+        if (agentIndex != self.index):
+            outcomes = self._chanceOutcomes(state, agentIndex, actions)
+            actions = [action for (action, likelihood) in outcomes]
+
+        childValues = self._evaluateLeaves(state, agentIndex, nextDepth, actions, {})
+        if (childValues is not None):
+            self._nodesSearched += len(actions)
+        else:
+            childValues = [self._expectimax(state.generateSuccessor(agentIndex, action),
+                    nextAgent, nextDepth) for action in actions]
+
+        bestAction = None
+        if (agentIndex == self.index):
+            value = -math.inf
+            for (action, childValue) in zip(actions, childValues):
+                if (childValue > value):
+                    value = childValue
+                    bestAction = action
+        else:
+            value = 0.0
+            for ((action, likelihood), childValue) in zip(outcomes, childValues):
+                value += likelihood * childValue
+
+        if (self._transpositionTable is not None):
+            self._transpositionTable.put(key, remaining, value, transposition.EXACT, bestAction)
+
+        return value
+
+    def _chanceOutcomes(self, state, agentIndex, actions):
+        """
+        Get the outcomes of a chance node as [(action, probability), ...].
+
+        Without an opponent model, every action is equally likely.
+        Otherwise, the probabilities come from the model's distribution.
+        Actions less likely than the chance threshold are dropped (the rest are renormalized),
+        and with chance samples, that many actions are sampled and weighted by how often they
+        were drawn.
+        """
+
+        if (self._opponentModelClass is None):
+            outcomes = [(action, 1.0 / len(actions)) for action in actions]
+        else:
+            distribution = self.getOpponentModel(agentIndex).getCachedDistribution(state)
+            outcomes = [(action, distribution.get(action, 0.0)) for action in actions]
+            outcomes = [(action, likelihood) for (action, likelihood) in outcomes
+                    if likelihood > 0.0]
+
+            if (len(outcomes) == 0):
+                outcomes = [(action, 1.0 / len(actions)) for action in actions]
+
+        if (self._chanceThreshold > 0.0):
+            likely = [outcome for outcome in outcomes if outcome[1] >= self._chanceThreshold]
+            if (len(likely) == 0):
+                likely = [max(outcomes, key = lambda outcome: outcome[1])]
+
+            if (len(likely) < len(outcomes)):
+                total = sum([likelihood for (action, likelihood) in likely])
+                outcomes = [(action, likelihood / total) for (action, likelihood) in likely]
+
+        if (self._chanceSamples > 0 and self._chanceSamples < len(outcomes)):
+            samples = probability.nSample([outcome[1] for outcome in outcomes],
+                    [outcome[0] for outcome in outcomes], self._chanceSamples)
+
+            outcomes = [(action, samples.count(action) / len(samples))
+                    for (action, likelihood) in outcomes if action in samples]
+
+        return outcomes
+
+    def _evaluateLeaves(self, state, agentIndex, nextDepth, actions, successors):
+        """
+        When the children of a node are leaves and evaluation is batched,
+        evaluate all of them in one call and return their values (in the order of the actions).
+        Otherwise, return None.
+        The successors ({action: state}) are used (and filled in) as needed.
+        """
+
+        if (not self._batchEvaluation or nextDepth != self._depthLimit):
+            return None
+
+        for action in actions:
+            if (action not in successors):
+                successors[action] = state.generateSuccessor(agentIndex, action)
+
+        return self._evaluationCache.evaluateAll([successors[action] for action in actions])
+
+    def _getSearchActions(self, state, agentIndex):
+        """
+        The actions to search for an agent.
+        This agent never considers stopping.
+        """
+
+        actions = state.getLegalActions(agentIndex)
+
+        if (agentIndex == self.index):
+            actions = [action for action in actions if action != Directions.STOP]
+
+        return actions
+
+    def _logOrdering(self, mode):
+        if (mode != ALPHA_BETA):
+            return
+
+        orderer = self._moveOrderer
+        logging.debug('Alpha-beta cut off %d of %d nodes (%.2f), %.2f on the first move.' %
+                (orderer.cutoffs, orderer.nodes, orderer.getCutoffRate(),
+                orderer.getFirstMoveCutoffRate()))
+
+    def _nextPly(self, state, agentIndex, depth):
+        """
+        Get the (agent index, depth) of the ply after the given agent moves.
+        """
+
+        nextAgent = (agentIndex + 1) % state.getNumAgents()
+
+        if (nextAgent == self.index):
+            depth += 1
+
+        return nextAgent, depth
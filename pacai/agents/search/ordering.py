@@ -0,0 +1,141 @@
+"""
+Move ordering for alpha-beta search.
+
+Alpha-beta prunes the most when the best move at each node is searched first.
+`MoveOrderer` guesses the best moves using (in priority order):
+
+ - the hash move: the best move stored in the transposition table for the position,
+ - killer moves: moves that caused a cutoff at the same ply in a sibling subtree,
+ - the history table: how often (weighted by the remaining depth) a move caused a cutoff,
+ - optionally, a static ordering by the evaluation of each successor.
+"""
+
+# How many killer moves are kept per ply.
+NUM_KILLERS = 2
+
+class MoveOrderer:
+    """
+    Orders the moves of alpha-beta nodes and keeps the statistics needed to do so.
+
+    The orderer also counts cutoffs, so the quality of the ordering can be measured:
+    `MoveOrderer.getCutoffRate` is the fraction of searched nodes that were cut off,
+    and `MoveOrderer.getFirstMoveCutoffRate` is the fraction of cutoffs caused by the
+    first move searched (1.0 is perfect ordering).
+    """
+
+    def __init__(self, killers = True, history = True, staticOrdering = False):
+        self._useKillers = killers
+        self._useHistory = history
+        self._useStatic = staticOrdering
+
+        # {ply: [move, ...]}, most recent first.
+        self._killers = {}
+
+        # {(agentIndex, position, move): score}
+        self._history = {}
+
+        self.nodes = 0
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
+
+    def clear(self):
+        self._killers = {}
+        self._history = {}
+        self.resetCounts()
+
+    def getCutoffRate(self):
+        if (self.nodes == 0):
+            return 0.0
+
+        return self.cutoffs / self.nodes
+
+    def getFirstMoveCutoffRate(self):
+        if (self.cutoffs == 0):
+            return 0.0
+
+        return self.firstMoveCutoffs / self.cutoffs
+
+    def isStatic(self):
+        return self._useStatic
+
+    def newSearch(self):
+        """
+        Mark the start of a new search (e.g. a new turn).
+        Killers are specific to a search tree and are dropped,
+        while the history is aged so that recent cutoffs count more.
+        """
+
+        self._killers = {}
+
+        for key in list(self._history):
+            self._history[key] //= 2
+            if (self._history[key] == 0):
+                del self._history[key]
+
+        self.resetCounts()
+
+    def order(self, state, agentIndex, ply, actions, hashMove = None,
+            successors = None, evaluationFunction = None, maximizing = True):
+        """
+        Return the actions in the order they should be searched.
+
+        When static ordering is enabled, the successors ({action: state}) are scored with the
+        evaluation function (best first for the maximizing agent, worst first for the others).
+        """
+
+        killers = self._killers.get(ply, []) if self._useKillers else []
+        position = state.getAgentPosition(agentIndex)
+
+        scores = None
+        if (self._useStatic and successors is not None and evaluationFunction is not None):
+            sign = 1 if maximizing else -1
+            scores = {action: sign * evaluationFunction(successors[action])
+                    for action in actions}
+
+        def sortKey(action):
+            key = [action == hashMove, action in killers]
+
+            if (scores is not None):
+                key.append(scores[action])
+
+            if (self._useHistory):
+                key.append(self._history.get((agentIndex, position, action), 0))
+
+            return key
+
+        # The sort is stable, so ties keep the legal action order.
+        return sorted(actions, key = sortKey, reverse = True)
+
+    def recordNode(self, state, agentIndex, ply, action, remaining, moveNumber):
+        """
+        Record a searched node.
+        If the node was cut off, action is the move that caused the cutoff and
+        moveNumber is its (zero-based) position in the search order.
+        Otherwise, action should be None.
+        """
+
+        self.nodes += 1
+
+        if (action is None):
+            return
+
+        self.cutoffs += 1
+        if (moveNumber == 0):
+            self.firstMoveCutoffs += 1
+
+        if (self._useKillers):
+            killers = self._killers.setdefault(ply, [])
+            if (action in killers):
+                killers.remove(action)
+
+            killers.insert(0, action)
+            del killers[NUM_KILLERS:]
+
+        if (self._useHistory):
+            key = (agentIndex, state.getAgentPosition(agentIndex), action)
+            self._history[key] = self._history.get(key, 0) + remaining * remaining
+
+    def resetCounts(self):
+        self.nodes = 0
+        self.cutoffs = 0
+        self.firstMoveCutoffs = 0
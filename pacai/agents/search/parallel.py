@@ -0,0 +1,164 @@
+"""
+Root-parallel adversarial search.
+
+The subtrees under each root action are independent,
+so they can be searched at the same time by a pool of worker processes.
+Agents and states are pickled and sent to the workers,
+and the best value found so far at the root (alpha) is shared through shared memory
+so that each worker can prune with the results of the others.
+
+Pools are persistent: a pool is created the first time it is needed and kept for later searches
+(and later turns), so the cost of starting processes is only paid once.
+Each worker also keeps its own copy of every agent it has seen (and so its transposition table),
+until the agent starts a new game.
+"""
+
+import atexit
+import math
+import multiprocessing
+import uuid
+
+# {number of workers: WorkerPool}
+_pools = {}
+
+# The worker's view of the shared alpha (set when a worker process starts).
+_workerAlpha = None
+
+# The worker's copies of agents, {agent id: (game, agent)}.
+_workerAgents = {}
+
+class WorkerPool:
+    """
+    A persistent pool of search processes along with the alpha they share.
+    Use `getPool` instead of constructing pools directly.
+    """
+
+    def __init__(self, workers):
+        workers = int(workers)
+        if (workers <= 0):
+            raise ValueError('The number of search workers must be positive, got %d.' % (workers))
+
+        self._workers = workers
+        self._alpha = multiprocessing.Value('d', -math.inf)
+        self._pool = multiprocessing.Pool(workers, initializer = _initWorker,
+                initargs = (self._alpha,))
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def getAlpha(self):
+        return self._alpha.value
+
+    def getNumWorkers(self):
+        return self._workers
+
+    def map(self, function, jobs):
+        """
+        Call a (module level) function on each job with the workers.
+        Returns the results in the order of the jobs.
+        """
+
+        return self._pool.map(function, jobs, chunksize = 1)
+
+    def raiseAlpha(self, value):
+        _raiseAlpha(self._alpha, value)
+
+    def resetAlpha(self, value = -math.inf):
+        with self._alpha.get_lock():
+            self._alpha.value = value
+
+    def searchChildren(self, agentKey, agent, state, actions, mode, depth,
+            shareAlpha = False, deadline = None):
+        """
+        Search the root children (one per action) with the workers
+        (see `pacai.agents.search.multiagent.MultiAgentSearchAgent.searchChild`).
+        When shareAlpha is True, each child is searched with the shared alpha as it starts.
+
+        Returns a list of (action, value, alpha used, nodes searched) in the order of the actions.
+        The value is None if the child's search ran out of time.
+        """
+
+        jobs = [(agentKey, agent, state, action, mode, depth, shareAlpha, deadline)
+                for action in actions]
+        return self.map(_searchChild, jobs)
+
+def getPool(workers):
+    """
+    Get the persistent pool with the given number of workers (creating it if necessary).
+    """
+
+    workers = int(workers)
+    if (workers not in _pools):
+        _pools[workers] = WorkerPool(workers)
+
+    return _pools[workers]
+
+def getWorkerAgent(agentKey, agent):
+    """
+    Called in a worker to get its copy of an agent.
+    The key is the agent's (id, game) (see `newAgentKey`).
+    The first copy of an agent sent to a worker is kept (along with anything it learns or caches),
+    and later copies from the same game are ignored.
+    A copy from a new game replaces the old copy (and whatever it cached about the old game).
+    """
+
+    agentId, game = agentKey
+
+    cached = _workerAgents.get(agentId)
+    if (cached is None or cached[0] != game):
+        cached = (game, agent)
+        _workerAgents[agentId] = cached
+
+    return cached[1]
+
+def newAgentKey(agentKey = None):
+    """
+    Get the key that identifies an agent to the workers (see `getWorkerAgent`).
+    Without a key, this is a new agent.
+    With the agent's current key, this is the same agent starting a new game.
+    """
+
+    if (agentKey is None):
+        return (uuid.uuid4().hex, 0)
+
+    return (agentKey[0], agentKey[1] + 1)
+
+def shutdown():
+    """
+    Stop all the pools.
+    """
+
+    for pool in _pools.values():
+        pool.close()
+
+    _pools.clear()
+
+atexit.register(shutdown)
+
+def _initWorker(alpha):
+    global _workerAlpha
+    _workerAlpha = alpha
+
+def _raiseAlpha(alpha, value):
+    with alpha.get_lock():
+        if (value > alpha.value):
+            alpha.value = value
+
+def _searchChild(job):
+    agentKey, agent, state, action, mode, depth, shareAlpha, deadline = job
+
+    # Keep the first copy of an agent, so its transposition table lives on between searches.
+    agent = getWorkerAgent(agentKey, agent)
+
+    alpha = -math.inf
+    if (shareAlpha):
+        alpha = _workerAlpha.value
+
+    value, nodes = agent.searchChild(state, action, mode, depth, alpha, deadline)
+
+    # Only values above the alpha used are exact (the others are just upper bounds).
+    if (shareAlpha and value is not None and value > alpha):
+        _raiseAlpha(_workerAlpha, value)
+
+    return action, value, alpha, nodes
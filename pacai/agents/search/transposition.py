@@ -0,0 +1,116 @@
+"""
+A bounded transposition table for adversarial search.
+
+A transposition table remembers the results of searching a position,
+so a position reached again (by a different order of moves, or on a later turn)
+does not need to be searched again.
+"""
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+DEFAULT_SIZE = 2 ** 16
+
+REPLACE_ALWAYS = 'always'
+REPLACE_DEPTH = 'depth'
+REPLACEMENT_POLICIES = [REPLACE_ALWAYS, REPLACE_DEPTH]
+
+class TranspositionEntry:
+    """
+    The result of searching a position.
+
+    depth: how deep (in plies of the searching agent) the position was searched.
+    value: the value found for the position.
+    bound: one of `EXACT`, `LOWER_BOUND` (the true value is at least value),
+        or `UPPER_BOUND` (the true value is at most value).
+    bestMove: the best move found from the position (may be None).
+    """
+
+    __slots__ = ('key', 'depth', 'value', 'bound', 'bestMove', 'generation')
+
+    def __init__(self, key, depth, value, bound, bestMove, generation):
+        self.key = key
+        self.depth = depth
+        self.value = value
+        self.bound = bound
+        self.bestMove = bestMove
+        self.generation = generation
+
+class TranspositionTable:
+    """
+    A fixed number of slots, each holding at most one entry.
+    A key always maps to the same slot, so when two keys collide the replacement policy decides
+    which entry to keep:
+
+    `REPLACE_ALWAYS`: the newest entry always wins.
+    `REPLACE_DEPTH`: the deeper entry wins,
+        unless the existing entry is from an older search (see `TranspositionTable.newSearch`).
+
+    Keys are typically `(hash(state), agentIndex)`.
+    """
+
+    def __init__(self, size = DEFAULT_SIZE, policy = REPLACE_DEPTH):
+        size = int(size)
+        if (size <= 0):
+            raise ValueError('Transposition table size must be positive, got %d.' % (size))
+
+        if (policy not in REPLACEMENT_POLICIES):
+            raise ValueError('Unknown transposition table replacement policy: %s.' % (policy))
+
+        self._size = size
+        self._policy = policy
+        self._slots = [None] * size
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.replacements = 0
+
+    def clear(self):
+        self._slots = [None] * self._size
+        self._generation = 0
+
+    def get(self, key):
+        """
+        Get the entry for the key, or None.
+        """
+
+        entry = self._slots[hash(key) % self._size]
+        if (entry is None or entry.key != key):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry
+
+    def getSize(self):
+        return self._size
+
+    def newSearch(self):
+        """
+        Mark the start of a new search (e.g. a new turn).
+        Entries from older searches are still used, but are replaced first.
+        """
+
+        self._generation += 1
+
+    def put(self, key, depth, value, bound, bestMove = None):
+        index = hash(key) % self._size
+        existing = self._slots[index]
+
+        if (existing is not None and existing.key != key):
+            if (self._policy == REPLACE_DEPTH
+                    and existing.generation == self._generation
+                    and existing.depth > depth):
+                return
+
+            self.replacements += 1
+
+        self._slots[index] = TranspositionEntry(key, depth, value, bound, bestMove,
+                self._generation)
+        self.stores += 1
+
+    def __len__(self):
+        return sum([1 for entry in self._slots if entry is not None])
@@ -224,6 +224,18 @@ class CaptureGameState(AbstractGameState):
 
         return self._teams[agentIndex]
 
+    # Override
+    def _getUndoRecord(self):
+        return (super()._getUndoRecord(), self._timeleft,
+                self._redFood, self._blueFood, self._redCapsules, self._blueCapsules)
+
+    # Override
+    def _restoreUndoRecord(self, undo):
+        (baseUndo, self._timeleft,
+                self._redFood, self._blueFood, self._redCapsules, self._blueCapsules) = undo
+
+        super()._restoreUndoRecord(baseUndo)
+
     def _applySuccessorAction(self, agentIndex, action):
         """
         Apply the action to the context state (self).
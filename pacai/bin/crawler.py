@@ -2,22 +2,52 @@
 Binary for the crawler simulation.
 """
 
+import argparse
+import os
+import random
 import sys
+import textwrap
 
-from pacai.ui.crawler.gui import run
+from pacai.core import crawler
 from pacai.util.logs import initLogging
 
+# The number of steps a headless simulation takes when no limit is given.
+DEFAULT_HEADLESS_STEPS = 1000000
+
 def _load_args(args):
     executable = args.pop(0)
-    if (len(args) > 1 or ({'h', 'help'} & {arg.lower().strip().replace('-', '') for arg in args})):
-        print("USAGE: python3 %s [max steps]" % (executable), file = sys.stderr)
-        sys.exit(1)
 
-    max_steps = None
-    if (len(args) > 0):
-        max_steps = int(args.pop(0))
+    description = """
+    DESCRIPTION:
+        This program runs the crawling robot simulation, where a Q-learning agent learns to crawl.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.crawler
+            - Runs the simulation in a window until it is closed.
+        (2) python -m pacai.bin.crawler 5000
+            - Runs the simulation in a window for 5000 steps.
+        (3) python -m pacai.bin.crawler --null-graphics 1000000
+            - Runs a million steps without a window (as fast as possible)
+              and reports the number of steps per second.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(executable), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('max_steps', metavar = 'max steps',
+            action = 'store', type = int, nargs = '?', default = None,
+            help = 'stop after this many steps (default: no limit with graphics, '
+                + '%d without)' % (DEFAULT_HEADLESS_STEPS))
+
+    parser.add_argument('--null-graphics', dest = 'nullGraphics',
+            action = 'store_true', default = False,
+            help = 'run without a window (default: %(default)s)')
+
+    parser.add_argument('-s', '--seed', dest = 'seed',
+            action = 'store', type = int, default = None,
+            help = 'seed for the random number generator (default: %(default)s)')
 
-    return max_steps
+    return parser.parse_args(args)
 
 def main(argv):
     """
@@ -26,8 +56,32 @@ def main(argv):
     """
 
     initLogging()
-    max_steps = _load_args(argv)
-    sys.exit(run(max_steps = max_steps))
+    options = _load_args(argv)
+
+    if (options.seed is not None):
+        random.seed(options.seed)
+
+    if (not options.nullGraphics):
+        # Defer importing the GUI unless we actually need it.
+        # This allows people to not have tkinter installed.
+        from pacai.ui.crawler.gui import run
+
+        sys.exit(run(max_steps = options.max_steps))
+
+    maxSteps = options.max_steps
+    if (maxSteps is None):
+        maxSteps = DEFAULT_HEADLESS_STEPS
+
+    simulation = crawler.CrawlerSimulation()
+    seconds = simulation.run(maxSteps)
+
+    print('Ran %d steps in %.2f seconds (%d steps/second).' %
+            (maxSteps, seconds, maxSteps / max(seconds, 1e-9)))
+    print('Position: %.2f, Velocity (last %d steps): %.2f' %
+            (simulation.robot.getRobotPosition()[0], crawler.NUM_POSITIONS,
+            simulation.robot.getVelocity()))
+
+    return simulation
 
 if __name__ == '__main__':
     main(sys.argv)
@@ -1,6 +1,15 @@
+import argparse
+import logging
+import os
 import random
+import sys
+import textwrap
+import time
 
+from pacai.core.search import patterndb
 from pacai.core.search import search
+from pacai.core.search.puzzle import SlidingPuzzleSearchProblem
+from pacai.core.search.puzzle import SlidingPuzzleState
 from pacai.core.search.problem import SearchProblem
 from pacai.util.logs import initLogging
 
@@ -267,19 +276,134 @@ def createRandomEightPuzzle(moves = 100):
         puzzle = puzzle.result(random.sample(puzzle.legalMoves(), 1)[0])
     return puzzle
 
-def main():
+def readCommand(argv):
+    """
+    Processes the command used to run the eight puzzle from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program will solve random sliding tile puzzles.
+        By default, a single random eight puzzle is solved with BFS and then walked through.
+        With --benchmark, many puzzles are solved with A* and a pattern database heuristic.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.eightpuzzle
+            - Solve and step through a random eight puzzle.
+        (2) python -m pacai.bin.eightpuzzle --benchmark --size 4 --moves 60 --num-puzzles 10
+            - Benchmark A* on ten random fifteen puzzles.
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('--benchmark', dest = 'benchmark',
+            action = 'store_true', default = False,
+            help = 'solve puzzles with A* and report timings instead of stepping through them '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--moves', dest = 'moves',
+            action = 'store', type = int, default = 25,
+            help = 'the number of random moves used to shuffle each puzzle (default: %(default)s)')
+
+    parser.add_argument('--num-puzzles', dest = 'numPuzzles',
+            action = 'store', type = int, default = 10,
+            help = 'the number of puzzles to solve when benchmarking (default: %(default)s)')
+
+    parser.add_argument('--pattern-size', dest = 'patternSize',
+            action = 'store', type = int, default = 4,
+            help = 'the number of tiles in each pattern database (default: %(default)s)')
+
+    parser.add_argument('--pdb-dir', dest = 'pdbDir',
+            action = 'store', type = str, default = None,
+            help = 'load/save pattern databases from/to this directory (default: %(default)s)')
+
+    parser.add_argument('-s', '--seed', dest = 'seed',
+            action = 'store', type = int, default = None,
+            help = 'Enter seed value to randomize the puzzles')
+
+    parser.add_argument('--size', dest = 'size',
+            action = 'store', type = int, default = 3,
+            help = 'the width of the puzzle, 3 is the eight puzzle and 4 is the fifteen puzzle '
+                + '(default: %(default)s)')
+
+    options = parser.parse_args(argv)
+
+    if (options.seed is not None):
+        random.seed(options.seed)
+
+    return options
+
+def createRandomSlidingPuzzle(size, moves = 100):
+    """
+    Like createRandomEightPuzzle, but for a `pacai.core.search.puzzle.SlidingPuzzleState`
+    of any size.
+    """
+
+    puzzle = SlidingPuzzleState.goal(size)
+    for i in range(moves):
+        puzzle = puzzle.result(random.choice(puzzle.legalMoves()))
+
+    return puzzle
+
+def runBenchmark(size, moves, numPuzzles, patternSize, pdbDir = None):
+    """
+    Solve random puzzles using A* with an additive pattern database heuristic.
+    Returns a list of (path length, nodes expanded, seconds) for each puzzle.
+    """
+
+    starttime = time.time()
+    heuristic = patterndb.loadHeuristic(size, patterndb.defaultPartition(size, patternSize),
+            pdbDir)
+    logging.info('Pattern databases ready in %.1f seconds.' % (time.time() - starttime))
+
+    results = []
+    for i in range(numPuzzles):
+        problem = SlidingPuzzleSearchProblem(createRandomSlidingPuzzle(size, moves))
+
+        starttime = time.time()
+        path = search.astar(problem, heuristic)
+        elapsed = time.time() - starttime
+
+        results.append((len(path), problem.getExpandedCount(), elapsed))
+        logging.info('Puzzle %d: %d moves, %d nodes expanded, %.3f seconds.' %
+                (i, len(path), problem.getExpandedCount(), elapsed))
+
+    if (len(results) > 0):
+        logging.info('Total: %d nodes expanded in %.3f seconds.' %
+                (sum([result[1] for result in results]), sum([result[2] for result in results])))
+
+    return results
+
+def main(argv):
     """
     Entry point for the eightpuzzle simulation.
+    The args are a blind pass of `sys.argv` with the executable stripped.
     """
 
     initLogging()
 
-    puzzle = createRandomEightPuzzle(25)
-    print('A random puzzle:\n' + str(puzzle))
+    options = readCommand(argv)
+
+    if (options.benchmark):
+        return runBenchmark(options.size, options.moves, options.numPuzzles,
+                options.patternSize, options.pdbDir)
+
+    if (options.size == 3):
+        puzzle = createRandomEightPuzzle(options.moves)
+        problem = EightPuzzleSearchProblem(puzzle)
+        path = search.bfs(problem)
+        print('A random puzzle:\n' + str(puzzle))
+        print('BFS found a path of %d moves: %s' % (len(path), str(path)))
+    else:
+        # BFS is hopeless on larger puzzles.
+        puzzle = createRandomSlidingPuzzle(options.size, options.moves)
+        heuristic = patterndb.loadHeuristic(options.size,
+                patterndb.defaultPartition(options.size, options.patternSize), options.pdbDir)
+        path = search.astar(SlidingPuzzleSearchProblem(puzzle), heuristic)
+        print('A random puzzle:\n' + str(puzzle))
+        print('A* found a path of %d moves: %s' % (len(path), str(path)))
 
-    problem = EightPuzzleSearchProblem(puzzle)
-    path = search.bfs(problem)
-    print('BFS found a path of %d moves: %s' % (len(path), str(path)))
     curr = puzzle
     i = 1
     for a in path:
@@ -290,4 +414,4 @@ def main():
         i += 1
 
 if __name__ == '__main__':
-    main()
+    main(sys.argv[1:])
@@ -0,0 +1,91 @@
+"""
+Build endgame tables (exact solutions) for small Pacman layouts.
+See `pacai.core.endgame`.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import textwrap
+import time
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import endgame
+from pacai.core.layout import getLayout
+from pacai.util.logs import initLogging
+
+def readCommand(argv):
+    """
+    Processes the command used to build endgame tables from the command line.
+    """
+
+    description = """
+    DESCRIPTION:
+        This program solves small Pacman layouts exactly (Pacman against ghosts that play
+        perfectly) and optionally saves the solutions for use by
+        `pacai.agents.endgame.EndgameAgent` or `pacai.core.endgame.score`.
+
+    EXAMPLES:
+        (1) python -m pacai.bin.endgame --layout trappedClassic
+            - Solve trappedClassic and report the optimal score.
+        (2) python -m pacai.bin.endgame --layout testClassic --table-dir tables
+            - Solve testClassic and save the table in the tables directory.
+              Then play it with:
+              python -m pacai.bin.pacman --layout testClassic --pacman EndgameAgent
+                  --agent-args tableDir=tables
+    """
+
+    parser = argparse.ArgumentParser(description = textwrap.dedent(description),
+            prog = os.path.basename(__file__), formatter_class = argparse.RawTextHelpFormatter)
+
+    parser.add_argument('-l', '--layout', dest = 'layout',
+            action = 'store', type = str, default = 'trappedClassic',
+            help = 'the layout to solve (default: %(default)s)')
+
+    parser.add_argument('--max-states', dest = 'maxStates',
+            action = 'store', type = int, default = endgame.DEFAULT_MAX_STATES,
+            help = 'give up on layouts with more reachable states than this '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--max-sweeps', dest = 'maxSweeps',
+            action = 'store', type = int, default = endgame.DEFAULT_MAX_SWEEPS,
+            help = 'the most value iteration sweeps to run (default: %(default)s)')
+
+    parser.add_argument('--table-dir', dest = 'tableDir',
+            action = 'store', type = str, default = None,
+            help = 'load/save tables from/to this directory (default: %(default)s)')
+
+    options = parser.parse_args(argv)
+
+    return options
+
+def main(argv):
+    """
+    Entry point for building endgame tables.
+    The args are a blind pass of `sys.argv` with the executable stripped.
+    """
+
+    initLogging()
+
+    options = readCommand(argv)
+
+    layout = getLayout(options.layout)
+    if (layout is None):
+        raise ValueError('The layout ' + options.layout + ' cannot be found.')
+
+    starttime = time.time()
+    start = PacmanGameState(layout)
+    table = endgame.loadTable(start, options.tableDir,
+            maxStates = options.maxStates, maxSweeps = options.maxSweeps)
+
+    if (not table.isConverged()):
+        logging.warning('Values did not converge in %d sweeps.' % (options.maxSweeps))
+
+    print('%s: %d states, optimal score %d (%.1f seconds).' %
+            (options.layout, len(table), table.getValue(start), time.time() - starttime))
+
+    return table
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -1,4 +1,6 @@
 import argparse
+import array
+import bisect
 import logging
 import os
 import random
@@ -6,6 +8,8 @@ import sys
 import textwrap
 
 from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.core import mdpsolver
+from pacai.core import qtable
 from pacai.core.environment import Environment
 from pacai.core.mdp import MarkovDecisionProcess
 from pacai.student.qlearningAgents import QLearningAgent
@@ -219,6 +223,130 @@ class GridworldEnvironment(Environment):
     def reset(self):
         self.state = self.gridWorld.getStartState()
 
+class BatchGridworldEnvironment(object):
+    """
+    Many copies of a gridworld environment that are stepped together.
+
+    The gridworld is compiled once (`pacai.core.mdpsolver.CompiledMDP`),
+    and the current state of each environment is kept as a state id in a flat array.
+    Each transition's cumulative probability and reward is precomputed,
+    so sampling the next state of an environment is a binary search
+    instead of asking the gridworld for its transitions.
+    """
+
+    def __init__(self, gridWorld, numEnvironments):
+        numEnvironments = int(numEnvironments)
+        if (numEnvironments <= 0):
+            raise ValueError('The number of environments must be positive, got %d.' %
+                    (numEnvironments))
+
+        self.gridWorld = gridWorld
+        self.compiled = mdpsolver.CompiledMDP(gridWorld)
+
+        # {(state id, action): pair}
+        self._pairs = {}
+        # {state: (action, ...)}
+        self._actions = {}
+
+        # The cumulative probability and reward of each transition (in the compiled order).
+        self._cumulative = array.array('d')
+        self._rewards = array.array('d')
+
+        for index in range(len(self.compiled)):
+            state = self.compiled.getState(index)
+
+            actions = []
+            for pair in self.compiled.getPairs(index):
+                action = self.compiled.getAction(pair)
+                self._pairs[(index, action)] = pair
+                actions.append(action)
+
+                total = 0.0
+                start = self.compiled.transitionOffsets[pair]
+                end = self.compiled.transitionOffsets[pair + 1]
+                for transition in range(start, end):
+                    nextState = self.compiled.getState(self.compiled.targets[transition])
+                    total += self.compiled.probabilities[transition]
+                    self._cumulative.append(total)
+                    self._rewards.append(gridWorld.getReward(state, action, nextState))
+
+            self._actions[state] = tuple(actions)
+
+        self._startIndex = self.compiled.getIndex(gridWorld.getStartState())
+        self._states = array.array('q', [self._startIndex] * numEnvironments)
+
+    def getCurrentState(self, environment):
+        return self.compiled.getState(self._states[environment])
+
+    def getCurrentStates(self):
+        """
+        Get the current state of every environment.
+        """
+
+        return [self.compiled.getState(index) for index in self._states]
+
+    def getPossibleActions(self, state):
+        """
+        The same as `Gridworld.getPossibleActions`,
+        but looked up instead of computed for the states an episode can reach.
+        """
+
+        actions = self._actions.get(state)
+        if (actions is None):
+            actions = self.gridWorld.getPossibleActions(state)
+
+        return actions
+
+    def isTerminal(self, environment):
+        index = self._states[environment]
+        return self.compiled.pairOffsets[index] == self.compiled.pairOffsets[index + 1]
+
+    def reset(self, environment = None):
+        """
+        Put an environment (or every environment if none is given) back in the start state.
+        """
+
+        if (environment is None):
+            for environment in range(len(self._states)):
+                self._states[environment] = self._startIndex
+        else:
+            self._states[environment] = self._startIndex
+
+    def step(self, actions):
+        """
+        Take one action in every environment (None to leave an environment as it is).
+        Returns the next state and reward of every environment
+        (None for the environments that did not act).
+        """
+
+        nextStates = [None] * len(self._states)
+        rewards = [None] * len(self._states)
+
+        for (environment, action) in enumerate(actions):
+            if (action is None):
+                continue
+
+            pair = self._pairs.get((self._states[environment], action))
+            if (pair is None):
+                raise Exception('Illegal action!')
+
+            start = self.compiled.transitionOffsets[pair]
+            end = self.compiled.transitionOffsets[pair + 1]
+
+            # Rounding can leave the last cumulative probability just under one.
+            transition = min(bisect.bisect_right(self._cumulative, random.random(), start, end),
+                    end - 1)
+
+            index = self.compiled.targets[transition]
+            self._states[environment] = index
+            nextStates[environment] = self.compiled.getState(index)
+            rewards[environment] = self._rewards[transition]
+
+        return nextStates, rewards
+
+    def __len__(self):
+        return len(self._states)
+
 class Grid(object):
     """
     A 2-dimensional array of immutables backed by a list of lists.
@@ -349,12 +477,9 @@ def runEpisode(agent, environment, discount, decision, display, message, pause,
 
         # EXECUTE ACTION
         nextState, reward = environment.doAction(action)
-        logString = ''
-        logString += '\nStarted in state: ' + str(state)
-        logString += '\nTook action: ' + str(action)
-        logString += '\nEnded in state: ' + str(nextState)
-        logString += '\nGot reward: ' + str(reward) + '\n'
-        logging.debug(logString)
+        if (logging.getLogger().isEnabledFor(logging.DEBUG)):
+            logging.debug('\nStarted in state: %s\nTook action: %s\nEnded in state: %s'
+                    '\nGot reward: %s\n' % (state, action, nextState, reward))
 
         # Update learner.
         if (isinstance(agent, ReinforcementAgent)):
@@ -366,6 +491,73 @@ def runEpisode(agent, environment, discount, decision, display, message, pause,
     if (isinstance(agent, ReinforcementAgent)):
         agent.stopEpisode()
 
+def runEpisodes(agent, environment, discount, decision, numEpisodes):
+    """
+    Run numEpisodes episodes on a `BatchGridworldEnvironment`,
+    with every environment in the batch playing its own episode at the same time.
+    Whenever an episode ends, its environment starts the next episode that has not been started.
+    Nothing is displayed and nothing is logged per step.
+    Returns the (discounted) return of each episode.
+
+    A learning agent learns from the transitions of every environment as they happen,
+    so it sees the episodes interleaved (not one after another as with `runEpisode`).
+    """
+
+    isLearning = isinstance(agent, ReinforcementAgent)
+    if (isLearning):
+        agent.startEpisode()
+
+    returns = [0.0] * numEpisodes
+    environment.reset()
+
+    # The episode each environment is playing (None when there are none left to play).
+    episodes = [None] * len(environment)
+    discounts = [1.0] * len(environment)
+    for i in range(min(numEpisodes, len(environment))):
+        episodes[i] = i
+
+    nextEpisode = min(numEpisodes, len(environment))
+    numRunning = nextEpisode
+
+    while (numRunning > 0):
+        states = environment.getCurrentStates()
+        actions = [None] * len(environment)
+
+        for i in range(len(environment)):
+            if (episodes[i] is None):
+                continue
+
+            if (environment.isTerminal(i)):
+                if (nextEpisode == numEpisodes):
+                    episodes[i] = None
+                    numRunning -= 1
+                    continue
+
+                episodes[i] = nextEpisode
+                nextEpisode += 1
+                discounts[i] = 1.0
+
+                environment.reset(i)
+                states[i] = environment.getCurrentState(i)
+
+            actions[i] = decision(states[i])
+            if (actions[i] is None):
+                raise Exception('Error: Agent returned None action')
+
+        nextStates, rewards = environment.step(actions)
+
+        for i in range(len(environment)):
+            if (actions[i] is None):
+                continue
+
+            if (isLearning):
+                agent.observeTransition(states[i], actions[i], nextStates[i], rewards[i])
+
+            returns[episodes[i]] += rewards[i] * discounts[i]
+            discounts[i] *= discount
+
+    return returns
+
 def parseOptions(argv):
     """
     Processes the command used to run gridworld from the command line.
@@ -380,6 +572,8 @@ def parseOptions(argv):
             - Creats a gridworld with default settings.
         (2) python -m pacai.bin.gridworld --discount 0.7
             - Creats a gridworld with a 0.7 discount factor.
+        (3) python -m pacai.bin.gridworld -a q -k 10000 --null-graphics --batch 64
+            - Trains a Q-learning agent for 10000 episodes, 64 at a time.
     """
 
     parser = argparse.ArgumentParser(description = textwrap.dedent(description),
@@ -387,7 +581,9 @@ def parseOptions(argv):
 
     parser.add_argument('-a', '--agent', dest = 'agent',
             action = 'store', type = str, default = 'random',
-            help = 'agent type (options are \'random\', \'value\' and \'q\', default %(default)s)')
+            help = 'agent type (options are \'random\', \'q\', \'value\' (value iteration),\n'
+                + '\'gauss-seidel\' (in place value iteration), \'prioritized\' (prioritized\n'
+                + 'sweeping) and \'policy\' (policy iteration), default %(default)s)')
 
     parser.add_argument('-d', '--debug', dest = 'debug',
             action = 'store_true', default = False,
@@ -433,6 +629,11 @@ def parseOptions(argv):
             action = 'store', type = float, default = 1.0,
             help = 'speed of animation, S>1.0 is faster, 0<S<1 is slower (default %(default)s)')
 
+    parser.add_argument('-t', '--tolerance', dest = 'tolerance',
+            action = 'store', type = float, default = 0.0,
+            help = 'stop value iteration early once no value changes by more than this '
+                + '(default %(default)s)')
+
     parser.add_argument('-v', '--value-steps', dest = 'valueSteps',
             action = 'store_true', default = False,
             help = 'display each step of value iteration (default %(default)s)')
@@ -441,6 +642,11 @@ def parseOptions(argv):
             action = 'store', type = float, default = 0.9,
             help = 'discount on future (default %(default)s)')
 
+    parser.add_argument('--batch', dest = 'batchSize',
+            action = 'store', type = int, default = 1,
+            help = 'play this many episodes at the same time (requires --null-graphics),\n'
+                + 'which is much faster for running many episodes (default %(default)s)')
+
     parser.add_argument('--manual', dest = 'manual',
             action = 'store_true', default = False,
             help = 'manually control agent (default %(default)s)')
@@ -482,6 +688,12 @@ def parseOptions(argv):
     if options.manual:
         options.pause = True
 
+    if (options.batchSize <= 0):
+        raise ValueError('The batch size must be positive, got %d.' % (options.batchSize))
+
+    if (options.batchSize > 1 and (not options.nullGraphics or options.manual)):
+        raise ValueError('Batched episodes (--batch) can only be played with --null-graphics.')
+
     return options
 
 def main(argv):
@@ -501,7 +713,11 @@ def main(argv):
     mdp = _getGridWorld(opts.grid)
     mdp.setLivingReward(opts.livingReward)
     mdp.setNoise(opts.noise)
-    env = GridworldEnvironment(mdp)
+
+    if (opts.batchSize > 1):
+        env = BatchGridworldEnvironment(mdp, opts.batchSize)
+    else:
+        env = GridworldEnvironment(mdp)
 
     ###########################
     # GET THE DISPLAY ADAPTER
@@ -519,14 +735,15 @@ def main(argv):
     ###########################
 
     a = None
-    if (opts.agent == 'value'):
-        a = ValueIterationAgent(0, mdp, opts.discount, opts.iters)
+    if (opts.agent in mdpsolver.SOLVERS):
+        a = ValueIterationAgent(0, mdp, opts.discount, opts.iters, opts.tolerance, opts.agent)
     elif (opts.agent == 'q'):
         qLearnOpts = {
             'gamma': opts.discount,
             'alpha': opts.learningRate,
             'epsilon': opts.epsilon,
-            'actionFn': lambda state: mdp.getPossibleActions(state),
+            'actionFn': env.getPossibleActions,
+            'qTable': _getQTable(mdp),
         }
         a = QLearningAgent(0, **qLearnOpts)
     elif (opts.agent == 'random'):
@@ -536,7 +753,7 @@ def main(argv):
 
         class RandomMDPAgent:
             def getAction(self, state):
-                return random.choice(mdp.getPossibleActions(state))
+                return random.choice(env.getPossibleActions(state))
 
             def getValue(self, state):
                 return 0.0
@@ -561,16 +778,18 @@ def main(argv):
     ###########################
 
     # Display q/v values before simulation of episodes.
-    if (not opts.manual and opts.agent == 'value'):
+    if (not opts.manual and opts.agent in mdpsolver.SOLVERS):
         if (opts.valueSteps):
             for i in range(opts.iters):
-                tempAgent = ValueIterationAgent(0, mdp, opts.discount, i)
+                tempAgent = ValueIterationAgent(0, mdp, opts.discount, i, opts.tolerance,
+                        opts.agent)
                 display.displayValues(tempAgent, message = 'VALUES AFTER ' + str(i) + ' ITERATIONS')
                 display.pause()
 
-        display.displayValues(a, message = 'VALUES AFTER ' + str(opts.iters) + ' ITERATIONS')
+        # Value iteration may have stopped early.
+        display.displayValues(a, message = 'VALUES AFTER ' + str(a.sweeps) + ' ITERATIONS')
         display.pause()
-        display.displayQValues(a, message = 'Q-VALUES AFTER ' + str(opts.iters) + ' ITERATIONS')
+        display.displayQValues(a, message = 'Q-VALUES AFTER ' + str(a.sweeps) + ' ITERATIONS')
         display.pause()
 
     # Figure out what to display each time step (if anything).
@@ -581,7 +800,7 @@ def main(argv):
         else:
             if (opts.agent == 'random'):
                 displayCallback = lambda state: display.displayValues(a, state, 'CURRENT VALUES')
-            elif (opts.agent == 'value'):
+            elif (opts.agent in mdpsolver.SOLVERS):
                 displayCallback = lambda state: display.displayValues(a, state, 'CURRENT VALUES')
             elif (opts.agent == 'q'):
                 displayCallback = lambda state: display.displayQValues(a, state, 'CURRENT Q-VALUES')
@@ -606,9 +825,12 @@ def main(argv):
         logging.debug('RUNNING ' + str(opts.episodes) + ' EPISODES')
 
     returns = 0
-    for episode in range(1, opts.episodes + 1):
-        returns += runEpisode(a, env, opts.discount, decisionCallback, displayCallback,
-                messageCallback, pauseCallback, episode)
+    if (opts.batchSize > 1):
+        returns = sum(runEpisodes(a, env, opts.discount, decisionCallback, opts.episodes))
+    else:
+        for episode in range(1, opts.episodes + 1):
+            returns += runEpisode(a, env, opts.discount, decisionCallback, displayCallback,
+                    messageCallback, pauseCallback, episode)
 
     if (opts.episodes > 0):
         logging.debug('AVERAGE RETURNS FROM START STATE:' + str((returns + 0.0) / opts.episodes))
@@ -620,6 +842,21 @@ def main(argv):
         display.displayValues(a, message = 'VALUES AFTER ' + str(opts.episodes) + ' EPISODES')
         display.pause()
 
+def _getQTable(mdp):
+    """
+    Every state of a gridworld is known, so Q-values can be stored densely.
+    """
+
+    states = mdp.getStates()
+
+    actions = []
+    for state in states:
+        for action in mdp.getPossibleActions(state):
+            if (action not in actions):
+                actions.append(action)
+
+    return qtable.DenseQTable(states, actions)
+
 def _getGridWorld(name):
     name = name.lower()
 
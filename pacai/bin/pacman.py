@@ -16,6 +16,9 @@ import sys
 from pacai.agents.base import BaseAgent
 from pacai.agents.ghost.random import RandomGhost
 from pacai.agents.greedy import GreedyAgent
+from pacai.agents.learning import checkpoint
+from pacai.agents.learning import parallel
+from pacai.agents.learning.reinforcement import ReinforcementAgent
 from pacai.bin.arguments import getParser
 from pacai.core.actions import Actions
 from pacai.core.directions import Directions
@@ -385,6 +388,17 @@ def readCommand(argv):
             - Starts an interactive game.
         (2) python -m pacai.bin.pacman --layout smallClassic
             - Starts an interactive game on a smaller board.
+        (3) python -m pacai.bin.pacman --pacman ApproximateQAgent
+                --agent-args extractor=pacai.core.featureExtractors.SimpleExtractor
+                --num-training 1000 --num-games 1010 --num-actors 4 --null-graphics
+            - Trains an approximate Q-learning agent with 4 processes, then plays 10 games.
+        (4) python -m pacai.bin.pacman --pacman PacmanQAgent --layout smallGrid
+                --num-training 2000 --num-games 2010 --checkpoint-dir ckpt --resume
+                --null-graphics
+            - Trains a Q-learning agent, saving checkpoints in ckpt.
+              Running the same command again continues from the last checkpoint.
+              Running with just --num-games 10 --checkpoint-dir ckpt --resume
+              plays 10 games with the trained agent.
     """
 
     parser = getParser(description, os.path.basename(__file__))
@@ -410,6 +424,30 @@ def readCommand(argv):
             help = 'comma separated arguments to be passed to agents (e.g. \'opt1=val1,opt2\')'
                 + '(default: %(default)s)')
 
+    parser.add_argument('--num-actors', dest = 'numActors',
+            action = 'store', type = int, default = 0,
+            help = 'play the training games of an approximate Q-learning agent '
+                + 'with this many actor processes (default: %(default)s)')
+
+    parser.add_argument('--actor-sync', dest = 'actorSync',
+            action = 'store', type = int, default = parallel.DEFAULT_SYNC_INTERVAL,
+            help = 'send new weights to the actors after this many training games '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--checkpoint-dir', dest = 'checkpointDir',
+            action = 'store', type = str, default = None,
+            help = 'save checkpoints of a learning agent in this directory '
+                + '(default: %(default)s)')
+
+    parser.add_argument('--checkpoint-interval', dest = 'checkpointInterval',
+            action = 'store', type = int, default = 100,
+            help = 'save a checkpoint after this many training games (default: %(default)s)')
+
+    parser.add_argument('--resume', dest = 'resume',
+            action = 'store_true', default = False,
+            help = 'start a learning agent from the checkpoint in the checkpoint directory '
+                + '(if there is one), skipping the training games it already played')
+
     parser.add_argument('--timeout', dest = 'timeout',
             action = 'store', type = int, default = 30,
             help = 'maximum time limit (seconds) an agent can spend computing per game '
@@ -453,6 +491,12 @@ def readCommand(argv):
         if 'numTraining' not in agentOpts:
             agentOpts['numTraining'] = options.numTraining
 
+    if (options.checkpointDir is not None):
+        agentOpts['checkpointDir'] = options.checkpointDir
+        agentOpts['checkpointInterval'] = options.checkpointInterval
+    elif (options.resume):
+        raise ValueError('Resuming requires a checkpoint directory (--checkpoint-dir).')
+
     # Don't display training games.
     if 'numTrain' in agentOpts:
         options.numQuiet = int(agentOpts['numTrain'])
@@ -481,8 +525,26 @@ def readCommand(argv):
     args['catchExceptions'] = options.catchExceptions
     args['gameToReplay'] = options.replay
     args['ghosts'] = [BaseAgent.loadAgent(options.ghost, i + 1) for i in range(options.numGhosts)]
+    args['numActors'] = options.numActors
+    args['actorSync'] = options.actorSync
     args['numGames'] = options.numGames
     args['pacman'] = BaseAgent.loadAgent(options.pacman, PACMAN_AGENT_INDEX, agentOpts)
+
+    if (options.checkpointDir is not None
+            and not isinstance(args['pacman'], ReinforcementAgent)):
+        raise ValueError('Only learning agents can use checkpoints.')
+
+    if (options.resume and checkpoint.exists(options.checkpointDir)):
+        # The command line decides how much (if any) training is left.
+        checkpoint.load(args['pacman'], options.checkpointDir, numTraining = options.numTraining)
+
+        # Skip the training games that were already played.
+        skipped = min(args['pacman'].episodesSoFar, options.numTraining)
+        args['numTraining'] = options.numTraining - skipped
+        args['numGames'] = options.numGames - skipped
+
+        logging.info('Resumed from a checkpoint after %d episodes.' %
+                (args['pacman'].episodesSoFar))
     args['record'] = options.record
     args['timeout'] = options.timeout
 
@@ -512,16 +574,26 @@ def replayGame(layout, actions, display):
     display.finish()
 
 def runGames(layout, pacman, ghosts, display, numGames, record = None, numTraining = 0,
-        catchExceptions = False, timeout = 30, **kwargs):
+        catchExceptions = False, timeout = 30, numActors = 0,
+        actorSync = parallel.DEFAULT_SYNC_INTERVAL, **kwargs):
     rules = ClassicGameRules(timeout)
     games = []
 
+    firstGame = 0
+    if (numActors > 0 and numTraining > 0):
+        if (not hasattr(pacman, 'updateFeatures')):
+            raise ValueError('Only approximate Q-learning agents can train with actors.')
+
+        # The training games are played by the actors.
+        parallel.train(pacman, layout, ghosts, rules, numTraining, numActors, actorSync)
+        firstGame = numTraining
+
     nullView = None
-    if (numTraining > 0):
+    if (numTraining > firstGame):
         logging.info('Playing %d training games.' % numTraining)
         nullView = PacmanNullView()
 
-    for i in range(numGames):
+    for i in range(firstGame, numGames):
         isTraining = (i < numTraining)
 
         if (isTraining):
@@ -48,6 +48,14 @@ class AgentState:
     def getScaredTimer(self):
         return self._scaredTimer
 
+    def getSnapshot(self):
+        """
+        Get the parts of this agent's state that can change during a game
+        (see `AgentState.restoreSnapshot`).
+        """
+
+        return (self._position, self._direction, self._isPacman, self._scaredTimer)
+
     def isBraveGhost(self):
         """
         A ghost that is not scared.
@@ -80,6 +88,9 @@ class AgentState:
 
         self._position = util.nearestPoint(self._position)
 
+    def restoreSnapshot(self, snapshot):
+        self._position, self._direction, self._isPacman, self._scaredTimer = snapshot
+
     def respawn(self):
         """
         This agent was killed, respawn it at the start as a pacman.
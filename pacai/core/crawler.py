@@ -0,0 +1,397 @@
+"""
+The crawler simulation without any graphics.
+
+A crawling robot is a body on the ground with a two jointed arm (an arm and a hand).
+Moving the arm or hand while the hand touches the ground drags the body along.
+A Q-learning agent learns to crawl forward (see `CrawlerSimulation`).
+The GUI (`pacai.ui.crawler.gui`) draws the same simulation.
+"""
+
+import collections
+import math
+import time
+
+from pacai.core.environment import Environment
+from pacai.core.qtable import DenseQTable
+from pacai.student.qlearningAgents import QLearningAgent
+
+ACTIONS = ['arm-up', 'arm-down', 'hand-up', 'hand-down']
+
+# The height of the ground (the robot's y position) when no display decides it.
+DEFAULT_GROUND_Y = 160
+
+# The number of recent positions kept to measure the robot's velocity.
+NUM_POSITIONS = 100
+
+class CrawlingRobotEnvironment(Environment):
+    """
+    The environment of a crawling robot.
+    """
+
+    def __init__(self, crawlingRobot):
+        self.crawlingRobot = crawlingRobot
+
+        # The state is of the form (armAngle, handAngle)
+        # where the angles are bucket numbers, not actual
+        # degree measurements
+        self.state = None
+
+        self.nArmStates = 9
+        self.nHandStates = 13
+
+        # create a list of arm buckets and hand buckets to
+        # discretize the state space
+        minArmAngle, maxArmAngle = self.crawlingRobot.getMinAndMaxArmAngles()
+        minHandAngle, maxHandAngle = self.crawlingRobot.getMinAndMaxHandAngles()
+        armIncrement = (maxArmAngle - minArmAngle) / (self.nArmStates - 1)
+        handIncrement = (maxHandAngle - minHandAngle) / (self.nHandStates - 1)
+        self.armBuckets = [minArmAngle + (armIncrement * i) for i in range(self.nArmStates)]
+        self.handBuckets = [minHandAngle + (handIncrement * i) for i in range(self.nHandStates)]
+
+        # The legal actions of each state, {state: [action, ...]}.
+        self._actions = {state: self._computePossibleActions(state) for state in self.getStates()}
+
+        # Reset
+        self.reset()
+
+    def getCurrentState(self):
+        """
+        Return the current state of the crawling robot.
+        """
+
+        return self.state
+
+    def getPossibleActions(self, state):
+        """
+        Returns possible actions for the states in the current state.
+        The list is shared, so it should not be modified.
+        """
+
+        return self._actions[state]
+
+    def getStates(self):
+        """
+        Return every state the crawling robot can be in.
+        """
+
+        return [(arm, hand) for arm in range(self.nArmStates) for hand in range(self.nHandStates)]
+
+    def doAction(self, action):
+        """
+        Perform the action and update
+        the current state of the Environment
+        and return the reward for the
+        current state, the next state
+        and the taken action.
+
+        Returns:
+            nextState, reward
+        """
+
+        nextState, reward = None, None
+
+        oldX, oldY = self.crawlingRobot.getRobotPosition()
+
+        armBucket, handBucket = self.state
+
+        if action == 'arm-up':
+            newArmAngle = self.armBuckets[armBucket + 1]
+            self.crawlingRobot.moveArm(newArmAngle)
+
+            nextState = (armBucket + 1, handBucket)
+        if action == 'arm-down':
+            newArmAngle = self.armBuckets[armBucket - 1]
+            self.crawlingRobot.moveArm(newArmAngle)
+            nextState = (armBucket - 1, handBucket)
+
+        if action == 'hand-up':
+            newHandAngle = self.handBuckets[handBucket + 1]
+            self.crawlingRobot.moveHand(newHandAngle)
+            nextState = (armBucket, handBucket + 1)
+
+        if action == 'hand-down':
+            newHandAngle = self.handBuckets[handBucket - 1]
+            self.crawlingRobot.moveHand(newHandAngle)
+            nextState = (armBucket, handBucket - 1)
+
+        newX, newY = self.crawlingRobot.getRobotPosition()
+
+        # a simple reward function
+        reward = newX - oldX
+
+        self.state = nextState
+        return nextState, reward
+
+    def reset(self):
+        """
+        Resets the Environment to the initial state
+        """
+
+        # Initialize the state to be the middle
+        # value for each parameter e.g. if there are 13 and 19
+        # buckets for the arm and hand parameters, then the intial
+        # state should be (6, 9)
+
+        # Also call self.crawlingRobot.setAngles()
+        # to the initial arm and hand angle
+
+        armState = int(self.nArmStates / 2)
+        handState = int(self.nHandStates / 2)
+
+        self.state = armState, handState
+        self.crawlingRobot.setAngles(self.armBuckets[armState], self.handBuckets[handState])
+        self.crawlingRobot.positions = collections.deque([20,
+                self.crawlingRobot.getRobotPosition()[0]], NUM_POSITIONS)
+
+    def _computePossibleActions(self, state):
+        actions = list()
+        currArmBucket, currHandBucket = state
+
+        if currArmBucket > 0:
+            actions.append('arm-down')
+
+        if currArmBucket < self.nArmStates - 1:
+            actions.append('arm-up')
+
+        if currHandBucket > 0:
+            actions.append('hand-down')
+
+        if currHandBucket < self.nHandStates - 1:
+            actions.append('hand-up')
+
+        return actions
+
+class CrawlingRobot(object):
+    """
+    The body, arm, and hand of a crawling robot, and how they move it along the ground.
+    """
+
+    def __init__(self, groundY = DEFAULT_GROUND_Y):
+        # Arm and Hand Degrees
+        self.armAngle = self.oldArmDegree = 0.0
+        self.handAngle = self.oldHandDegree = -math.pi / 6
+
+        self.maxArmAngle = math.pi / 6
+        self.minArmAngle = -math.pi / 6
+
+        self.maxHandAngle = 0
+        self.minHandAngle = -(5.0 / 6.0) * math.pi
+
+        self.groundY = groundY
+
+        # Robot Body
+        self.robotWidth = 80
+        self.robotHeight = 40
+        self.robotPos = (20, self.groundY)
+
+        # Robot Arm
+        self.armLength = 60
+
+        # Robot Hand
+        self.handLength = 40
+
+        # The most recent x positions.
+        self.positions = collections.deque([0, 0], NUM_POSITIONS)
+
+        # {(old arm, old hand, arm, hand): displacement}
+        self._displacements = {}
+
+    def setAngles(self, armAngle, handAngle):
+        """
+        set the robot's arm and hand angles
+        to the passed in values
+        """
+
+        self.armAngle = armAngle
+        self.handAngle = handAngle
+
+    def getAngles(self):
+        """
+        returns the pair of (armAngle, handAngle)
+        """
+
+        return self.armAngle, self.handAngle
+
+    def getRobotPosition(self):
+        """
+        returns the (x, y) coordinates
+        of the lower-left point of the robot
+        """
+
+        return self.robotPos
+
+    def getVelocity(self):
+        """
+        The average distance moved per step over the most recent steps.
+        """
+
+        return (self.positions[-1] - self.positions[0]) / len(self.positions)
+
+    def moveArm(self, newArmAngle):
+        """
+        move the robot arm to 'newArmAngle'
+        """
+
+        if newArmAngle > self.maxArmAngle:
+            raise Exception('Crawling Robot: Arm Raised too high. Careful!')
+
+        if newArmAngle < self.minArmAngle:
+            raise Exception('Crawling Robot: Arm Raised too low. Careful!')
+
+        disp = self.displacement(self.armAngle, self.handAngle, newArmAngle, self.handAngle)
+        curXPos = self.robotPos[0]
+        self.robotPos = (curXPos + disp, self.robotPos[1])
+        self.armAngle = newArmAngle
+
+        # Position and Velocity Sign Post
+        self.positions.append(self.robotPos[0])
+
+    def moveHand(self, newHandAngle):
+        """
+        move the robot hand to 'newArmAngle'
+        """
+
+        if newHandAngle > self.maxHandAngle:
+            raise Exception('Crawling Robot: Hand Raised too high. Careful!')
+
+        if newHandAngle < self.minHandAngle:
+            raise Exception('Crawling Robot: Hand Raised too low. Careful!')
+
+        disp = self.displacement(self.armAngle, self.handAngle, self.armAngle, newHandAngle)
+        curXPos = self.robotPos[0]
+        self.robotPos = (curXPos + disp, self.robotPos[1])
+        self.handAngle = newHandAngle
+
+        # Position and Velocity Sign Post
+        self.positions.append(self.robotPos[0])
+
+    def getMinAndMaxArmAngles(self):
+        """
+        get the lower- and upper- bound
+        for the arm angles returns (min, max) pair
+        """
+
+        return self.minArmAngle, self.maxArmAngle
+
+    def getMinAndMaxHandAngles(self):
+        """
+        get the lower- and upper- bound
+        for the hand angles returns (min, max) pair
+        """
+
+        return self.minHandAngle, self.maxHandAngle
+
+    def getRotationAngle(self):
+        """
+        get the current angle the
+        robot body is rotated off the ground
+        """
+
+        armCos, armSin = self._getCosAndSin(self.armAngle)
+        handCos, handSin = self._getCosAndSin(self.handAngle)
+
+        x = self.armLength * armCos + self.handLength * handCos + self.robotWidth
+        y = self.armLength * armSin + self.handLength * handSin + self.robotHeight
+
+        if y < 0:
+            return math.atan(-y / x)
+        return 0.0
+
+    # You shouldn't need methods below here
+
+    def _getCosAndSin(self, angle):
+        return math.cos(angle), math.sin(angle)
+
+    def displacement(self, oldArmDegree, oldHandDegree, armDegree, handDegree):
+        """
+        How far the body moves when the arm and hand move between two sets of angles.
+        The robot only ever moves between a few angles (the environment's buckets),
+        so each result is remembered.
+        """
+
+        key = (oldArmDegree, oldHandDegree, armDegree, handDegree)
+        disp = self._displacements.get(key)
+        if (disp is None):
+            disp = self._computeDisplacement(*key)
+            self._displacements[key] = disp
+
+        return disp
+
+    def _computeDisplacement(self, oldArmDegree, oldHandDegree, armDegree, handDegree):
+        oldArmCos, oldArmSin = self._getCosAndSin(oldArmDegree)
+        armCos, armSin = self._getCosAndSin(armDegree)
+        oldHandCos, oldHandSin = self._getCosAndSin(oldHandDegree)
+        handCos, handSin = self._getCosAndSin(handDegree)
+
+        xOld = self.armLength * oldArmCos + self.handLength * oldHandCos + self.robotWidth
+        yOld = self.armLength * oldArmSin + self.handLength * oldHandSin + self.robotHeight
+
+        x = self.armLength * armCos + self.handLength * handCos + self.robotWidth
+        y = self.armLength * armSin + self.handLength * handSin + self.robotHeight
+
+        if y < 0:
+            if yOld <= 0:
+                return math.sqrt(xOld * xOld + yOld * yOld) - math.sqrt(x * x + y * y)
+            return (xOld - yOld * (x - xOld) / (y - yOld)) - math.sqrt(x * x + y * y)
+        else:
+            if yOld >= 0:
+                return 0.0
+            return -(x - y * (xOld - x) / (yOld - y)) + math.sqrt(xOld * xOld + yOld * yOld)
+
+        raise Exception('Never Should See This!')
+
+class CrawlerSimulation(object):
+    """
+    A crawling robot, its environment, and a Q-learning agent that controls it.
+    Each step, the agent picks an action, the robot moves, and the agent learns from the result.
+    """
+
+    def __init__(self, robot = None, epsilon = 0.5, gamma = 0.8, alpha = 0.8):
+        if (robot is None):
+            robot = CrawlingRobot()
+
+        self.robot = robot
+        self.robotEnvironment = CrawlingRobotEnvironment(self.robot)
+        self.stepCount = 0
+
+        qTable = DenseQTable(self.robotEnvironment.getStates(), ACTIONS)
+        self.learner = QLearningAgent(0, actionFn = self.robotEnvironment.getPossibleActions,
+                qTable = qTable)
+
+        self.learner.setEpsilon(epsilon)
+        self.learner.setLearningRate(alpha)
+        self.learner.setDiscount(gamma)
+
+    def run(self, maxSteps):
+        """
+        Take maxSteps steps (as fast as possible).
+        Returns the number of seconds it took.
+        """
+
+        startTime = time.time()
+
+        self.learner.startEpisode()
+        for i in range(maxSteps):
+            self.step()
+        self.learner.stopEpisode()
+
+        return time.time() - startTime
+
+    def step(self):
+        self.stepCount += 1
+
+        state = self.robotEnvironment.getCurrentState()
+        actions = self.robotEnvironment.getPossibleActions(state)
+
+        if len(actions) == 0.0:
+            self.robotEnvironment.reset()
+            state = self.robotEnvironment.getCurrentState()
+            actions = self.robotEnvironment.getPossibleActions(state)
+            print('Reset!')
+
+        action = self.learner.getAction(state)
+        if (action is None):
+            raise Exception('None action returned: Code Not Complete')
+
+        nextState, reward = self.robotEnvironment.doAction(action)
+        self.learner.observeTransition(state, action, nextState, reward)
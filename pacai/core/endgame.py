@@ -0,0 +1,364 @@
+"""
+Endgame tables: exact solutions for small Pacman layouts.
+
+On a small enough layout, every state that can be reached from the start
+(Pacman's position, each ghost's position and direction, the remaining food, and whose turn it is)
+can be listed.
+`EndgameTable.build` lists them by playing every possible move with the real game rules
+(on a start state supplied by the caller, e.g. a `pacai.bin.pacman.PacmanGameState`),
+then solves the game by retrograde analysis (value iteration from the end of the game back
+towards the start): Pacman maximizes the score, and the ghosts work together to minimize it.
+
+The value stored for a state is the change in score from that state to the end of the game
+under optimal play, so `EndgameTable.getValue` is an exact evaluation for any reachable state.
+Tables are stored compactly on disk (sorted integer keys and values in arrays)
+and loaded into a dict for constant time lookups.
+"""
+
+import array
+import hashlib
+import logging
+import os
+import pickle
+import time
+
+from pacai.core.directions import Directions
+
+DEFAULT_MAX_STATES = 5000000
+DEFAULT_MAX_SWEEPS = 1000
+
+# Ghost directions, in the order they are encoded.
+DIRECTIONS = [Directions.NORTH, Directions.SOUTH, Directions.EAST, Directions.WEST, Directions.STOP]
+DIRECTION_INDEXES = {direction: index for (index, direction) in enumerate(DIRECTIONS)}
+
+# {layout: EndgameTable}, tables loaded by `score`.
+_tables = {}
+
+class EndgameTable:
+    """
+    The solved values of every reachable state of a single layout.
+    """
+
+    def __init__(self, layout, values, converged = True):
+        self._layout = layout
+        # {state key: value}
+        self._values = values
+        self._converged = converged
+
+        self._encoder = _StateEncoder(layout)
+
+    @staticmethod
+    def build(startState, maxStates = DEFAULT_MAX_STATES, maxSweeps = DEFAULT_MAX_SWEEPS):
+        """
+        Enumerate and solve every state reachable from the start state of a layout.
+        The start state is searched in place (applying and undoing moves),
+        and is left as it was given.
+
+        If Pacman cannot force the game to end, the ghosts can make the game last forever
+        (losing a point every turn), and the values of those states never settle.
+        In that case the solution is cut off after maxSweeps sweeps (and is not `isConverged`).
+        """
+
+        layout = startState.getInitialLayout()
+        if (len(layout.capsules) > 0):
+            raise ValueError('Endgame tables do not support layouts with capsules.')
+
+        encoder = _StateEncoder(layout)
+
+        starttime = time.time()
+        keys, offsets, targets, rewards = _enumerate(startState, encoder, maxStates)
+        logging.debug('Enumerated %d endgame states in %.1f seconds.' %
+                (len(keys), time.time() - starttime))
+
+        numAgents = layout.getNumGhosts() + 1
+        values, converged, sweeps = _solve(keys, offsets, targets, rewards, numAgents, maxSweeps)
+        logging.debug('Solved %d endgame states in %d sweeps (%.1f seconds total).' %
+                (len(keys), sweeps, time.time() - starttime))
+
+        return EndgameTable(layout, dict(zip(keys, values)), converged)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as file:
+            components = pickle.load(file)
+
+        keys = array.array('q')
+        keys.frombytes(components['keys'])
+
+        values = array.array('i')
+        values.frombytes(components['values'])
+
+        return EndgameTable(components['layout'], dict(zip(keys, values)),
+                components['converged'])
+
+    def getLayout(self):
+        return self._layout
+
+    def getValue(self, state):
+        """
+        Get the change in score from the state to the end of the game under optimal play,
+        or None if the state is not in the table.
+        """
+
+        if (state.isOver()):
+            return 0
+
+        key = self._encoder.encode(state)
+        if (key is None):
+            return None
+
+        return self._values.get(key)
+
+    def isConverged(self):
+        return self._converged
+
+    def save(self, path):
+        """
+        Write the table to disk.
+        The file is written to a temp path first, so a partial write will never be loaded.
+        """
+
+        keys = sorted(self._values)
+
+        components = {
+            'layout': self._layout,
+            'converged': self._converged,
+            'keys': array.array('q', keys).tobytes(),
+            'values': array.array('i', [self._values[key] for key in keys]).tobytes(),
+        }
+
+        tempPath = path + '.tmp'
+        with open(tempPath, 'wb') as file:
+            pickle.dump(components, file)
+
+        os.replace(tempPath, path)
+
+    def __len__(self):
+        return len(self._values)
+
+def loadTable(startState, directory = None, **kwargs):
+    """
+    Get the table for the layout of a start state.
+    If a directory is supplied, the table will be loaded from it when present,
+    and saved to it after being built otherwise.
+    Any other arguments are passed to `EndgameTable.build`.
+    """
+
+    layout = startState.getInitialLayout()
+
+    path = None
+    if (directory is not None):
+        path = os.path.join(directory, 'endgame_%s.bin' % (_layoutDigest(layout)))
+
+    if (path is not None and os.path.isfile(path)):
+        table = EndgameTable.load(path)
+        if (table.getLayout() == layout):
+            logging.debug('Loaded endgame table %s.' % (path))
+            return table
+
+        logging.warning('Endgame table %s is for a different layout, rebuilding it.' % (path))
+
+    starttime = time.time()
+    table = EndgameTable.build(startState, **kwargs)
+    logging.info('Built endgame table (%d states) in %.1f seconds.' %
+            (len(table), time.time() - starttime))
+
+    if (path is not None):
+        os.makedirs(directory, exist_ok = True)
+        table.save(path)
+
+    return table
+
+def score(gameState):
+    """
+    An evaluation function that gives the final score of the game under optimal play.
+    The table for the state's layout is built the first time it is needed
+    (so only use it on small layouts without capsules).
+    States missing from the table are scored by their current score.
+    """
+
+    layout = gameState.getInitialLayout()
+    if (layout not in _tables):
+        # A new state of the same kind is the start of the layout.
+        _tables[layout] = EndgameTable.build(type(gameState)(layout))
+
+    value = _tables[layout].getValue(gameState)
+    if (value is None):
+        return gameState.getScore()
+
+    return gameState.getScore() + value
+
+class _StateEncoder:
+    """
+    Packs the parts of a state that matter for the rest of the game into a single integer:
+    whose turn it is, the remaining food (one bit per food on the layout),
+    Pacman's cell, and each ghost's cell and direction.
+    """
+
+    def __init__(self, layout):
+        walls = layout.walls
+
+        self._cells = {}
+        for x in range(walls.getWidth()):
+            for y in range(walls.getHeight()):
+                if (not walls[x][y]):
+                    self._cells[(x, y)] = len(self._cells)
+
+        self._food = layout.food.asList()
+        self._numAgents = layout.getNumGhosts() + 1
+
+    def encode(self, state):
+        """
+        Returns None for states that can't be encoded (like states with scared ghosts).
+        """
+
+        numCells = len(self._cells)
+
+        key = 0
+        for ghostState in reversed(state.getGhostStates()):
+            position = ghostState.getPosition()
+            if (ghostState.isScared() or position not in self._cells):
+                return None
+
+            key = (key * numCells + self._cells[position]) * len(DIRECTIONS)
+            key += DIRECTION_INDEXES[ghostState.getDirection()]
+
+        position = state.getPacmanPosition()
+        if (position not in self._cells):
+            return None
+
+        key = key * numCells + self._cells[position]
+
+        for (x, y) in self._food:
+            key = key * 2 + int(state.hasFood(x, y))
+
+        lastAgent = state.getLastAgentMoved()
+        turn = 0 if lastAgent is None else (lastAgent + 1) % self._numAgents
+
+        return key * self._numAgents + turn
+
+def _enumerate(state, encoder, maxStates):
+    """
+    Find every state reachable from the start state with a depth-first search
+    (applying and undoing actions on the start state itself).
+
+    Returns the keys of the states (in the order their searches finished,
+    so successors tend to come before the states that lead to them)
+    and their moves as compressed rows:
+    the moves of state i are offsets[i] to offsets[i + 1] in targets
+    (the index of the next state, or -1 if the move ends the game)
+    and rewards (the change in score).
+    """
+
+    numAgents = state.getNumAgents()
+
+    # {key: [(next key or None, reward), ...]}
+    moves = {}
+    order = []
+
+    def expand(key):
+        agentIndex = key % numAgents
+        score = state.getScore()
+        edges = []
+
+        for action in state.getLegalActions(agentIndex):
+            undo = state.applyAction(agentIndex, action)
+
+            nextKey = None
+            if (not state.isOver()):
+                nextKey = encoder.encode(state)
+
+            edges.append((action, nextKey, state.getScore() - score))
+            state.undoAction(undo)
+
+        moves[key] = [(nextKey, reward) for (action, nextKey, reward) in edges]
+
+        # Only keep the moves that lead to states that still need to be searched.
+        return iter([(action, nextKey) for (action, nextKey, reward) in edges
+                if nextKey is not None])
+
+    startKey = encoder.encode(state)
+    # [(key, moves left to search, undo record to leave the state), ...]
+    stack = [(startKey, expand(startKey), None)]
+
+    try:
+        while (len(stack) > 0):
+            key, edges, undo = stack[-1]
+
+            for (action, nextKey) in edges:
+                if (nextKey in moves):
+                    continue
+
+                if (len(moves) >= maxStates):
+                    raise ValueError('Layout has more than %d reachable states.' % (maxStates))
+
+                nextUndo = state.applyAction(key % numAgents, action)
+                stack.append((nextKey, expand(nextKey), nextUndo))
+                break
+            else:
+                stack.pop()
+                order.append(key)
+
+                if (undo is not None):
+                    state.undoAction(undo)
+    finally:
+        # Leave the start state as it was given (even if the search gave up).
+        for (key, edges, undo) in reversed(stack):
+            if (undo is not None):
+                state.undoAction(undo)
+
+    indexes = {key: index for (index, key) in enumerate(order)}
+
+    offsets = array.array('q', [0])
+    targets = array.array('q')
+    rewards = array.array('q')
+
+    for key in order:
+        for (nextKey, reward) in moves[key]:
+            targets.append(-1 if nextKey is None else indexes[nextKey])
+            rewards.append(reward)
+
+        offsets.append(len(targets))
+
+    return order, offsets, targets, rewards
+
+def _solve(keys, offsets, targets, rewards, numAgents, maxSweeps):
+    """
+    Value iteration (in place, in the order of the keys) until no value changes.
+    Pacman (turn 0) takes the best move, the ghosts take the worst move for Pacman.
+    Returns the values, whether they converged, and the number of sweeps.
+    """
+
+    values = [0] * len(keys)
+    maximizing = [key % numAgents == 0 for key in keys]
+
+    for sweep in range(1, maxSweeps + 1):
+        changed = False
+
+        for index in range(len(keys)):
+            best = None
+            for move in range(offsets[index], offsets[index + 1]):
+                target = targets[move]
+                value = rewards[move]
+                if (target >= 0):
+                    value += values[target]
+
+                if (best is None or (value > best if maximizing[index] else value < best)):
+                    best = value
+
+            if (best != values[index]):
+                values[index] = best
+                changed = True
+
+        if (not changed):
+            return values, True, sweep
+
+    return values, False, maxSweeps
+
+def _layoutDigest(layout):
+    """
+    A name for a layout that is the same between runs (unlike its hash).
+    """
+
+    text = '\n'.join(layout.layoutText) + '\n%d' % (layout.getNumGhosts())
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
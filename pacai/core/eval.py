@@ -12,3 +12,12 @@ def score(gameState):
     """
 
     return gameState.getScore()
+
+def scores(gameStates):
+    """
+    The batched version of `score`: the scores of a list of states.
+    Batched evaluation functions can be used with
+    `pacai.agents.search.multiagent.MultiAgentSearchAgent` (as `batchEvalFn`).
+    """
+
+    return [gameState.getScore() for gameState in gameStates]
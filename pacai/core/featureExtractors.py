@@ -1,12 +1,19 @@
 """
 Feature extractors for game states.
+
+Features are returned as a dict (`FeatureExtractor.getFeatures`),
+or as a compact `SparseFeatures` vector where each feature name is replaced by a small integer
+from a `FeatureInterner` (`FeatureExtractor.getSparseFeatures`).
+Sparse features work directly with weights stored in an array (indexed the same way).
 """
 
 import abc
+import collections
+import operator
 
 from pacai.core.actions import Actions
-from pacai.core.search import search
-from pacai.student.searchAgents import AnyFoodSearchProblem
+from pacai.core.search.maze import MazeGraph
+from pacai.core.search.multigoal import NearestTargetDistances
 
 class FeatureExtractor(abc.ABC):
     """
@@ -24,6 +31,81 @@ class FeatureExtractor(abc.ABC):
 
         pass
 
+    def getSparseFeatures(self, state, action, interner):
+        """
+        Returns the features as a `SparseFeatures` (indexed by the interner).
+        Extractors that can build their features more directly may override this.
+        """
+
+        return SparseFeatures.fromDict(self.getFeatures(state, action), interner)
+
+class FeatureInterner:
+    """
+    Assigns each feature (name) a small integer index, in the order the features are first seen.
+    """
+
+    def __init__(self):
+        # {feature: index}
+        self._indexes = {}
+        self._features = []
+
+    def getFeature(self, index):
+        return self._features[index]
+
+    def getFeatures(self):
+        return self._features
+
+    def getIndex(self, feature):
+        index = self._indexes.get(feature)
+        if (index is None):
+            index = len(self._features)
+            self._indexes[feature] = index
+            self._features.append(feature)
+
+        return index
+
+    def __len__(self):
+        return len(self._features)
+
+class SparseFeatures:
+    """
+    A feature vector that only stores its non-zero features:
+    parallel tuples of feature indexes (from a `FeatureInterner`) and values.
+    """
+
+    __slots__ = ('indexes', 'values')
+
+    def __init__(self, indexes, values):
+        self.indexes = tuple(indexes)
+        self.values = tuple(values)
+
+    @staticmethod
+    def fromDict(features, interner):
+        return SparseFeatures([interner.getIndex(feature) for feature in features],
+                features.values())
+
+    def addTo(self, weights, scale = 1.0):
+        """
+        Add this vector (times scale) to an array of weights, in place.
+        """
+
+        for (index, value) in zip(self.indexes, self.values):
+            weights[index] += scale * value
+
+    def dot(self, weights):
+        """
+        The dot product with an array of weights (long enough for every index).
+        """
+
+        return sum(map(operator.mul, self.values, map(weights.__getitem__, self.indexes)))
+
+    def toDict(self, interner):
+        return {interner.getFeature(index): value
+                for (index, value) in zip(self.indexes, self.values)}
+
+    def __len__(self):
+        return len(self.indexes)
+
 class IdentityExtractor(FeatureExtractor):
     def getFeatures(self, state, action):
         feats = {}
@@ -34,13 +116,17 @@ class IdentityExtractor(FeatureExtractor):
 class SimpleExtractor(FeatureExtractor):
     """
     Returns simple features for a basic reflex Pacman.
+
+    Everything that only depends on the layout is computed once per layout:
+    the maze graph (`pacai.core.search.maze.MazeGraph`) and the neighbors of every cell.
+    The distance from every cell to the closest food is kept in a
+    `pacai.core.search.multigoal.NearestTargetDistances`,
+    which is only partially recomputed as food is eaten.
     """
 
     def getFeatures(self, state, action):
-        # Extract the grid of food and wall locations and get the ghost locations.
-        food = state.getFood()
         walls = state.getWalls()
-        ghosts = state.getGhostPositions()
+        maze = _getMazeFeatures(walls)
 
         features = {}
         features["bias"] = 1.0
@@ -51,15 +137,22 @@ class SimpleExtractor(FeatureExtractor):
         next_x, next_y = int(x + dx), int(y + dy)
 
         # Count the number of ghosts 1-step away.
-        features["#-of-ghosts-1-step-away"] = sum((next_x, next_y) in
-                Actions.getLegalNeighbors(g, walls) for g in ghosts)
+        ghostCount = 0
+        for (ghostX, ghostY) in state.getGhostPositions():
+            ghostNeighbors = maze.neighbors.get((int(ghostX + 0.5), int(ghostY + 0.5)))
+            if (ghostNeighbors is None):
+                ghostNeighbors = Actions.getLegalNeighbors((ghostX, ghostY), walls)
+
+            if ((next_x, next_y) in ghostNeighbors):
+                ghostCount += 1
+
+        features["#-of-ghosts-1-step-away"] = ghostCount
 
         # If there is no danger of ghosts then add the food feature.
-        if not features["#-of-ghosts-1-step-away"] and food[next_x][next_y]:
+        if not features["#-of-ghosts-1-step-away"] and state.hasFood(next_x, next_y):
             features["eats-food"] = 1.0
 
-        prob = AnyFoodSearchProblem(state, start = (next_x, next_y))
-        dist = len(search.bfs(prob))
+        dist = maze.getFoodDistances(state).getDistance(maze.graph.getIndex((next_x, next_y)))
         if dist is not None:
             # Make the distance a number less than one otherwise the update will diverge wildly.
             features["closest-food"] = float(dist) / (walls.getWidth() * walls.getHeight())
@@ -68,3 +161,83 @@ class SimpleExtractor(FeatureExtractor):
             features[key] /= 10.0
 
         return features
+
+class _MazeFeatures:
+    """
+    The parts of `SimpleExtractor` that are kept between calls for a single maze.
+    """
+
+    def __init__(self, walls):
+        self.graph = MazeGraph.get(walls)
+
+        # {position: the position and its legal neighbors}
+        # The same neighbors that `pacai.core.actions.Actions.getLegalNeighbors` gives.
+        self.neighbors = {position: set(Actions.getLegalNeighbors(position, walls))
+                for position in walls.asList(False)}
+
+        self._foodDistances = None
+        self._lastState = None
+
+    def getFoodDistances(self, state):
+        """
+        Get the distances to the closest food for a state.
+        Extractors are called for every action of a state in a row,
+        so the last state is remembered.
+        """
+
+        if (self._lastState is state):
+            return self._foodDistances
+
+        graph = self.graph
+
+        if (self._foodDistances is None):
+            self._foodDistances = NearestTargetDistances(graph,
+                    graph.maskFromGrid(state.getFood()))
+        else:
+            # Usually food has only been eaten since the last state, so check the known food
+            # and only look at the whole grid if there is new food (e.g. a new game).
+            foodMask = self._foodDistances.getTargets()
+            remaining = 0
+            while (foodMask != 0):
+                bit = foodMask & -foodMask
+                foodMask ^= bit
+
+                x, y = graph.getPosition(bit.bit_length() - 1)
+                if (state.hasFood(x, y)):
+                    remaining |= bit
+
+            if (bin(remaining).count('1') != state.getNumFood()):
+                remaining = graph.maskFromGrid(state.getFood())
+
+            self._foodDistances.setTargets(remaining)
+
+        self._lastState = state
+        return self._foodDistances
+
+# The most mazes that keep cached features (the least recently used is dropped first).
+MAX_CACHED_MAZES = 8
+
+# {walls: _MazeFeatures}, least recently used first.
+_mazeFeatures = collections.OrderedDict()
+
+# The walls and features of the last call (hashing the walls is expensive).
+_lastMazeFeatures = (None, None)
+
+def _getMazeFeatures(walls):
+    global _lastMazeFeatures
+
+    if (_lastMazeFeatures[0] is walls):
+        return _lastMazeFeatures[1]
+
+    features = _mazeFeatures.get(walls)
+    if (features is not None):
+        _mazeFeatures.move_to_end(walls)
+    else:
+        features = _MazeFeatures(walls)
+        _mazeFeatures[walls] = features
+
+        if (len(_mazeFeatures) > MAX_CACHED_MAZES):
+            _mazeFeatures.popitem(last = False)
+
+    _lastMazeFeatures = (walls, features)
+    return features
@@ -33,6 +33,10 @@ class AbstractGameState(abc.ABC):
         self._food = layout.food.copy()
         self._lastFoodEaten = None
 
+        # Hashing the food grid is expensive, so keep the hash until the food is eaten.
+        # Successors share this along with the (uncopied) food.
+        self._foodHash = None
+
         self._capsulesCopied = False
         self._capsules = layout.capsules.copy()
         self._lastCapsuleEaten = None
@@ -64,6 +68,39 @@ class AbstractGameState(abc.ABC):
 
         pass
 
+    def applyAction(self, agentIndex, action):
+        """
+        Apply an action to this state in place, like `AbstractGameState.generateSuccessor`
+        but without making a new state.
+        Returns an undo record that `AbstractGameState.undoAction` uses to take the action back.
+        Actions must be undone in the opposite order that they were applied.
+
+        Only apply actions to a state that you own (e.g. one made by generateSuccessor),
+        and put the state back before anyone else sees it.
+        Food and capsules are shared with other states,
+        so they are still copied (on write) when something is eaten.
+        """
+
+        if (self.isOver()):
+            raise RuntimeError("Can't apply actions to a terminal state.")
+
+        undo = self._getUndoRecord()
+
+        # Never edit food or capsules in place, another state may be using them.
+        self._foodCopied = False
+        self._capsulesCopied = False
+
+        self._applySuccessorAction(agentIndex, action)
+
+        return undo
+
+    def undoAction(self, undo):
+        """
+        Take back an action applied with `AbstractGameState.applyAction`.
+        """
+
+        self._restoreUndoRecord(undo)
+
     def addScore(self, score):
         self._hash = None
         self._score += score
@@ -99,6 +136,7 @@ class AbstractGameState(abc.ABC):
             self._foodCopied = True
 
         self._food[x][y] = False
+        self._foodHash = None
         self._lastFoodEaten = (x, y)
 
         self._hash = None
@@ -242,6 +280,36 @@ class AbstractGameState(abc.ABC):
         self._score = score
         self._hash = None
 
+    @abc.abstractmethod
+    def _applySuccessorAction(self, agentIndex, action):
+        """
+        Apply the action to the context state (self).
+        """
+
+        pass
+
+    def _getUndoRecord(self):
+        """
+        Record everything that applying an action could change.
+        Children that add state that actions change should extend the record.
+        """
+
+        return (tuple([agentState.getSnapshot() for agentState in self._agentStates]),
+                self._score, self._gameover, self._win, self._lastAgentMoved,
+                self._food, self._foodCopied, self._foodHash, self._lastFoodEaten,
+                self._capsules, self._capsulesCopied, self._lastCapsuleEaten,
+                self._hash)
+
+    def _restoreUndoRecord(self, undo):
+        (snapshots,
+                self._score, self._gameover, self._win, self._lastAgentMoved,
+                self._food, self._foodCopied, self._foodHash, self._lastFoodEaten,
+                self._capsules, self._capsulesCopied, self._lastCapsuleEaten,
+                self._hash) = undo
+
+        for (agentState, snapshot) in zip(self._agentStates, snapshots):
+            agentState.restoreSnapshot(snapshot)
+
     def _initSuccessor(self):
         """
         Get a state that will eventually serve as a successor.
@@ -287,9 +355,18 @@ class AbstractGameState(abc.ABC):
                 and self._agentStates == other._agentStates
                 and self._layout == other._layout)
 
+    def __getstate__(self):
+        # String hashes differ between processes, so a pickled state must recompute its hash.
+        state = self.__dict__.copy()
+        state['_hash'] = None
+        return state
+
     def __hash__(self):
         if (self._hash is None):
+            if (self._foodHash is None):
+                self._foodHash = hash(self._food)
+
             self._hash = util.buildHash(self._score, self._gameover, self._win, *self._capsules,
-                self._food, *self._agentStates, self._layout)
+                self._foodHash, *self._agentStates, self._layout)
 
         return self._hash
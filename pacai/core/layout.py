@@ -26,6 +26,9 @@ class Layout(object):
 
         self.processLayoutText(layoutText, maxGhosts)
 
+        # Layouts are compared by content (so a layout still matches after being pickled).
+        self._hash = hash((tuple(layoutText), self.numGhosts))
+
     def getNumGhosts(self):
         return self.numGhosts
 
@@ -72,6 +75,23 @@ class Layout(object):
         row, col = [int(x) for x in pacPos]
         return ghostPos in self.visibility[row][col][pacDirection]
 
+    def __eq__(self, other):
+        if (self is other):
+            return True
+
+        if (not isinstance(other, Layout)):
+            return False
+
+        return (self.numGhosts == other.numGhosts and self.layoutText == other.layoutText)
+
+    def __hash__(self):
+        return self._hash
+
+    def __setstate__(self, state):
+        # String hashes differ between processes.
+        self.__dict__.update(state)
+        self._hash = hash((tuple(self.layoutText), self.numGhosts))
+
     def __str__(self):
         return "\n".join(self.layoutText)
 
@@ -0,0 +1,425 @@
+"""
+Fast solvers for Markov decision processes (`pacai.core.mdp.MarkovDecisionProcess`).
+
+Asking an MDP for its transitions and rewards is slow,
+and a naive value iteration asks for the same transitions over and over
+(once per action per state per sweep, plus once more to find the best action).
+`CompiledMDP` asks for each transition once and stores the whole MDP in flat arrays indexed by
+state id (like a sparse matrix in compressed row form),
+so every later backup is just arithmetic over those arrays.
+
+Several solvers work on a compiled MDP (see `SOLVERS`):
+ - `valueIteration`: synchronous value iteration (every state, every sweep, from the old values).
+ - `gaussSeidel`: value iteration in place (each backup uses the newest values).
+ - `prioritizedSweeping`: back up the state with the largest Bellman error first,
+   and only revisit the predecessors of states whose values changed.
+ - `policyIteration`: alternate solving for the values of a fixed policy and improving the policy.
+
+Every solver counts the states it backs up in `CompiledMDP.backups`.
+"""
+
+import array
+import collections
+import logging
+import operator
+
+from pacai.util.priorityQueue import PriorityQueue
+
+# The most sweeps used to evaluate a single policy in `policyIteration`.
+MAX_EVALUATION_SWEEPS = 10000
+
+class CompiledMDP:
+    """
+    The states, actions, transitions, and rewards of an MDP, stored in flat arrays.
+
+    States are numbered in the order they are found:
+    first the states from `pacai.core.mdp.MarkovDecisionProcess.getStates`,
+    then any other state that a transition reaches.
+    Each (state, action) pair is numbered as well.
+    The pairs of state i are `getPairs(i)`,
+    and the transitions of pair j are `transitionOffsets[j]` to `transitionOffsets[j + 1]`
+    in `targets` (next state ids) and `probabilities`.
+    Rewards are folded into the expected reward of each pair (`pairRewards`).
+    Terminal states have no actions (and so a value of zero).
+    """
+
+    def __init__(self, mdp):
+        self._states = []
+        # {state: id}
+        self._indexes = {}
+
+        # The actions of each pair.
+        self._pairActions = []
+        # The first pair of each state (and the end of the last state's pairs).
+        self.pairOffsets = array.array('q', [0])
+        self.pairRewards = array.array('d')
+
+        # The first transition of each pair (and the end of the last pair's transitions).
+        self.transitionOffsets = array.array('q', [0])
+        self.targets = array.array('q')
+        self.probabilities = array.array('d')
+
+        queue = collections.deque()
+        for state in mdp.getStates():
+            self._addState(state, queue)
+
+        while (len(queue) > 0):
+            state = queue.popleft()
+
+            actions = []
+            if (not mdp.isTerminal(state)):
+                actions = mdp.getPossibleActions(state)
+
+            for action in actions:
+                expectedReward = 0.0
+                for (nextState, probability) in mdp.getTransitionStatesAndProbs(state, action):
+                    expectedReward += probability * mdp.getReward(state, action, nextState)
+
+                    self.targets.append(self._addState(nextState, queue))
+                    self.probabilities.append(probability)
+
+                self._pairActions.append(action)
+                self.pairRewards.append(expectedReward)
+                self.transitionOffsets.append(len(self.targets))
+
+            self.pairOffsets.append(len(self._pairActions))
+
+        # The number of state backups done by solvers.
+        self.backups = 0
+
+        self._rows = None
+        self._predecessors = None
+
+    def getAction(self, pair):
+        return self._pairActions[pair]
+
+    def getIndex(self, state):
+        """
+        Get the id of a state, or None if the state is not in the MDP.
+        """
+
+        return self._indexes.get(state)
+
+    def getNumPairs(self):
+        return len(self._pairActions)
+
+    def getPairs(self, index):
+        return range(self.pairOffsets[index], self.pairOffsets[index + 1])
+
+    def getQValue(self, values, pair, discountRate):
+        """
+        The value of taking a pair's action (given the values of every state).
+        """
+
+        start = self.transitionOffsets[pair]
+        end = self.transitionOffsets[pair + 1]
+
+        future = sum(map(operator.mul, self.probabilities[start:end],
+                map(values.__getitem__, self.targets[start:end])))
+
+        return self.pairRewards[pair] + discountRate * future
+
+    def getPolicy(self, values, index, discountRate):
+        """
+        The id of the best pair for a state (the first one on ties), or None if it has no actions.
+        """
+
+        bestPair = None
+        bestValue = None
+
+        for pair in self.getPairs(index):
+            value = self.getQValue(values, pair, discountRate)
+            if (bestValue is None or value > bestValue):
+                bestPair = pair
+                bestValue = value
+
+        return bestPair
+
+    def getPredecessors(self, index):
+        """
+        Get the states that have a transition to the given state,
+        as {predecessor id: the highest probability of any of its actions reaching the state}.
+        """
+
+        if (self._predecessors is None):
+            self._predecessors = [{} for i in range(len(self))]
+            for index in range(len(self)):
+                for pair in self.getPairs(index):
+                    start = self.transitionOffsets[pair]
+                    end = self.transitionOffsets[pair + 1]
+                    for move in range(start, end):
+                        predecessors = self._predecessors[self.targets[move]]
+                        predecessors[index] = max(predecessors.get(index, 0.0),
+                                self.probabilities[move])
+
+        return self._predecessors[index]
+
+    def getRows(self):
+        """
+        Get the (state id, [(expected reward, probabilities, targets), ...]) of every state with
+        actions, in state id order.
+        This is the form the in-place solvers use to back up one state at a time.
+        """
+
+        if (self._rows is None):
+            self._rows = []
+            for index in range(len(self)):
+                pairs = self.getPairs(index)
+                if (len(pairs) == 0):
+                    continue
+
+                row = []
+                for pair in pairs:
+                    start = self.transitionOffsets[pair]
+                    end = self.transitionOffsets[pair + 1]
+                    row.append((self.pairRewards[pair], self.probabilities[start:end].tolist(),
+                            self.targets[start:end].tolist()))
+
+                self._rows.append((index, row))
+
+        return self._rows
+
+    def getState(self, index):
+        return self._states[index]
+
+    def getStates(self):
+        return self._states
+
+    def _addState(self, state, queue):
+        index = self._indexes.get(state)
+        if (index is None):
+            index = len(self._states)
+            self._indexes[state] = index
+            self._states.append(state)
+            queue.append(state)
+
+        return index
+
+    def __len__(self):
+        return len(self._states)
+
+def valueIteration(compiled, discountRate, iterations, tolerance = 0.0, values = None):
+    """
+    Run synchronous value iteration (every sweep only uses the values from the previous sweep)
+    on a `CompiledMDP`, starting from the given values (all zero by default).
+    Stops early once no value changes by more than the tolerance in a sweep.
+    Returns the values (a list indexed by state id) and the number of sweeps run.
+
+    Each sweep is done a whole array at a time (like a sparse matrix-vector product):
+    first the probability-weighted value of every transition,
+    then the Q-value of every pair, then the best Q-value of every state.
+    """
+
+    values = _initialValues(compiled, values)
+
+    probabilities = compiled.probabilities.tolist()
+    targets = compiled.targets.tolist()
+    pairRewards = compiled.pairRewards.tolist()
+
+    transitionOffsets = compiled.transitionOffsets
+    transitionSpans = list(zip(transitionOffsets[:-1], transitionOffsets[1:]))
+
+    # Only states with actions are backed up, the others keep their value.
+    pairOffsets = compiled.pairOffsets
+    actingStates = []
+    pairSpans = []
+    for index in range(len(compiled)):
+        if (pairOffsets[index] != pairOffsets[index + 1]):
+            actingStates.append(index)
+            pairSpans.append((pairOffsets[index], pairOffsets[index + 1]))
+
+    for sweep in range(iterations):
+        weighted = list(map(operator.mul, probabilities, map(values.__getitem__, targets)))
+        qValues = [reward + discountRate * sum(weighted[start:end])
+                for (reward, (start, end)) in zip(pairRewards, transitionSpans)]
+
+        oldValues = values
+        values = list(oldValues)
+        for (index, (start, end)) in zip(actingStates, pairSpans):
+            values[index] = max(qValues[start:end])
+
+        compiled.backups += len(actingStates)
+
+        change = max(map(abs, map(operator.sub, values, oldValues)), default = 0.0)
+        if (change <= tolerance):
+            logging.debug('Value iteration converged after %d sweeps.' % (sweep + 1))
+            return values, sweep + 1
+
+    return values, iterations
+
+def gaussSeidel(compiled, discountRate, iterations, tolerance = 0.0, values = None):
+    """
+    Run value iteration in place: each backup uses the newest values of the other states,
+    so values travel across the whole MDP in a single sweep (when states are in a good order).
+    Stops early once no value changes by more than the tolerance in a sweep.
+    Returns the values (a list indexed by state id) and the number of sweeps run.
+    """
+
+    values = _initialValues(compiled, values)
+    rows = compiled.getRows()
+    getValue = values.__getitem__
+
+    for sweep in range(iterations):
+        change = 0.0
+
+        for (index, row) in rows:
+            best = _bestValue(row, getValue, discountRate)
+
+            change = max(change, abs(best - values[index]))
+            values[index] = best
+
+        compiled.backups += len(rows)
+
+        if (change <= tolerance):
+            logging.debug('Gauss-Seidel value iteration converged after %d sweeps.' % (sweep + 1))
+            return values, sweep + 1
+
+    return values, iterations
+
+def prioritizedSweeping(compiled, discountRate, iterations, tolerance = 0.0, values = None):
+    """
+    Back up states in order of their Bellman error (how much a backup would change their value),
+    largest first.
+    When a state's value changes by some amount, the error of each predecessor can grow by at most
+    that amount times the discount and the probability of reaching the state from the predecessor.
+    So only predecessors are queued, with the sum of those bounds as their priority,
+    and states whose values have settled are never backed up again.
+    Bounds at or under the tolerance are kept (so small changes still add up),
+    and a state is queued once its bound goes over the tolerance.
+    Stops once no state can have an error over the tolerance.
+
+    To compare with the sweeping solvers, the budget (iterations) and the returned count are in
+    sweeps: one sweep is as many backups as there are states with actions.
+    Returns the values (a list indexed by state id) and the number of sweeps (rounded up) run.
+    """
+
+    values = _initialValues(compiled, values)
+    rows = dict(compiled.getRows())
+    getValue = values.__getitem__
+
+    # An upper bound on the Bellman error of each state.
+    errors = {}
+    # The priority each queued state was last pushed with.
+    priorities = {}
+    queue = PriorityQueue()
+
+    for (index, row) in rows.items():
+        error = abs(_bestValue(row, getValue, discountRate) - values[index])
+        errors[index] = error
+
+        if (error > tolerance):
+            priorities[index] = error
+            queue.push(index, -error)
+
+    maxBackups = iterations * len(rows)
+    backups = 0
+
+    while (not queue.isEmpty() and backups < maxBackups):
+        index = queue.pop()
+        if (index not in priorities):
+            # Already backed up through a higher priority copy.
+            continue
+
+        del priorities[index]
+
+        value = _bestValue(rows[index], getValue, discountRate)
+        change = abs(value - values[index])
+        values[index] = value
+        errors[index] = 0.0
+        backups += 1
+
+        for (predecessor, probability) in compiled.getPredecessors(index).items():
+            error = errors.get(predecessor, 0.0) + discountRate * probability * change
+            errors[predecessor] = error
+
+            # Only queue another copy when the priority has grown a lot,
+            # otherwise the queue fills up with copies (the state is still queued either way).
+            # Any older copy has a lower priority and will be skipped.
+            if (error > tolerance and error > 2.0 * priorities.get(predecessor, 0.0)):
+                priorities[predecessor] = error
+                queue.push(predecessor, -error)
+
+    compiled.backups += backups
+
+    if (len(priorities) == 0):
+        logging.debug('Prioritized sweeping converged after %d backups.' % (backups))
+
+    return values, -(-backups // max(1, len(rows)))
+
+def policyIteration(compiled, discountRate, iterations, tolerance = 0.0, values = None):
+    """
+    Run policy iteration: find the exact values of the current policy
+    (by solving the sparse linear system `V = R + discountRate * P V` for the policy,
+    with in-place Gauss-Seidel iterations), then switch each state to its best action.
+    The initial policy is greedy with respect to the initial values (all zero by default).
+    Stops once the policy does not change (or after iterations rounds).
+    Returns the values (a list indexed by state id) and the number of rounds run.
+    """
+
+    values = _initialValues(compiled, values)
+    rows = compiled.getRows()
+    getValue = values.__getitem__
+
+    # The linear solve only needs to be as precise as the values are being asked for,
+    # but a zero tolerance still has to stop.
+    evaluationTolerance = max(tolerance, 1e-10)
+
+    def qValues(row):
+        return [reward + discountRate * sum(map(operator.mul, probabilities,
+                map(getValue, targets))) for (reward, probabilities, targets) in row]
+
+    policy = []
+    for (index, row) in rows:
+        actionValues = qValues(row)
+        policy.append(actionValues.index(max(actionValues)))
+
+    for iteration in range(iterations):
+        # Evaluate the policy.
+        for sweep in range(MAX_EVALUATION_SWEEPS):
+            change = 0.0
+
+            for ((index, row), choice) in zip(rows, policy):
+                reward, probabilities, targets = row[choice]
+                value = reward + discountRate * sum(map(operator.mul, probabilities,
+                        map(getValue, targets)))
+
+                change = max(change, abs(value - values[index]))
+                values[index] = value
+
+            compiled.backups += len(rows)
+
+            if (change <= evaluationTolerance):
+                break
+
+        # Improve the policy, keeping the current action unless another is strictly better
+        # (so that ties can't make the policy cycle).
+        stable = True
+        for i in range(len(rows)):
+            actionValues = qValues(rows[i][1])
+            best = actionValues.index(max(actionValues))
+            if (actionValues[best] > actionValues[policy[i]] + evaluationTolerance):
+                policy[i] = best
+                stable = False
+
+        if (stable):
+            logging.debug('Policy iteration converged after %d rounds.' % (iteration + 1))
+            return values, iteration + 1
+
+    return values, iterations
+
+SOLVERS = {
+    'value': valueIteration,
+    'gauss-seidel': gaussSeidel,
+    'prioritized': prioritizedSweeping,
+    'policy': policyIteration,
+}
+
+def _bestValue(row, getValue, discountRate):
+    return max([reward + discountRate * sum(map(operator.mul, probabilities,
+            map(getValue, targets))) for (reward, probabilities, targets) in row])
+
+def _initialValues(compiled, values):
+    if (values is None):
+        return [0.0] * len(compiled)
+
+    return list(values)
@@ -0,0 +1,299 @@
+"""
+Storage for the Q-values of a learning agent (`pacai.student.qlearningAgents.QLearningAgent`).
+
+A Q-table maps (state, action) pairs to values.
+States are first turned into keys by a key encoder:
+ - `KeyEncoder`: the state itself is the key (good for small states, like gridworld positions).
+ - `ZobristKeyEncoder`: a 64 bit fingerprint of a Pacman game state,
+   so the table does not keep every visited game state (and its food grid) alive.
+
+Two tables are available (see `getQTable`):
+ - `DictQTable`: an array of action values for each key that has been seen (for sparse MDPs).
+ - `DenseQTable`: one flat array for an MDP whose states are all known ahead of time
+   (like gridworld or the crawler).
+
+Tables can be saved to and loaded from disk.
+"""
+
+import abc
+import array
+import hashlib
+import os
+import pickle
+
+# The number of recently encoded states that `ZobristKeyEncoder` remembers the keys of.
+ENCODER_CACHE_SIZE = 2
+
+class KeyEncoder:
+    """
+    Uses each state as its own key.
+    """
+
+    def encode(self, state):
+        return state
+
+class ZobristKeyEncoder(KeyEncoder):
+    """
+    Encodes a `pacai.core.gamestate.AbstractGameState` as a 64 bit Zobrist fingerprint:
+    the XOR of a fixed random number for each part of the state
+    (each remaining food and capsule, and each agent's position, direction, and scared timer).
+
+    The random numbers are derived from the parts themselves (not drawn from a generator),
+    so the same state gets the same key in every run and saved tables stay valid.
+    Unlike the state's own equality, the score is not part of the key
+    (it has no effect on future rewards).
+    Different states share a key with a probability of about 2^-64 per pair.
+    """
+
+    def __init__(self):
+        # {part: random number}
+        self._numbers = {}
+
+        # The most recent layout, and the positions of its food.
+        self._layout = None
+        self._foodPositions = []
+
+        # [(state, key), ...] for the most recently encoded states.
+        self._recent = []
+
+    def encode(self, state):
+        for (recentState, key) in self._recent:
+            if (recentState is state):
+                return key
+
+        layout = state.getInitialLayout()
+        if (layout is not self._layout):
+            # Food can only be eaten, so only the food the layout starts with needs checking.
+            self._layout = layout
+            self._foodPositions = layout.food.asList()
+
+        key = 0
+        for position in self._foodPositions:
+            if (state.hasFood(*position)):
+                key ^= self._getNumber(('food', position))
+
+        for position in state.getCapsules():
+            key ^= self._getNumber(('capsule', position))
+
+        for (index, agentState) in enumerate(state.getAgentStates()):
+            key ^= self._getNumber((index, agentState.getPosition(), agentState.getDirection(),
+                    agentState.getScaredTimer()))
+
+        self._recent.append((state, key))
+        if (len(self._recent) > ENCODER_CACHE_SIZE):
+            self._recent.pop(0)
+
+        return key
+
+    def _getNumber(self, part):
+        number = self._numbers.get(part)
+        if (number is None):
+            digest = hashlib.blake2b(repr(part).encode(), digest_size = 8).digest()
+            number = int.from_bytes(digest, 'little')
+            self._numbers[part] = number
+
+        return number
+
+    def __getstate__(self):
+        # Recently encoded states are not worth saving.
+        state = self.__dict__.copy()
+        state['_layout'] = None
+        state['_foodPositions'] = []
+        state['_recent'] = []
+
+        return state
+
+class QTable(abc.ABC):
+    """
+    The Q-values of (state, action) pairs.
+    Pairs that have never been set have a value of zero.
+    """
+
+    @abc.abstractmethod
+    def getQValue(self, state, action):
+        pass
+
+    def getQValues(self, state, actions):
+        """
+        Get the Q-value of each action in a state (in the same order as the actions).
+        """
+
+        return [self.getQValue(state, action) for action in actions]
+
+    @abc.abstractmethod
+    def setQValue(self, state, action, value):
+        pass
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as file:
+            table = pickle.load(file)
+
+        if (not isinstance(table, cls)):
+            raise ValueError('%s does not contain a %s.' % (path, cls.__name__))
+
+        return table
+
+    def save(self, path):
+        """
+        Write the table to disk.
+        The file is written to a temp path first, so a partial write will never be loaded.
+        """
+
+        tempPath = path + '.tmp'
+        with open(tempPath, 'wb') as file:
+            pickle.dump(self, file)
+
+        os.replace(tempPath, path)
+
+    @abc.abstractmethod
+    def __len__(self):
+        """
+        The number of states in the table.
+        """
+
+        pass
+
+class DictQTable(QTable):
+    """
+    A table that stores an array of action values for each state key that has been set.
+    Actions are numbered as they are first set, and each array is only as long as it needs to be.
+    """
+
+    def __init__(self, encoder = None):
+        if (encoder is None):
+            encoder = KeyEncoder()
+
+        self._encoder = encoder
+
+        # {key: array of values by action index}
+        self._rows = {}
+        # {action: index}
+        self._actionIndexes = {}
+
+    def getQValue(self, state, action):
+        row = self._rows.get(self._encoder.encode(state))
+        if (row is None):
+            return 0.0
+
+        index = self._actionIndexes.get(action)
+        if (index is None or index >= len(row)):
+            return 0.0
+
+        return row[index]
+
+    def getQValues(self, state, actions):
+        row = self._rows.get(self._encoder.encode(state))
+        if (row is None):
+            return [0.0] * len(actions)
+
+        values = []
+        for action in actions:
+            index = self._actionIndexes.get(action)
+            if (index is None or index >= len(row)):
+                values.append(0.0)
+            else:
+                values.append(row[index])
+
+        return values
+
+    def setQValue(self, state, action, value):
+        key = self._encoder.encode(state)
+
+        index = self._actionIndexes.get(action)
+        if (index is None):
+            index = len(self._actionIndexes)
+            self._actionIndexes[action] = index
+
+        row = self._rows.get(key)
+        if (row is None):
+            row = array.array('d')
+            self._rows[key] = row
+
+        if (index >= len(row)):
+            row.extend([0.0] * (index + 1 - len(row)))
+
+        row[index] = value
+
+    def __len__(self):
+        return len(self._rows)
+
+class DenseQTable(QTable):
+    """
+    A table for an MDP where every state and action is known ahead of time.
+    All the values are stored in a single array, one row of actions per state.
+    Getting the value of an unknown state (like a terminal state) gives zero,
+    but setting one raises a ValueError.
+    """
+
+    def __init__(self, states, actions, encoder = None):
+        if (encoder is None):
+            encoder = KeyEncoder()
+
+        self._encoder = encoder
+
+        # {key: index}
+        self._stateIndexes = {}
+        for state in states:
+            self._stateIndexes.setdefault(encoder.encode(state), len(self._stateIndexes))
+
+        # {action: index}
+        self._actionIndexes = {}
+        for action in actions:
+            self._actionIndexes.setdefault(action, len(self._actionIndexes))
+
+        self._numActions = len(self._actionIndexes)
+        self._values = array.array('d', [0.0]) * (len(self._stateIndexes) * self._numActions)
+
+    def getQValue(self, state, action):
+        stateIndex = self._stateIndexes.get(self._encoder.encode(state))
+        actionIndex = self._actionIndexes.get(action)
+        if (stateIndex is None or actionIndex is None):
+            return 0.0
+
+        return self._values[stateIndex * self._numActions + actionIndex]
+
+    def getQValues(self, state, actions):
+        stateIndex = self._stateIndexes.get(self._encoder.encode(state))
+        if (stateIndex is None):
+            return [0.0] * len(actions)
+
+        start = stateIndex * self._numActions
+
+        values = []
+        for action in actions:
+            actionIndex = self._actionIndexes.get(action)
+            if (actionIndex is None):
+                values.append(0.0)
+            else:
+                values.append(self._values[start + actionIndex])
+
+        return values
+
+    def setQValue(self, state, action, value):
+        stateIndex = self._stateIndexes.get(self._encoder.encode(state))
+        if (stateIndex is None):
+            raise ValueError('Unknown state for a dense Q-table: %s.' % (str(state)))
+
+        actionIndex = self._actionIndexes.get(action)
+        if (actionIndex is None):
+            raise ValueError('Unknown action for a dense Q-table: %s.' % (str(action)))
+
+        self._values[stateIndex * self._numActions + actionIndex] = value
+
+    def __len__(self):
+        return len(self._stateIndexes)
+
+def getQTable(name):
+    """
+    Get a new, empty sparse table by name:
+    'dict' (states are their own keys) or 'zobrist' (states are keyed by `ZobristKeyEncoder`).
+    Dense tables need to know the states and actions, so they have to be built directly.
+    """
+
+    if (name == 'dict'):
+        return DictQTable()
+    elif (name == 'zobrist'):
+        return DictQTable(ZobristKeyEncoder())
+
+    raise ValueError('Unknown Q-table: %s.' % (name))
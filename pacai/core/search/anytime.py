@@ -0,0 +1,176 @@
+"""
+Anytime search: find a (possibly suboptimal) path quickly,
+then keep improving it while time allows.
+"""
+
+import heapq
+import itertools
+import logging
+import time
+
+from pacai.core.search.heuristic import null as nullHeuristic
+
+DEFAULT_WEIGHTS = [5.0, 3.0, 2.0, 1.5, 1.0]
+
+# How many expansions happen between checks of the clock.
+CHECK_INTERVAL = 64
+
+class AnytimeSearch:
+    """
+    Anytime weighted A*.
+
+    The search runs weighted A* (f = g + weight * h) with a decreasing sequence of weights.
+    Large weights find a path fast, smaller weights find better paths,
+    and a final weight of 1 (with an admissible heuristic) proves the path is optimal.
+    Once a path is known, any node that cannot beat it (g + h >= best cost) is pruned.
+
+    `AnytimeSearch.run` searches until a deadline and returns the best path found so far.
+    Calling it again with a later deadline picks up exactly where the last call stopped.
+    """
+
+    def __init__(self, problem, heuristic = nullHeuristic, weights = DEFAULT_WEIGHTS):
+        self._problem = problem
+        self._heuristic = heuristic
+        self._weights = list(weights)
+
+        self._bestPath = None
+        self._bestCost = float('inf')
+
+        self._weightIndex = 0
+        self._search = None
+
+    def getBestCost(self):
+        return self._bestCost
+
+    def getBestPath(self):
+        return self._bestPath
+
+    def isOptimal(self):
+        """
+        True when every weight has been searched to exhaustion,
+        so (given an admissible heuristic) the best path is optimal.
+        """
+
+        return self._weightIndex >= len(self._weights)
+
+    def run(self, deadline = None, untilFound = False):
+        """
+        Search until the deadline (a `time.time()` value, or None for no deadline)
+        or until the path is known to be optimal.
+        If untilFound is True, then the search will continue past the deadline until
+        at least one path has been found.
+        Returns the best path found (None if no path has been found).
+        """
+
+        while (not self.isOptimal()):
+            if (self._search is None):
+                self._search = self._weightedSearch(self._weights[self._weightIndex])
+
+            for finished in self._search:
+                if (finished):
+                    break
+
+                if (untilFound and self._bestPath is None):
+                    continue
+
+                if (deadline is not None and time.time() >= deadline):
+                    return self._bestPath
+
+            logging.debug('Anytime search finished weight %.2f with best cost %s.' %
+                    (self._weights[self._weightIndex], str(self._bestCost)))
+
+            self._search = None
+            self._weightIndex += 1
+
+        return self._bestPath
+
+    def improve(self, seconds):
+        """
+        Grant the search more time.
+        """
+
+        return self.run(time.time() + seconds)
+
+    def _weightedSearch(self, weight):
+        """
+        A generator that runs a single weighted A* search.
+        It yields False every CHECK_INTERVAL expansions (a chance to stop),
+        and True when the search is exhausted.
+        """
+
+        problem = self._problem
+        heuristic = self._heuristic
+        counter = itertools.count()
+
+        start = problem.startingState()
+        startH = heuristic(start, problem)
+
+        # {state: cost}
+        costs = {start: 0}
+        # {state: (parent, action)}
+        parents = {start: None}
+        # [(f, tie breaker, g, h, state), ...]
+        frontier = [(weight * startH, next(counter), 0, startH, start)]
+
+        expansions = 0
+        while (len(frontier) > 0):
+            priority, tie, cost, h, state = heapq.heappop(frontier)
+
+            if (cost > costs[state]):
+                # A stale entry, we already found a cheaper way here.
+                continue
+
+            if (cost + h >= self._bestCost):
+                # Cannot improve on the best path.
+                continue
+
+            if (problem.isGoal(state)):
+                self._bestCost = cost
+                self._bestPath = _buildPath(parents, state)
+                continue
+
+            for (successor, action, stepCost) in problem.successorStates(state):
+                nextCost = cost + stepCost
+                if (nextCost >= costs.get(successor, float('inf'))):
+                    continue
+
+                nextH = heuristic(successor, problem)
+                if (nextCost + nextH >= self._bestCost):
+                    continue
+
+                costs[successor] = nextCost
+                parents[successor] = (state, action)
+                heapq.heappush(frontier,
+                        (nextCost + weight * nextH, next(counter), nextCost, nextH, successor))
+
+            expansions += 1
+            if (expansions % CHECK_INTERVAL == 0):
+                yield False
+
+        yield True
+
+def anytimeAStar(problem, heuristic = nullHeuristic, deadline = None):
+    """
+    Run `AnytimeSearch` until the deadline (in seconds from now) and return the best path.
+    If no path has been found by the deadline, the search continues until the first one is found.
+    An empty path is returned if there is no path at all.
+    """
+
+    if (deadline is not None):
+        deadline = time.time() + float(deadline)
+
+    path = AnytimeSearch(problem, heuristic).run(deadline, untilFound = True)
+    if (path is None):
+        return []
+
+    return path
+
+def _buildPath(parents, state):
+    path = []
+
+    while (parents[state] is not None):
+        state, action = parents[state]
+        path.append(action)
+
+    path.reverse()
+    return path
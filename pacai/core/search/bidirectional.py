@@ -0,0 +1,107 @@
+"""
+Bidirectional breadth-first search.
+
+For a single start and goal, searching forwards from the start and backwards from the goal
+until the two searches meet expands roughly the square root of the nodes a plain BFS would
+(on problems where the number of nodes grows quickly with depth).
+"""
+
+def bidirectionalSearch(problem):
+    """
+    Search forwards from the start and backwards from the goals of the problem
+    (see `pacai.core.search.position.PositionSearchProblem.goalStates`) one layer at a time,
+    always growing the smaller frontier.
+    Only problems that list their goal states with a `goalStates` method can be searched.
+    Backwards moves come from `pacai.core.search.problem.SearchProblem.predecessorStates`.
+
+    Like BFS, this finds the path with the fewest actions (costs are ignored).
+    Returns an empty list if no path exists.
+    """
+
+    if (not callable(getattr(problem, 'goalStates', None))):
+        raise ValueError('%s does not list its goal states, so it cannot be searched backwards.'
+                % (type(problem).__name__))
+
+    start = problem.startingState()
+    goals = problem.goalStates()
+
+    # {state: (parent, action)}, where the backwards parent is the next state towards the goal.
+    forwardParents = {start: None}
+    backwardParents = {goal: None for goal in goals}
+
+    if (start in backwardParents):
+        return []
+
+    forwardFrontier = [start]
+    backwardFrontier = list(goals)
+
+    while (len(forwardFrontier) > 0 and len(backwardFrontier) > 0):
+        if (len(forwardFrontier) <= len(backwardFrontier)):
+            forwardFrontier, meeting = _expandLayer(forwardFrontier, forwardParents,
+                    backwardParents, problem.successorStates)
+        else:
+            backwardFrontier, meeting = _expandLayer(backwardFrontier, backwardParents,
+                    forwardParents, problem.predecessorStates)
+
+        if (meeting is not None):
+            return _buildPath(forwardParents, backwardParents, meeting)
+
+    return []
+
+def _expandLayer(frontier, parents, otherParents, neighborFunction):
+    """
+    Expand an entire layer of one of the searches.
+    Returns the next layer and a state seen by both searches (or None).
+
+    The whole layer is expanded before checking for a meeting so that the meeting with the
+    shortest combined path is picked (the first meeting found may not be the best one).
+    """
+
+    nextFrontier = []
+    meetings = []
+
+    for state in frontier:
+        for (neighbor, action, cost) in neighborFunction(state):
+            if (neighbor in parents):
+                continue
+
+            parents[neighbor] = (state, action)
+            nextFrontier.append(neighbor)
+
+            if (neighbor in otherParents):
+                meetings.append(neighbor)
+
+    if (len(meetings) == 0):
+        return nextFrontier, None
+
+    # All new states are the same distance from this search's root,
+    # so pick the one closest to the other search's root.
+    best = min(meetings, key = lambda meeting: _depth(otherParents, meeting))
+
+    return nextFrontier, best
+
+def _buildPath(forwardParents, backwardParents, meeting):
+    path = []
+
+    state = meeting
+    while (forwardParents[state] is not None):
+        state, action = forwardParents[state]
+        path.append(action)
+
+    path.reverse()
+
+    state = meeting
+    while (backwardParents[state] is not None):
+        state, action = backwardParents[state]
+        path.append(action)
+
+    return path
+
+def _depth(parents, state):
+    depth = 0
+
+    while (parents[state] is not None):
+        state = parents[state][0]
+        depth += 1
+
+    return depth
@@ -0,0 +1,132 @@
+"""
+A compact graph view of a maze's open cells.
+
+Search code that only cares about positions can use a `MazeGraph` instead of
+repeatedly querying the walls and converting between actions and vectors.
+Open cells are numbered, so sets of cells (like the remaining food) can be kept as bitmasks.
+"""
+
+import collections
+
+from pacai.core.actions import Actions
+from pacai.core.directions import Directions
+
+# The most mazes that keep a cached graph (the least recently used is dropped first).
+MAX_CACHED_GRAPHS = 8
+
+# {walls: MazeGraph}, least recently used first.
+_graphCache = collections.OrderedDict()
+
+class MazeGraph:
+    """
+    The open (non-wall) cells of a maze and the moves between them.
+    Neighbors are always listed in `pacai.core.directions.Directions.CARDINAL` order,
+    the same order the position search problems generate successors in.
+    """
+
+    def __init__(self, walls):
+        self._width = walls.getWidth()
+        self._height = walls.getHeight()
+
+        self._positions = walls.asList(False)
+        self._indexes = {position: index for (index, position) in enumerate(self._positions)}
+
+        # [[(action, neighbor index), ...], ...]
+        self._neighbors = []
+        for (x, y) in self._positions:
+            neighbors = []
+            for action in Directions.CARDINAL:
+                dx, dy = Actions.directionToVector(action)
+                neighbor = self._indexes.get((int(x + dx), int(y + dy)))
+                if (neighbor is not None):
+                    neighbors.append((action, neighbor))
+
+            self._neighbors.append(neighbors)
+
+    @staticmethod
+    def get(walls):
+        """
+        Get the (cached) graph for a walls grid.
+        Only the graphs of the most recently used `MAX_CACHED_GRAPHS` mazes are kept.
+        """
+
+        graph = _graphCache.get(walls)
+        if (graph is not None):
+            _graphCache.move_to_end(walls)
+            return graph
+
+        graph = MazeGraph(walls)
+        _graphCache[walls] = graph
+
+        if (len(_graphCache) > MAX_CACHED_GRAPHS):
+            _graphCache.popitem(last = False)
+
+        return graph
+
+    def distancesFrom(self, index):
+        """
+        Get the maze distance from the given cell to every cell (indexed by cell),
+        unreachable cells get None.
+        """
+
+        distances = [None] * len(self._positions)
+        distances[index] = 0
+
+        queue = collections.deque([index])
+        while (len(queue) > 0):
+            current = queue.popleft()
+            nextDistance = distances[current] + 1
+
+            for (action, neighbor) in self._neighbors[current]:
+                if (distances[neighbor] is None):
+                    distances[neighbor] = nextDistance
+                    queue.append(neighbor)
+
+        return distances
+
+    def getIndex(self, position):
+        """
+        Get the index of an open cell, or None if the position is a wall or off the board.
+        """
+
+        return self._indexes.get(position)
+
+    def getNeighbors(self, index):
+        """
+        Get a list of (action, neighbor index) for the given cell.
+        """
+
+        return self._neighbors[index]
+
+    def getPosition(self, index):
+        return self._positions[index]
+
+    def maskFromGrid(self, grid):
+        """
+        Get a bitmask of the open cells that are True in a `pacai.core.grid.Grid`.
+        """
+
+        mask = 0
+        for (index, (x, y)) in enumerate(self._positions):
+            if (grid[x][y]):
+                mask |= (1 << index)
+
+        return mask
+
+    def maskFromPositions(self, positions):
+        """
+        Get a bitmask of the given open positions.
+        """
+
+        mask = 0
+        for position in positions:
+            mask |= (1 << self._indexes[position])
+
+        return mask
+
+    def positionsFromMask(self, mask):
+        return [position for (index, position) in enumerate(self._positions)
+                if (mask >> index) & 1]
+
+    def __len__(self):
+        return len(self._positions)
@@ -0,0 +1,190 @@
+"""
+Breadth-first searches over a `pacai.core.search.maze.MazeGraph` with many targets.
+
+Searches here track only a position and a bitmask of the remaining targets
+(no game states are ever copied),
+and visit cells in the same order as `pacai.student.search.breadthFirstSearch` would
+on a `pacai.core.search.position.PositionSearchProblem`.
+"""
+
+import collections
+import heapq
+
+def iterateTargets(graph, start, targetMask):
+    """
+    A single breadth-first search from the start cell that yields
+    (target index, actions to reach it) for every target in the mask,
+    nearest targets first.
+
+    The search is lazy: it only expands the frontier as far as it needs to in order to
+    produce the next target, and resumes from that frontier when the next target is requested.
+    """
+
+    # {index: (parent index, action)}
+    parents = {start: None}
+    queue = collections.deque([start])
+
+    while (len(queue) > 0):
+        current = queue.popleft()
+
+        if ((targetMask >> current) & 1):
+            yield (current, _buildPath(parents, current))
+
+        for (action, neighbor) in graph.getNeighbors(current):
+            if (neighbor not in parents):
+                parents[neighbor] = (current, action)
+                queue.append(neighbor)
+
+def findNearestTarget(graph, start, targetMask):
+    """
+    Get (target index, actions) for the nearest target, or (None, None) if none can be reached.
+    """
+
+    for result in iterateTargets(graph, start, targetMask):
+        return result
+
+    return (None, None)
+
+def closestTargetTour(graph, start, targetMask):
+    """
+    Repeatedly walk to the closest remaining target until none are left (or reachable).
+    The search state is just the current cell and the mask of remaining targets.
+
+    Each pick starts a new breadth-first search from the cell just reached
+    (a search from the previous cell says nothing about what is closest to the new one),
+    and that search stops at the nearest remaining target.
+    So each pick only expands the cells closer than the target it finds,
+    not the whole maze (though a pick can still expand most of the maze when targets are sparse).
+
+    Returns the list of actions for the whole tour.
+    """
+
+    actions = []
+
+    current = start
+    remaining = targetMask & ~(1 << start)
+
+    while (remaining != 0):
+        target, path = findNearestTarget(graph, current, remaining)
+        if (target is None):
+            break
+
+        actions += path
+        remaining &= ~(1 << target)
+        current = target
+
+    return actions
+
+class NearestTargetDistances:
+    """
+    The maze distance from every cell to the nearest of a set of targets (a bitmask),
+    kept up to date as the targets change.
+
+    Removing targets (like food being eaten) only recomputes the cells whose nearest target was
+    a removed one, any other change recomputes every cell with a single multi-source search.
+    """
+
+    def __init__(self, graph, targetMask = 0):
+        self._graph = graph
+        self._targetMask = None
+        self._distances = None
+
+        self.setTargets(targetMask)
+
+    def getDistance(self, index):
+        """
+        Get the distance from a cell to the nearest target, or None if no target can be reached.
+        """
+
+        return self._distances[index]
+
+    def getTargets(self):
+        return self._targetMask
+
+    def setTargets(self, targetMask):
+        if (targetMask == self._targetMask):
+            return
+
+        if (self._targetMask is None or (targetMask & ~self._targetMask) != 0):
+            self._targetMask = targetMask
+            self._computeAll()
+            return
+
+        removed = self._targetMask & ~targetMask
+        self._targetMask = targetMask
+
+        while (removed != 0):
+            target = (removed & -removed).bit_length() - 1
+            removed &= removed - 1
+            self._removeTarget(target)
+
+    def _computeAll(self):
+        distances = [None] * len(self._graph)
+        queue = collections.deque()
+
+        for index in range(len(self._graph)):
+            if ((self._targetMask >> index) & 1):
+                distances[index] = 0
+                queue.append(index)
+
+        while (len(queue) > 0):
+            current = queue.popleft()
+            nextDistance = distances[current] + 1
+
+            for (action, neighbor) in self._graph.getNeighbors(current):
+                if (distances[neighbor] is None):
+                    distances[neighbor] = nextDistance
+                    queue.append(neighbor)
+
+        self._distances = distances
+
+    def _removeTarget(self, target):
+        graph = self._graph
+        distances = self._distances
+
+        # The cells that were (possibly tied) nearest to the removed target
+        # are the ones reachable from it by always stepping one further away.
+        affected = {target}
+        queue = collections.deque([target])
+        while (len(queue) > 0):
+            current = queue.popleft()
+            for (action, neighbor) in graph.getNeighbors(current):
+                if (neighbor not in affected and distances[neighbor] == distances[current] + 1):
+                    affected.add(neighbor)
+                    queue.append(neighbor)
+
+        for index in affected:
+            distances[index] = None
+
+        # Every other cell is still right, so grow the affected cells back in from their edges.
+        frontier = []
+        for index in affected:
+            best = None
+            for (action, neighbor) in graph.getNeighbors(index):
+                if (distances[neighbor] is not None
+                        and (best is None or distances[neighbor] + 1 < best)):
+                    best = distances[neighbor] + 1
+
+            if (best is not None):
+                frontier.append((best, index))
+
+        heapq.heapify(frontier)
+        while (len(frontier) > 0):
+            distance, index = heapq.heappop(frontier)
+            if (distances[index] is not None):
+                continue
+
+            distances[index] = distance
+            for (action, neighbor) in graph.getNeighbors(index):
+                if (neighbor in affected and distances[neighbor] is None):
+                    heapq.heappush(frontier, (distance + 1, neighbor))
+
+def _buildPath(parents, index):
+    path = []
+
+    while (parents[index] is not None):
+        index, action = parents[index]
+        path.append(action)
+
+    path.reverse()
+    return path
@@ -0,0 +1,232 @@
+"""
+Pattern databases for the sliding tile puzzle (`pacai.core.search.puzzle`).
+
+A pattern database stores the exact number of moves of a subset of tiles (the pattern)
+needed to bring those tiles to their goal positions, for every placement of those tiles.
+The costs are computed once by a backward breadth-first search from the goal,
+and stored in a compact byte array indexed by the rank of the tiles' positions.
+
+Only moves of pattern tiles are counted,
+so databases built over disjoint patterns can be summed into an admissible heuristic
+(see `AdditivePatternHeuristic`).
+"""
+
+import array
+import collections
+import logging
+import os
+import pickle
+import time
+
+from pacai.core.search.puzzle import getNeighborTable
+
+UNKNOWN_COST = 255
+
+class PatternDatabase:
+    """
+    The exact costs for a single pattern (tuple of tile numbers) on a puzzle of a given size.
+    """
+
+    def __init__(self, size, tiles, costs):
+        self._size = size
+        self._tiles = tuple(tiles)
+        self._costs = costs
+
+    @staticmethod
+    def build(size, tiles):
+        """
+        Build a database for the given tiles via a 0-1 breadth-first search backwards
+        from the goal over abstract states (the pattern tiles' positions and the blank's position).
+        Moving a non-pattern tile is free, moving a pattern tile costs one.
+        """
+
+        numCells = size * size
+        tiles = tuple(tiles)
+
+        if (len(tiles) == 0 or 0 in tiles or len(set(tiles)) != len(tiles)):
+            raise ValueError('A pattern must be a non-empty set of non-blank tiles: %s.'
+                    % (str(tiles)))
+
+        if (max(tiles) >= numCells):
+            raise ValueError('Tile %d does not exist on a puzzle of size %d.'
+                    % (max(tiles), size))
+
+        neighbors = getNeighborTable(size)
+        numEntries = countEntries(numCells, len(tiles))
+
+        # The cost of each (pattern positions, blank) pair, indexed by (rank * numCells + blank).
+        abstractCosts = bytearray([UNKNOWN_COST]) * (numEntries * numCells)
+
+        # In the goal, every tile is at the cell with its own number and the blank is at 0.
+        goal = tiles
+        abstractCosts[rankPositions(goal, numCells) * numCells + 0] = 0
+
+        frontier = collections.deque([(goal, 0, 0)])
+        while (len(frontier) > 0):
+            positions, blank, cost = frontier.popleft()
+            if (abstractCosts[rankPositions(positions, numCells) * numCells + blank] < cost):
+                # We already found a cheaper way to this node.
+                continue
+
+            for cell in neighbors[blank]:
+                if (cell in positions):
+                    # Slide a pattern tile into the blank.
+                    nextPositions = tuple(blank if position == cell else position
+                            for position in positions)
+                    nextCost = cost + 1
+                else:
+                    nextPositions = positions
+                    nextCost = cost
+
+                index = rankPositions(nextPositions, numCells) * numCells + cell
+                if (abstractCosts[index] <= nextCost):
+                    continue
+
+                abstractCosts[index] = nextCost
+                if (nextCost == cost):
+                    frontier.appendleft((nextPositions, cell, nextCost))
+                else:
+                    frontier.append((nextPositions, cell, nextCost))
+
+        # The heuristic does not care where the blank is, so keep the cheapest.
+        costs = array.array('B', [UNKNOWN_COST]) * numEntries
+        for rank in range(numEntries):
+            start = rank * numCells
+            costs[rank] = min(abstractCosts[start:(start + numCells)])
+
+        return PatternDatabase(size, tiles, costs)
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as file:
+            components = pickle.load(file)
+
+        costs = array.array('B')
+        costs.frombytes(components['costs'])
+
+        return PatternDatabase(components['size'], components['tiles'], costs)
+
+    def getCost(self, tilePositions):
+        """
+        Get the cost for a list (indexed by tile number) of tile positions,
+        like the one returned by `pacai.core.search.puzzle.SlidingPuzzleState.getTilePositions`.
+        """
+
+        positions = tuple(tilePositions[tile] for tile in self._tiles)
+        return self._costs[rankPositions(positions, self._size * self._size)]
+
+    def getSize(self):
+        return self._size
+
+    def getTiles(self):
+        return self._tiles
+
+    def save(self, path):
+        """
+        Write the database to disk.
+        The file is written to a temp path first, so a partial write will never be loaded.
+        """
+
+        components = {
+            'size': self._size,
+            'tiles': self._tiles,
+            'costs': self._costs.tobytes(),
+        }
+
+        tempPath = path + '.tmp'
+        with open(tempPath, 'wb') as file:
+            pickle.dump(components, file)
+
+        os.replace(tempPath, path)
+
+    def __len__(self):
+        return len(self._costs)
+
+class AdditivePatternHeuristic:
+    """
+    A heuristic for `pacai.core.search.puzzle.SlidingPuzzleSearchProblem` that sums
+    the costs of several pattern databases over disjoint tiles.
+    Instances are called just like any other heuristic: `heuristic(state, problem)`.
+    """
+
+    def __init__(self, databases):
+        seen = set()
+        for database in databases:
+            if (not seen.isdisjoint(database.getTiles())):
+                raise ValueError('Patterns in an additive heuristic must not share tiles.')
+
+            seen.update(database.getTiles())
+
+        self._databases = list(databases)
+
+    def getDatabases(self):
+        return self._databases
+
+    def __call__(self, state, problem = None):
+        tilePositions = state.getTilePositions()
+        return sum([database.getCost(tilePositions) for database in self._databases])
+
+def countEntries(numCells, numTiles):
+    """
+    The number of ways to place numTiles distinct tiles in numCells cells.
+    """
+
+    count = 1
+    for i in range(numTiles):
+        count *= (numCells - i)
+
+    return count
+
+def defaultPartition(size, patternSize):
+    """
+    Split the tiles of a puzzle into consecutive groups of (at most) patternSize tiles.
+    """
+
+    tiles = list(range(1, size * size))
+    return [tuple(tiles[i:(i + patternSize)]) for i in range(0, len(tiles), patternSize)]
+
+def loadHeuristic(size, partition, directory = None):
+    """
+    Get an `AdditivePatternHeuristic` for the given partition (list of patterns).
+    If a directory is supplied, databases will be loaded from it when present,
+    and saved to it after being built otherwise.
+    """
+
+    databases = []
+    for tiles in partition:
+        path = None
+        if (directory is not None):
+            filename = 'pdb_%d_%s.bin' % (size, '-'.join([str(tile) for tile in tiles]))
+            path = os.path.join(directory, filename)
+
+        if (path is not None and os.path.isfile(path)):
+            database = PatternDatabase.load(path)
+            logging.debug('Loaded pattern database %s.' % (path))
+        else:
+            starttime = time.time()
+            database = PatternDatabase.build(size, tiles)
+            logging.info('Built pattern database for tiles %s (%d entries) in %.1f seconds.' %
+                    (str(tiles), len(database), time.time() - starttime))
+
+            if (path is not None):
+                os.makedirs(directory, exist_ok = True)
+                database.save(path)
+
+        databases.append(database)
+
+    return AdditivePatternHeuristic(databases)
+
+def rankPositions(positions, numCells):
+    """
+    Map a tuple of distinct cell positions to a unique index in [0, countEntries(...)).
+    """
+
+    rank = 0
+    used = 0
+
+    for (i, position) in enumerate(positions):
+        smaller = bin(used & ((1 << position) - 1)).count('1')
+        rank = rank * (numCells - i) + (position - smaller)
+        used |= (1 << position)
+
+    return rank
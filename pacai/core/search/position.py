@@ -69,6 +69,41 @@ class PositionSearchProblem(SearchProblem):
 
                 successors.append((nextState, action, cost))
 
+        self._recordExpansion(state)
+
+        return successors
+
+    def goalStates(self):
+        """
+        Returns a list of all the goal states.
+        Problems with an enumerable set of goals can provide this to be searched backwards
+        from the goal (see `pacai.core.search.bidirectional.bidirectionalSearch`).
+        """
+
+        return [self.goal]
+
+    def predecessorStates(self, state):
+        """
+        Moves on a grid are reversible, so the predecessors are just the neighbors.
+        The cost of stepping into this state is paid by every predecessor.
+        """
+
+        predecessors = []
+        cost = self.costFn(state)
+
+        for action in Directions.CARDINAL:
+            x, y = state
+            dx, dy = Actions.directionToVector(action)
+            prevx, prevy = int(x - dx), int(y - dy)
+
+            if (not self.walls[prevx][prevy]):
+                predecessors.append(((prevx, prevy), action, cost))
+
+        self._recordExpansion(state)
+
+        return predecessors
+
+    def _recordExpansion(self, state):
         # Bookkeeping for display purposes (the highlight in the GUI).
         self._numExpanded += 1
         if (state not in self._visitedLocations):
@@ -78,8 +113,6 @@ class PositionSearchProblem(SearchProblem):
             coordinates = state
             self._visitHistory.append(coordinates)
 
-        return successors
-
     def actionsCost(self, actions):
         """
         Returns the cost of a particular sequence of actions.
@@ -1,5 +1,7 @@
 import abc
 
+from pacai.core.actions import Actions
+
 class SearchProblem(abc.ABC):
     """
     This class outlines the structure of a search problem.
@@ -71,6 +73,22 @@ class SearchProblem(abc.ABC):
 
         pass
 
+    def predecessorStates(self, state):
+        """
+        Answers the question:
+        What states can reach this state in one move?
+
+        Returns a list of tuples with three values:
+        (predecessor state, action taken from the predecessor, cost of taking the action).
+
+        By default, moves are assumed to be reversible (like moving around a grid),
+        so the predecessors are the successors with their actions reversed.
+        Problems with one-way moves should override this.
+        """
+
+        return [(predecessor, Actions.reverseDirection(action), cost)
+                for (predecessor, action, cost) in self.successorStates(state)]
+
     @abc.abstractmethod
     def successorStates(self, state):
         """
@@ -0,0 +1,228 @@
+"""
+A compact representation of the sliding tile puzzle (the eight puzzle, fifteen puzzle, etc).
+
+Unlike `pacai.bin.eightpuzzle.EightPuzzleState` (which keeps a list of lists),
+a `SlidingPuzzleState` packs the whole board into a single integer,
+using `BITS_PER_CELL` bits for each cell.
+This makes successors, equality, and hashing constant time operations.
+"""
+
+from pacai.core.search.problem import SearchProblem
+
+BITS_PER_CELL = 4
+CELL_MASK = (1 << BITS_PER_CELL) - 1
+
+# Sizes above this cannot fit a tile number into BITS_PER_CELL bits.
+MAX_SIZE = 4
+
+# {size: [{move: nextBlankIndex, ...}, ...]}
+_moveTables = {}
+
+def getMoveTable(size):
+    """
+    Get a list (indexed by the blank's cell index) of dicts mapping
+    each legal move to the cell index the blank will move to.
+    Moves move the blank in the given direction.
+    """
+
+    if (size in _moveTables):
+        return _moveTables[size]
+
+    table = []
+    for index in range(size * size):
+        row, col = divmod(index, size)
+        moves = {}
+
+        if (row != 0):
+            moves['up'] = index - size
+
+        if (row != size - 1):
+            moves['down'] = index + size
+
+        if (col != 0):
+            moves['left'] = index - 1
+
+        if (col != size - 1):
+            moves['right'] = index + 1
+
+        table.append(moves)
+
+    _moveTables[size] = table
+    return table
+
+def getNeighborTable(size):
+    """
+    Get a list (indexed by cell index) of the cell indexes adjacent to each cell.
+    """
+
+    return [list(moves.values()) for moves in getMoveTable(size)]
+
+class SlidingPuzzleState:
+    """
+    A sliding tile puzzle on a `size` x `size` board.
+    Cells are indexed in row-major order, and the goal has the blank (0) in the first cell
+    followed by the tiles in increasing order.
+
+    Instances are immutable, `SlidingPuzzleState.result` returns a new state.
+    """
+
+    __slots__ = ('_size', '_packed', '_blank')
+
+    def __init__(self, numbers, size = None):
+        """
+        numbers: a list of integers from 0 to (size * size - 1), in row-major order.
+        0 represents the blank space.
+        If the size is not given, it will be inferred from the length of numbers.
+        """
+
+        if (size is None):
+            size = int(round(len(numbers) ** 0.5))
+
+        if (size < 2 or size > MAX_SIZE):
+            raise ValueError('Sliding puzzle size must be between 2 and %d, got %d.'
+                    % (MAX_SIZE, size))
+
+        if (sorted(numbers) != list(range(size * size))):
+            raise ValueError('Sliding puzzle of size %d must contain each number from 0 to %d.'
+                    % (size, size * size - 1))
+
+        packed = 0
+        for (index, number) in enumerate(numbers):
+            packed |= (number << (index * BITS_PER_CELL))
+
+        self._size = size
+        self._packed = packed
+        self._blank = numbers.index(0)
+
+    @staticmethod
+    def goal(size):
+        return SlidingPuzzleState(list(range(size * size)), size)
+
+    def getBlankIndex(self):
+        return self._blank
+
+    def getNumbers(self):
+        """
+        Get the board as a list of numbers in row-major order.
+        """
+
+        return [self.getTile(index) for index in range(self._size * self._size)]
+
+    def getPacked(self):
+        return self._packed
+
+    def getSize(self):
+        return self._size
+
+    def getTile(self, index):
+        """
+        Get the tile at the given cell index.
+        """
+
+        return (self._packed >> (index * BITS_PER_CELL)) & CELL_MASK
+
+    def getTilePositions(self):
+        """
+        Get a list (indexed by tile number) of the cell index each tile is in.
+        """
+
+        positions = [0] * (self._size * self._size)
+
+        packed = self._packed
+        for index in range(self._size * self._size):
+            positions[packed & CELL_MASK] = index
+            packed >>= BITS_PER_CELL
+
+        return positions
+
+    def isGoal(self):
+        return self._packed == _GOAL_PACKED[self._size]
+
+    def legalMoves(self):
+        return list(getMoveTable(self._size)[self._blank].keys())
+
+    def result(self, move):
+        """
+        Returns a new state with the blank moved in the given direction.
+        """
+
+        moves = getMoveTable(self._size)[self._blank]
+        if (move not in moves):
+            raise ValueError('Illegal move: ' + str(move))
+
+        target = moves[move]
+        tile = (self._packed >> (target * BITS_PER_CELL)) & CELL_MASK
+
+        # The blank is zero, so we can just move the tile's bits over.
+        packed = (self._packed
+                - (tile << (target * BITS_PER_CELL))
+                + (tile << (self._blank * BITS_PER_CELL)))
+
+        successor = SlidingPuzzleState.__new__(SlidingPuzzleState)
+        successor._size = self._size
+        successor._packed = packed
+        successor._blank = target
+
+        return successor
+
+    def __eq__(self, other):
+        if (not isinstance(other, SlidingPuzzleState)):
+            return False
+
+        return self._size == other._size and self._packed == other._packed
+
+    def __hash__(self):
+        return hash(self._packed)
+
+    def __lt__(self, other):
+        return self._packed < other._packed
+
+    def __str__(self):
+        cellWidth = len(str(self._size * self._size - 1))
+        horizontalLine = '-' * (self._size * (cellWidth + 3) + 1)
+
+        lines = [horizontalLine]
+        for row in range(self._size):
+            rowLine = '|'
+            for col in range(self._size):
+                tile = self.getTile(row * self._size + col)
+                text = ' ' if tile == 0 else str(tile)
+                rowLine += ' ' + text.rjust(cellWidth) + ' |'
+
+            lines.append(rowLine)
+            lines.append(horizontalLine)
+
+        return '\n'.join(lines)
+
+class SlidingPuzzleSearchProblem(SearchProblem):
+    """
+    A `pacai.core.search.problem.SearchProblem` over `SlidingPuzzleState`s.
+    Each move costs 1.
+    """
+
+    def __init__(self, puzzle):
+        super().__init__()
+
+        self.puzzle = puzzle
+
+    def startingState(self):
+        return self.puzzle
+
+    def isGoal(self, state):
+        return state.isGoal()
+
+    def successorStates(self, state):
+        self._numExpanded += 1
+        return [(state.result(move), move, 1) for move in state.legalMoves()]
+
+    def actionsCost(self, actions):
+        return len(actions)
+
+def _packGoal(size):
+    packed = 0
+    for index in range(size * size):
+        packed |= (index << (index * BITS_PER_CELL))
+
+    return packed
+
+_GOAL_PACKED = {size: _packGoal(size) for size in range(2, MAX_SIZE + 1)}
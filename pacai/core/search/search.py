@@ -1,4 +1,5 @@
 from pacai.core.directions import Directions
+from pacai.core.search import bidirectional
 from pacai.student import search
 
 def tinyMazeSearch(problem):
@@ -26,3 +27,6 @@ astar = search.aStarSearch
 
 uniformCostSearch = search.uniformCostSearch
 ucs = search.uniformCostSearch
+
+bidirectionalSearch = bidirectional.bidirectionalSearch
+bidir = bidirectional.bidirectionalSearch
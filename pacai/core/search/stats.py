@@ -0,0 +1,240 @@
+"""
+Instrumentation for search queries.
+
+A `SearchStats` records what a single search did (nodes generated and expanded,
+frontier and visited sizes, heuristic calls, and where the time went).
+Any `pacai.core.search.problem.SearchProblem` can be instrumented by wrapping it in an
+`InstrumentedProblem`, so the search functions themselves do not need to change.
+
+Stats can be exported as JSON (one object per query) and aggregated over a batch of queries
+with `aggregate`.
+"""
+
+import json
+import time
+import tracemalloc
+
+from pacai.core.search.problem import SearchProblem
+
+# Counters that are summed when aggregating.
+SUM_FIELDS = [
+    'nodesGenerated',
+    'nodesExpanded',
+    'heuristicCalls',
+    'heuristicTime',
+    'successorTime',
+    'totalTime',
+]
+
+# Peaks that are maxed when aggregating.
+MAX_FIELDS = [
+    'peakFrontier',
+    'peakVisited',
+    'peakMemory',
+]
+
+class SearchStats:
+    """
+    The statistics for a single search query.
+    """
+
+    def __init__(self, name = None, traceMemory = False):
+        self.name = name
+
+        self.nodesGenerated = 0
+        self.nodesExpanded = 0
+        self.peakFrontier = 0
+        self.peakVisited = 0
+
+        self.heuristicCalls = 0
+        self.heuristicTime = 0.0
+        self.successorTime = 0.0
+        self.totalTime = 0.0
+
+        self.pathLength = None
+        self.pathCost = None
+
+        # Peak bytes allocated during the search (only when tracing memory).
+        self.peakMemory = None
+
+        self._traceMemory = traceMemory
+        self._startTime = None
+
+    def start(self):
+        if (self._traceMemory):
+            tracemalloc.start()
+
+        self._startTime = time.time()
+
+    def stop(self, actions = None, cost = None):
+        self.totalTime += time.time() - self._startTime
+        self._startTime = None
+
+        if (self._traceMemory):
+            self.peakMemory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        if (actions is not None):
+            self.pathLength = len(actions)
+
+        self.pathCost = cost
+
+    def toDict(self):
+        return {
+            'name': self.name,
+            'nodesGenerated': self.nodesGenerated,
+            'nodesExpanded': self.nodesExpanded,
+            'peakFrontier': self.peakFrontier,
+            'peakVisited': self.peakVisited,
+            'heuristicCalls': self.heuristicCalls,
+            'heuristicTime': self.heuristicTime,
+            'successorTime': self.successorTime,
+            'totalTime': self.totalTime,
+            'pathLength': self.pathLength,
+            'pathCost': self.pathCost,
+            'peakMemory': self.peakMemory,
+        }
+
+    def toJSON(self):
+        return json.dumps(self.toDict())
+
+    def write(self, path):
+        """
+        Append these stats as a single line of JSON to the given file.
+        """
+
+        with open(path, 'a') as file:
+            file.write(self.toJSON() + '\n')
+
+    def __str__(self):
+        return ('Generated: %d, Expanded: %d, Peak Frontier: %d, Peak Visited: %d, '
+                + 'Heuristic Calls: %d, Heuristic Time: %.3f, Successor Time: %.3f, '
+                + 'Total Time: %.3f') % (self.nodesGenerated, self.nodesExpanded,
+                self.peakFrontier, self.peakVisited, self.heuristicCalls, self.heuristicTime,
+                self.successorTime, self.totalTime)
+
+class InstrumentedProblem(SearchProblem):
+    """
+    A wrapper around a search problem that records stats as the problem is used.
+    Any attribute not defined here is passed through to the wrapped problem,
+    so heuristics can keep using things like `problem.walls`.
+
+    Since the search's own containers are not visible from here,
+    the visited set is taken to be all the distinct states that have been generated,
+    and the frontier to be the distinct states that have been generated but not expanded.
+    """
+
+    def __init__(self, problem, stats):
+        super().__init__()
+
+        self._problem = problem
+        self._stats = stats
+
+        self._seen = set()
+        self._expanded = set()
+
+    def actionsCost(self, actions):
+        return self._problem.actionsCost(actions)
+
+    def getExpandedCount(self):
+        return self._problem.getExpandedCount()
+
+    def getProblem(self):
+        return self._problem
+
+    def getStats(self):
+        return self._stats
+
+    def getVisitHistory(self):
+        return self._problem.getVisitHistory()
+
+    def instrumentHeuristic(self, heuristic):
+        """
+        Get a version of the heuristic that records its calls and time.
+        """
+
+        stats = self._stats
+
+        def instrumented(state, problem = None):
+            starttime = time.time()
+            value = heuristic(state, problem)
+            stats.heuristicTime += time.time() - starttime
+            stats.heuristicCalls += 1
+
+            return value
+
+        return instrumented
+
+    def isGoal(self, state):
+        return self._problem.isGoal(state)
+
+    def startingState(self):
+        state = self._problem.startingState()
+        self._see(state)
+
+        return state
+
+    def successorStates(self, state):
+        starttime = time.time()
+        successors = self._problem.successorStates(state)
+        self._stats.successorTime += time.time() - starttime
+
+        self._stats.nodesExpanded += 1
+        self._stats.nodesGenerated += len(successors)
+
+        self._expanded.add(state)
+        for successor in successors:
+            self._see(successor[0])
+
+        return successors
+
+    def _see(self, state):
+        self._seen.add(state)
+
+        self._stats.peakVisited = max(self._stats.peakVisited, len(self._seen))
+        self._stats.peakFrontier = max(self._stats.peakFrontier,
+                len(self._seen) - len(self._expanded))
+
+    def __getattr__(self, name):
+        # Only called for attributes that were not found normally.
+        if (name.startswith('__') or name == '_problem'):
+            raise AttributeError(name)
+
+        return getattr(self._problem, name)
+
+def aggregate(statsList):
+    """
+    Combine many stats (`SearchStats` or their dicts) into a single dict.
+    Counters are summed, peaks are maxed, and per-query means are included.
+    """
+
+    dicts = [stats.toDict() if isinstance(stats, SearchStats) else stats for stats in statsList]
+
+    result = {'queries': len(dicts)}
+
+    for field in SUM_FIELDS:
+        result[field] = sum([stats[field] for stats in dicts])
+
+        if (len(dicts) > 0):
+            result['mean_' + field] = result[field] / len(dicts)
+
+    for field in MAX_FIELDS:
+        values = [stats[field] for stats in dicts if stats.get(field) is not None]
+        result[field] = max(values) if len(values) > 0 else None
+
+    return result
+
+def load(path):
+    """
+    Load all the stats (as dicts) written to the given file with `SearchStats.write`.
+    """
+
+    statsList = []
+
+    with open(path, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if (line != ''):
+                statsList.append(json.loads(line))
+
+    return statsList
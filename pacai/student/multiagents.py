@@ -2,10 +2,12 @@ import random
 import math
 
 from pacai.agents.base import BaseAgent
+from pacai.agents.search.multiagent import ALPHA_BETA
+from pacai.agents.search.multiagent import EXPECTIMAX
+from pacai.agents.search.multiagent import MINIMAX
 from pacai.agents.search.multiagent import MultiAgentSearchAgent
 
 from pacai.core.distance import manhattan
-from pacai.core.actions import Directions
 
 class ReflexAgent(BaseAgent):
     """
@@ -108,46 +110,7 @@ class MinimaxAgent(MultiAgentSearchAgent):
         super().__init__(index, **kwargs)
 
     def getAction(self, state):
-        
-        def maxValue(state, depth):
-            if depth == self._treeDepth or not state.getLegalActions(0):
-                return self.getEvaluationFunction()(state)
-            max = -math.inf
-            for action in state.getLegalActions(0):
-                if action == Directions.STOP:
-                    continue
-                val = minValue(state.generateSuccessor(0, action), 1, depth)
-                if val > max:
-                    max = val
-            return max
-        
-        def minValue(state, ghostNumber, depth):
-            if depth == self._treeDepth or not state.getLegalActions(ghostNumber):
-                return self.getEvaluationFunction()(state)
-            min = math.inf
-            for action in state.getLegalActions(ghostNumber):
-                totalGhosts = state.getNumAgents() - 1
-                if ghostNumber == totalGhosts:
-                    val = maxValue(
-                        state.generateSuccessor(ghostNumber, action), depth + 1)
-                else:
-                    val = minValue(
-                        state.generateSuccessor(ghostNumber, action), ghostNumber + 1, depth)
-                if val < min:
-                    min = val
-            return min
-            
-        max = -math.inf
-        maxAct = None
-        for action in state.getLegalActions(0):
-            if action == Directions.STOP:
-                continue
-            val = minValue(state.generateSuccessor(0, action), 1, 0)
-            if val > max:
-                max = val
-                maxAct = action
-
-        return maxAct
+        return self.searchAction(state, MINIMAX)
 
     def getTreeDepth(self):
         return super().getTreeDepth()
@@ -168,49 +131,7 @@ class AlphaBetaAgent(MultiAgentSearchAgent):
     """
 
     def getAction(self, state):
-        def maxValue(state, depth, alpha, beta):
-            if depth == self._treeDepth or not state.getLegalActions(0):
-                return self.getEvaluationFunction()(state)
-            v = -math.inf
-            for action in state.getLegalActions(0):
-                if action == Directions.STOP:
-                    continue
-                v = max(v, minValue(
-                        state.generateSuccessor(0, action), 1, depth, alpha, beta))
-                if v >= beta:
-                    return v
-                alpha = max(alpha, v)
-            return v
-        
-        def minValue(state, ghostNumber, depth, alpha, beta):
-            if depth == self._treeDepth or not state.getLegalActions(ghostNumber):
-                return self.getEvaluationFunction()(state)
-            v = math.inf
-            for action in state.getLegalActions(ghostNumber):
-                totalGhosts = state.getNumAgents() - 1
-                if ghostNumber == totalGhosts:
-                    v = min(v, maxValue(
-                        state.generateSuccessor(
-                            ghostNumber, action), depth + 1, alpha, beta))
-                else:
-                    v = min(v, minValue(
-                        state.generateSuccessor(
-                            ghostNumber, action), ghostNumber + 1, depth, alpha, beta))
-                if v <= alpha:
-                    return v
-                beta = min(beta, v)
-            return v
-            
-        maxVal = -math.inf
-        maxAct = None
-        for action in state.getLegalActions(0):
-            if action == Directions.STOP:
-                continue
-            v = maxValue(state.generateSuccessor(0, action), 0, -math.inf, math.inf)
-            if v > maxVal:
-                maxVal = v
-                maxAct = action
-        return maxAct
+        return self.searchAction(state, ALPHA_BETA)
 
     def __init__(self, index, **kwargs):
         super().__init__(index, **kwargs)
@@ -239,45 +160,7 @@ class ExpectimaxAgent(MultiAgentSearchAgent):
         super().__init__(index, **kwargs)
 
     def getAction(self, state):
-        def maxValue(state, depth):
-            if depth == self._treeDepth or not state.getLegalActions(0):
-                return self.getEvaluationFunction()(state)
-            v = -math.inf
-            for action in state.getLegalActions(0):
-                if action == Directions.STOP:
-                    continue
-                v = max(v, expValue(
-                        state.generateSuccessor(0, action), 1, depth))
-            return v
-        
-        def expValue(state, ghostNumber, depth):
-            legalActions = state.getLegalActions(ghostNumber)
-            if depth == self._treeDepth or not legalActions:
-                return self.getEvaluationFunction()(state)
-            expVal = 0
-            for action in legalActions:
-                totalGhosts = state.getNumAgents() - 1
-                if ghostNumber == totalGhosts:
-                    v = maxValue(
-                        state.generateSuccessor(
-                            ghostNumber, action), depth + 1)
-                else:
-                    v = expValue(
-                        state.generateSuccessor(
-                            ghostNumber, action), ghostNumber + 1, depth)
-                expVal += v / float(len(legalActions))
-            return expVal
-            
-        maxVal = -math.inf
-        maxAct = None
-        for action in state.getLegalActions(0):
-            if action == Directions.STOP:
-                continue
-            v = maxValue(state.generateSuccessor(0, action), 0)
-            if v > maxVal:
-                maxVal = v
-                maxAct = action
-        return maxAct
+        return self.searchAction(state, EXPECTIMAX)
 
     def getTreeDepth(self):
         return super().getTreeDepth()
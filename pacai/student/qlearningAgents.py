@@ -1,8 +1,15 @@
 from pacai.agents.learning.reinforcement import ReinforcementAgent
+from pacai.core import qtable
+from pacai.core.featureExtractors import FeatureInterner
 from pacai.util import reflection
 from pacai.util import probability
+import array
+import collections
 import math
 
+# The number of states that ApproximateQAgent keeps features for.
+FEATURE_CACHE_SIZE = 2
+
 class QLearningAgent(ReinforcementAgent):
     """
     A Q-Learning agent.
@@ -48,13 +55,29 @@ class QLearningAgent(ReinforcementAgent):
     will act randomly, else it will act according to current policy.
 
     update incorporates a new sample estimate into the old estimate of a Q-value.
+
+    Q-values are stored in a `pacai.core.qtable.QTable`.
+    qTable may be a table or the name of a sparse table (see `pacai.core.qtable.getQTable`),
+    e.g. 'zobrist' to key Pacman states by a fingerprint instead of keeping every state.
     """
 
-    def __init__(self, index, **kwargs):
+    def __init__(self, index, qTable = 'dict', **kwargs):
         super().__init__(index, **kwargs)
 
-        # You can initialize Q-values here.
-        self.qValues = {}
+        if (isinstance(qTable, str)):
+            qTable = qtable.getQTable(qTable)
+
+        self.qValues = qTable
+
+    def getLearningState(self):
+        state = super().getLearningState()
+        state['qValues'] = self.qValues
+
+        return state
+
+    def setLearningState(self, state):
+        super().setLearningState(state)
+        self.qValues = state['qValues']
 
     def getQValue(self, state, action):
         """
@@ -62,9 +85,7 @@ class QLearningAgent(ReinforcementAgent):
         and `pacai.core.directions.Directions`.
         Should return 0.0 if the (state, action) pair has never been seen.
         """
-        if (state, action) in self.qValues:
-            return self.qValues[(state, action)]
-        return 0.0
+        return self.qValues.getQValue(state, action)
 
     def getValue(self, state):
         """
@@ -82,12 +103,7 @@ class QLearningAgent(ReinforcementAgent):
         legalActs = self.getLegalActions(state)
         if not legalActs:
             return 0.0
-        max = -math.inf
-        for act in legalActs:
-            val = self.getQValue(state, act)
-            if val > max:
-                max = val
-        return max
+        return max(self.qValues.getQValues(state, legalActs))
 
     def getPolicy(self, state):
         """
@@ -107,8 +123,7 @@ class QLearningAgent(ReinforcementAgent):
             return None
         max = -math.inf
         maxAct = None
-        for act in legalActs:
-            val = self.getQValue(state, act)
+        for act, val in zip(legalActs, self.qValues.getQValues(state, legalActs)):
             if val > max:
                 max = val
                 maxAct = act
@@ -127,7 +142,18 @@ class QLearningAgent(ReinforcementAgent):
     def update(self, state, action, nextState, reward):
         sample = reward + self.discountRate * self.getValue(nextState)
         newQVal = (1 - self.alpha) * self.getQValue(state, action) + self.alpha * sample
-        self.qValues[(state, action)] = newQVal
+        self.qValues.setQValue(state, action, newQVal)
+
+    def updateBatch(self, transitions, weights):
+        errors = []
+
+        for ((state, action, nextState, reward), weight) in zip(transitions, weights):
+            qValue = self.getQValue(state, action)
+            error = reward + self.discountRate * self.getValue(nextState) - qValue
+            self.qValues.setQValue(state, action, qValue + self.alpha * weight * error)
+            errors.append(error)
+
+        return errors
 
 class PacmanQAgent(QLearningAgent):
     """
@@ -176,10 +202,22 @@ class ApproximateQAgent(PacmanQAgent):
     def __init__(self, index,
             extractor = 'pacai.core.featureExtractors.IdentityExtractor', **kwargs):
         super().__init__(index, **kwargs)
-        self.featExtractor = reflection.qualifiedImport(extractor)
+        self.featExtractor = reflection.qualifiedImport(extractor)()
 
-        # You might want to initialize weights here.
-        self.weights = {}
+        # Features are stored sparsely, indexed by the interner.
+        # The weights are an array with the same indexes.
+        self.interner = FeatureInterner()
+        self.weights = array.array('d')
+
+        # When this is a list, transitions are recorded in it (as features) instead of learned from.
+        # Used by parallel training actors (see `pacai.agents.learning.parallel`).
+        self.transitionSink = None
+
+        # The features of every legal action in the most recent states,
+        # {state: {action: SparseFeatures}}.
+        # A step looks at the features of the current state and then the next state
+        # (which becomes the current state on the next step), so each is only extracted once.
+        self._stateFeatures = collections.OrderedDict()
 
     def final(self, state):
         """
@@ -189,27 +227,197 @@ class ApproximateQAgent(PacmanQAgent):
         # Call the super-class final method.
         super().final(state)
 
+        # The last state of a game is never seen again.
+        self._stateFeatures.clear()
+
         # Did we finish training?
         if self.episodesSoFar == self.numTraining:
             # You might want to print your weights here for debugging.
             # *** Your Code Here ***
-            print(self.weights)
-        
+            print(self.getWeights())
+
+    def getFeatures(self, state):
+        """
+        Get the features of every legal action in a state, as {action: SparseFeatures}.
+        """
+
+        features = self._stateFeatures.get(state)
+        if (features is not None):
+            self._stateFeatures.move_to_end(state)
+            return features
+
+        features = self._extractFeatures(state)
+
+        self._stateFeatures[state] = features
+        if (len(self._stateFeatures) > FEATURE_CACHE_SIZE):
+            self._stateFeatures.popitem(last = False)
+
+        return features
+
+    def getFeatureIndex(self, feature):
+        """
+        Get the index of a feature in the weights (adding it with a weight of zero if it is new).
+        """
+
+        index = self.interner.getIndex(feature)
+        self._growWeights()
+
+        return index
+
+    def getLearningState(self):
+        state = super().getLearningState()
+
+        # The weights (and the features they go with) replace the Q-values.
+        del state['qValues']
+        state['features'] = list(self.interner.getFeatures())
+        state['weights'] = self.weights.tobytes()
+
+        return state
+
+    def setLearningState(self, state):
+        # Keep this agent's (unused) Q-values.
+        super().setLearningState(dict(state, qValues = self.qValues))
+
+        self.interner = FeatureInterner()
+        for feature in state['features']:
+            self.interner.getIndex(feature)
+
+        self.weights = array.array('d')
+        self.weights.frombytes(state['weights'])
+
+        # Cached features use the old feature indexes.
+        self._stateFeatures.clear()
+
+    def getPolicy(self, state):
+        qValues = self.getQValues(state)
+        if (len(qValues) == 0):
+            return None
+
+        # Ties go to the first action.
+        return max(qValues, key = qValues.get)
+
     def getQValue(self, state, action):
-        features = self.featExtractor.getFeatures(self.featExtractor, state, action)
-        qVal = 0.0
-        for feature, count in features.items():
-            if feature not in self.weights:
-                continue
-            qVal += self.weights[feature] * count
-        return qVal
-    
+        features = self.getFeatures(state).get(action)
+        if (features is None):
+            features = self.featExtractor.getSparseFeatures(state, action, self.interner)
+            self._growWeights()
+
+        return features.dot(self.weights)
+
+    def getQValues(self, state):
+        """
+        Get the Q-value of every legal action in a state, as {action: Q-value}.
+        """
+
+        return {action: features.dot(self.weights)
+                for (action, features) in self.getFeatures(state).items()}
+
+    def getValue(self, state):
+        qValues = self.getQValues(state)
+        if (len(qValues) == 0):
+            return 0.0
+
+        return max(qValues.values())
+
+    def getWeights(self):
+        """
+        Get the weights as {feature: weight}.
+        """
+
+        return {self.interner.getFeature(index): weight
+                for (index, weight) in enumerate(self.weights)}
+
+    def setWeights(self, weights):
+        """
+        Set the weights from {feature: weight}.
+        Features that are not given have a weight of zero.
+        """
+
+        for feature in weights:
+            self.getFeatureIndex(feature)
+
+        for (index, feature) in enumerate(self.interner.getFeatures()):
+            self.weights[index] = weights.get(feature, 0.0)
+
     def update(self, state, action, nextState, reward):
-        features = self.featExtractor.getFeatures(self.featExtractor, state, action)
-        sample = reward + self.discountRate * self.getValue(nextState)
-        error = sample - self.getQValue(state, action)
-        for feature, count in features.items():
-            if feature not in self.weights:
-                self.weights[feature] = self.alpha * error * count
-            else:
-                self.weights[feature] += self.alpha * error * count
\ No newline at end of file
+        features = self.getFeatures(state).get(action)
+        if (features is None):
+            features = self.featExtractor.getSparseFeatures(state, action, self.interner)
+            self._growWeights()
+
+        nextFeatures = list(self.getFeatures(nextState).values())
+
+        if (self.transitionSink is not None):
+            self.transitionSink.append((features, reward, nextFeatures))
+            return
+
+        self.updateFeatures(features, reward, nextFeatures)
+
+    def updateFeatures(self, features, reward, nextFeatures):
+        """
+        Update the weights for a transition that has already had its features extracted:
+        the features of the action taken and of each legal action in the next state.
+        Returns the TD error.
+        """
+
+        nextValue = 0.0
+        if (len(nextFeatures) > 0):
+            nextValue = max([nextFeature.dot(self.weights) for nextFeature in nextFeatures])
+
+        error = reward + self.discountRate * nextValue - features.dot(self.weights)
+        features.addTo(self.weights, self.alpha * error)
+
+        return error
+
+    def updateBatch(self, transitions, weights):
+        """
+        Every error in the batch is computed with the same weights,
+        then all the weight changes are applied together.
+        Replayed states are not kept in the feature cache (they will rarely be seen again soon).
+        """
+
+        errors = []
+        changes = []
+
+        for ((state, action, nextState, reward), weight) in zip(transitions, weights):
+            features = self.featExtractor.getSparseFeatures(state, action, self.interner)
+            self._growWeights()
+
+            nextValue = 0.0
+            nextFeatures = self._stateFeatures.get(nextState)
+            if (nextFeatures is None):
+                nextFeatures = self._extractFeatures(nextState)
+
+            if (len(nextFeatures) > 0):
+                nextValue = max([nextFeature.dot(self.weights)
+                        for nextFeature in nextFeatures.values()])
+
+            error = reward + self.discountRate * nextValue - features.dot(self.weights)
+            errors.append(error)
+            changes.append((features, self.alpha * weight * error / len(transitions)))
+
+        for (features, change) in changes:
+            features.addTo(self.weights, change)
+
+        return errors
+
+    def _extractFeatures(self, state):
+        """
+        Extract the features of every legal action in a state, as {action: SparseFeatures}.
+        """
+
+        features = {}
+        for action in self.getLegalActions(state):
+            features[action] = self.featExtractor.getSparseFeatures(state, action, self.interner)
+
+        self._growWeights()
+
+        return features
+
+    def _growWeights(self):
+        """
+        New features start with a weight of zero.
+        """
+
+        if (len(self.weights) < len(self.interner)):
+            self.weights.extend([0.0] * (len(self.interner) - len(self.weights)))
@@ -8,6 +8,8 @@ Good luck and happy searching!
 import logging
 
 from pacai.core.actions import Actions
+from pacai.core.search import multigoal
+from pacai.core.search.maze import MazeGraph
 from pacai.core.search.position import PositionSearchProblem
 from pacai.core.search.problem import SearchProblem
 from pacai.agents.base import BaseAgent
@@ -205,22 +207,13 @@ class ClosestDotSearchAgent(SearchAgent):
         super().__init__(index, **kwargs)
 
     def registerInitialState(self, state):
-        self._actions = []
-        self._actionIndex = 0
-
-        currentState = state
-
-        while (currentState.getFood().count() > 0):
-            nextPathSegment = self.findPathToClosestDot(currentState)  # The missing piece
-            self._actions += nextPathSegment
+        # Plan the whole tour over (position, food bitmask) instead of simulating game states.
+        graph = MazeGraph.get(state.getWalls())
+        start = graph.getIndex(state.getPacmanPosition())
+        food = graph.maskFromGrid(state.getFood())
 
-            for action in nextPathSegment:
-                legal = currentState.getLegalActions()
-                if action not in legal:
-                    raise Exception('findPathToClosestDot returned an illegal move: %s!\n%s' %
-                            (str(action), str(currentState)))
-
-                currentState = currentState.generateSuccessor(0, action)
+        self._actions = multigoal.closestTargetTour(graph, start, food)
+        self._actionIndex = 0
 
         logging.info('Path found with cost %d.' % len(self._actions))
 
@@ -1,5 +1,5 @@
 from pacai.agents.learning.value import ValueEstimationAgent
-import math
+from pacai.core import mdpsolver
 
 class ValueIterationAgent(ValueEstimationAgent):
     """
@@ -31,31 +31,36 @@ class ValueIterationAgent(ValueEstimationAgent):
     you should return None.
     """
 
-    def __init__(self, index, mdp, discountRate = 0.9, iters = 100, **kwargs):
+    def __init__(self, index, mdp, discountRate = 0.9, iters = 100, tolerance = 0.0,
+            solver = 'value', **kwargs):
         super().__init__(index, **kwargs)
 
         self.mdp = mdp
         self.discountRate = discountRate
         self.iters = iters
-        self.values = {}  # A dictionary which holds the q-values for each state.
-
-        # Compute the values here.
-        states = mdp.getStates()
-        for i in range(iters):
-            newValues = {}
-            for state in states:
-                action = self.getAction(state)
-                if not action:
-                    continue
-                newValues[state] = self.getQValue(state, action)
-            self.values = newValues
+
+        if (solver not in mdpsolver.SOLVERS):
+            raise ValueError('Unknown MDP solver: %s.' % (solver))
+
+        # The MDP's transitions are only asked for once, then every sweep works off of arrays.
+        # See `pacai.core.mdpsolver`.
+        self.compiled = mdpsolver.CompiledMDP(mdp)
+
+        # Compute the values here (a list indexed by the compiled state ids).
+        # Iteration stops early if no value changes by more than the tolerance.
+        self.values, self.sweeps = mdpsolver.SOLVERS[solver](self.compiled, discountRate, iters,
+                tolerance = float(tolerance))
 
     def getValue(self, state):
         """
         Return the value of the state (computed in __init__).
         """
 
-        return self.values.get(state, 0.0)
+        index = self.compiled.getIndex(state)
+        if (index is None):
+            return 0.0
+
+        return self.values[index]
 
     def getAction(self, state):
         """
@@ -65,20 +70,33 @@ class ValueIterationAgent(ValueEstimationAgent):
         return self.getPolicy(state)
 
     def getQValue(self, state, action):
-        qVal = 0
-        transitionStatesAndProbs = self.mdp.getTransitionStatesAndProbs(state, action)
-        for nextState, prob in transitionStatesAndProbs:
-            qVal += prob * (self.mdp.getReward(state, action, nextState)
-                            + self.discountRate * self.getValue(nextState))
-        return qVal
-    
+        index = self.compiled.getIndex(state)
+        if (index is None):
+            # Not a state of the MDP (e.g. a wall), ask the MDP directly.
+            qValue = 0.0
+            for (nextState, prob) in self.mdp.getTransitionStatesAndProbs(state, action):
+                qValue += prob * (self.mdp.getReward(state, action, nextState)
+                        + self.discountRate * self.getValue(nextState))
+
+            return qValue
+
+        for pair in self.compiled.getPairs(index):
+            if (self.compiled.getAction(pair) == action):
+                return self.compiled.getQValue(self.values, pair, self.discountRate)
+
+        return 0.0
+
     def getPolicy(self, state):
-        possibleActions = self.mdp.getPossibleActions(state)
-        maxVal = -math.inf
-        maxAct = None
-        for action in possibleActions:
-            val = self.getQValue(state, action)
-            if val > maxVal:
-                maxVal = val
-                maxAct = action
-        return maxAct
\ No newline at end of file
+        index = self.compiled.getIndex(state)
+        if (index is None):
+            actions = self.mdp.getPossibleActions(state)
+            if (len(actions) == 0):
+                return None
+
+            return max(actions, key = lambda action: self.getQValue(state, action))
+
+        pair = self.compiled.getPolicy(self.values, index, self.discountRate)
+        if (pair is None):
+            return None
+
+        return self.compiled.getAction(pair)
@@ -1,267 +1,15 @@
-import math
 import time
 import threading
 import tkinter
 import traceback
 
-from pacai.student.qlearningAgents import QLearningAgent
-from pacai.core.environment import Environment
+from pacai.core import crawler
 
-class CrawlingRobotEnvironment(Environment):
+class CrawlingRobot(crawler.CrawlingRobot):
     """
-    A GUI display for crawler.
+    A crawling robot (`pacai.core.crawler.CrawlingRobot`) drawn on a canvas.
     """
 
-    def __init__(self, crawlingRobot):
-        self.crawlingRobot = crawlingRobot
-
-        # The state is of the form (armAngle, handAngle)
-        # where the angles are bucket numbers, not actual
-        # degree measurements
-        self.state = None
-
-        self.nArmStates = 9
-        self.nHandStates = 13
-
-        # create a list of arm buckets and hand buckets to
-        # discretize the state space
-        minArmAngle, maxArmAngle = self.crawlingRobot.getMinAndMaxArmAngles()
-        minHandAngle, maxHandAngle = self.crawlingRobot.getMinAndMaxHandAngles()
-        armIncrement = (maxArmAngle - minArmAngle) / (self.nArmStates - 1)
-        handIncrement = (maxHandAngle - minHandAngle) / (self.nHandStates - 1)
-        self.armBuckets = [minArmAngle + (armIncrement * i) for i in range(self.nArmStates)]
-        self.handBuckets = [minHandAngle + (handIncrement * i) for i in range(self.nHandStates)]
-
-        # Reset
-        self.reset()
-
-    def getCurrentState(self):
-        """
-        Return the current state of the crawling robot.
-        """
-
-        return self.state
-
-    def getPossibleActions(self, state):
-        """
-        Returns possible actions for the states in the current state.
-        """
-
-        actions = list()
-        currArmBucket, currHandBucket = state
-
-        if currArmBucket > 0:
-            actions.append('arm-down')
-
-        if currArmBucket < self.nArmStates - 1:
-            actions.append('arm-up')
-
-        if currHandBucket > 0:
-            actions.append('hand-down')
-
-        if currHandBucket < self.nHandStates - 1:
-            actions.append('hand-up')
-
-        return actions
-
-    def doAction(self, action):
-        """
-        Perform the action and update
-        the current state of the Environment
-        and return the reward for the
-        current state, the next state
-        and the taken action.
-
-        Returns:
-            nextState, reward
-        """
-
-        nextState, reward = None, None
-
-        oldX, oldY = self.crawlingRobot.getRobotPosition()
-
-        armBucket, handBucket = self.state
-        armAngle, handAngle = self.crawlingRobot.getAngles()
-
-        if action == 'arm-up':
-            newArmAngle = self.armBuckets[armBucket + 1]
-            self.crawlingRobot.moveArm(newArmAngle)
-
-            nextState = (armBucket + 1, handBucket)
-        if action == 'arm-down':
-            newArmAngle = self.armBuckets[armBucket - 1]
-            self.crawlingRobot.moveArm(newArmAngle)
-            nextState = (armBucket - 1, handBucket)
-
-        if action == 'hand-up':
-            newHandAngle = self.handBuckets[handBucket + 1]
-            self.crawlingRobot.moveHand(newHandAngle)
-            nextState = (armBucket, handBucket + 1)
-
-        if action == 'hand-down':
-            newHandAngle = self.handBuckets[handBucket - 1]
-            self.crawlingRobot.moveHand(newHandAngle)
-            nextState = (armBucket, handBucket - 1)
-
-        newX, newY = self.crawlingRobot.getRobotPosition()
-
-        # a simple reward function
-        reward = newX - oldX
-
-        self.state = nextState
-        return nextState, reward
-
-    def reset(self):
-        """
-        Resets the Environment to the initial state
-        """
-
-        # Initialize the state to be the middle
-        # value for each parameter e.g. if there are 13 and 19
-        # buckets for the arm and hand parameters, then the intial
-        # state should be (6, 9)
-
-        # Also call self.crawlingRobot.setAngles()
-        # to the initial arm and hand angle
-
-        armState = int(self.nArmStates / 2)
-        handState = int(self.nHandStates / 2)
-
-        self.state = armState, handState
-        self.crawlingRobot.setAngles(self.armBuckets[armState], self.handBuckets[handState])
-        self.crawlingRobot.positions = [20, self.crawlingRobot.getRobotPosition()[0]]
-
-class CrawlingRobot(object):
-    def setAngles(self, armAngle, handAngle):
-        """
-        set the robot's arm and hand angles
-        to the passed in values
-        """
-
-        self.armAngle = armAngle
-        self.handAngle = handAngle
-
-    def getAngles(self):
-        """
-        returns the pair of (armAngle, handAngle)
-        """
-
-        return self.armAngle, self.handAngle
-
-    def getRobotPosition(self):
-        """
-        returns the (x, y) coordinates
-        of the lower-left point of the robot
-        """
-
-        return self.robotPos
-
-    def moveArm(self, newArmAngle):
-        """
-        move the robot arm to 'newArmAngle'
-        """
-
-        if newArmAngle > self.maxArmAngle:
-            raise Exception('Crawling Robot: Arm Raised too high. Careful!')
-
-        if newArmAngle < self.minArmAngle:
-            raise Exception('Crawling Robot: Arm Raised too low. Careful!')
-
-        disp = self.displacement(self.armAngle, self.handAngle, newArmAngle, self.handAngle)
-        curXPos = self.robotPos[0]
-        self.robotPos = (curXPos + disp, self.robotPos[1])
-        self.armAngle = newArmAngle
-
-        # Position and Velocity Sign Post
-        self.positions.append(self.getRobotPosition()[0])
-
-        if len(self.positions) > 100:
-            self.positions.pop(0)
-            # self.angleSums.pop(0)
-
-    def moveHand(self, newHandAngle):
-        """
-        move the robot hand to 'newArmAngle'
-        """
-
-        if newHandAngle > self.maxHandAngle:
-            raise Exception('Crawling Robot: Hand Raised too high. Careful!')
-
-        if newHandAngle < self.minHandAngle:
-            raise Exception('Crawling Robot: Hand Raised too low. Careful!')
-
-        disp = self.displacement(self.armAngle, self.handAngle, self.armAngle, newHandAngle)
-        curXPos = self.robotPos[0]
-        self.robotPos = (curXPos + disp, self.robotPos[1])
-        self.handAngle = newHandAngle
-
-        # Position and Velocity Sign Post
-        self.positions.append(self.getRobotPosition()[0])
-
-        if len(self.positions) > 100:
-            self.positions.pop(0)
-            # self.angleSums.pop(0)
-
-    def getMinAndMaxArmAngles(self):
-        """
-        get the lower- and upper- bound
-        for the arm angles returns (min, max) pair
-        """
-
-        return self.minArmAngle, self.maxArmAngle
-
-    def getMinAndMaxHandAngles(self):
-        """
-        get the lower- and upper- bound
-        for the hand angles returns (min, max) pair
-        """
-
-        return self.minHandAngle, self.maxHandAngle
-
-    def getRotationAngle(self):
-        """
-        get the current angle the
-        robot body is rotated off the ground
-        """
-
-        armCos, armSin = self.__getCosAndSin(self.armAngle)
-        handCos, handSin = self.__getCosAndSin(self.handAngle)
-
-        x = self.armLength * armCos + self.handLength * handCos + self.robotWidth
-        y = self.armLength * armSin + self.handLength * handSin + self.robotHeight
-
-        if y < 0:
-            return math.atan(-y / x)
-        return 0.0
-
-    # You shouldn't need methods below here
-
-    def __getCosAndSin(self, angle):
-        return math.cos(angle), math.sin(angle)
-
-    def displacement(self, oldArmDegree, oldHandDegree, armDegree, handDegree):
-        oldArmCos, oldArmSin = self.__getCosAndSin(oldArmDegree)
-        armCos, armSin = self.__getCosAndSin(armDegree)
-        oldHandCos, oldHandSin = self.__getCosAndSin(oldHandDegree)
-        handCos, handSin = self.__getCosAndSin(handDegree)
-
-        xOld = self.armLength * oldArmCos + self.handLength * oldHandCos + self.robotWidth
-        yOld = self.armLength * oldArmSin + self.handLength * oldHandSin + self.robotHeight
-
-        x = self.armLength * armCos + self.handLength * handCos + self.robotWidth
-        y = self.armLength * armSin + self.handLength * handSin + self.robotHeight
-
-        if y < 0:
-            if yOld <= 0:
-                return math.sqrt(xOld * xOld + yOld * yOld) - math.sqrt(x * x + y * y)
-            return (xOld - yOld * (x - xOld) / (y - yOld)) - math.sqrt(x * x + y * y)
-        else:
-            if yOld >= 0:
-                return 0.0
-            return -(x - y * (xOld - x) / (yOld - y)) + math.sqrt(xOld * xOld + yOld * yOld)
-
-        raise Exception('Never Should See This!')
-
     def draw(self, stepCount, stepDelay):
         x1, y1 = self.getRobotPosition()
         x1 = x1 % self.totWidth
@@ -271,7 +19,7 @@ class CrawlingRobot(object):
             raise Exception('Flying Robot!!')
 
         rotationAngle = self.getRotationAngle()
-        cosRot, sinRot = self.__getCosAndSin(rotationAngle)
+        cosRot, sinRot = self._getCosAndSin(rotationAngle)
 
         x2 = x1 + self.robotWidth * cosRot
         y2 = y1 - self.robotWidth * sinRot
@@ -284,13 +32,13 @@ class CrawlingRobot(object):
 
         self.canvas.coords(self.robotBody, x1, y1, x2, y2, x4, y4, x3, y3)
 
-        armCos, armSin = self.__getCosAndSin(rotationAngle + self.armAngle)
+        armCos, armSin = self._getCosAndSin(rotationAngle + self.armAngle)
         xArm = x4 + self.armLength * armCos
         yArm = y4 - self.armLength * armSin
 
         self.canvas.coords(self.robotArm, x4, y4, xArm, yArm)
 
-        handCos, handSin = self.__getCosAndSin(self.handAngle + rotationAngle)
+        handCos, handSin = self._getCosAndSin(self.handAngle + rotationAngle)
         xHand = xArm + self.handLength * handCos
         yHand = yArm - self.handLength * handSin
 
@@ -342,6 +90,13 @@ class CrawlingRobot(object):
         # self.lastVel = velocity
 
     def __init__(self, canvas):
+        # Draw Ground
+        self.totWidth = canvas.winfo_reqwidth()
+        self.totHeight = canvas.winfo_reqheight()
+        self.groundHeight = 40
+
+        super().__init__(groundY = self.totHeight - self.groundHeight)
+
         # Canvas
         self.canvas = canvas
         self.velAvg = 0
@@ -350,42 +105,18 @@ class CrawlingRobot(object):
         self.lastStep = 0
         # self.lastVel = 0
 
-        # Arm and Hand Degrees
-        self.armAngle = self.oldArmDegree = 0.0
-        self.handAngle = self.oldHandDegree = -math.pi / 6
-
-        self.maxArmAngle = math.pi / 6
-        self.minArmAngle = -math.pi / 6
-
-        self.maxHandAngle = 0
-        self.minHandAngle = -(5.0 / 6.0) * math.pi
-
-        # Draw Ground
-        self.totWidth = canvas.winfo_reqwidth()
-        self.totHeight = canvas.winfo_reqheight()
-        self.groundHeight = 40
-        self.groundY = self.totHeight - self.groundHeight
-
         self.ground = canvas.create_rectangle(0, self.groundY, self.totWidth, self.totHeight,
                 fill = 'blue')
 
         # Robot Body
-        self.robotWidth = 80
-        self.robotHeight = 40
-        self.robotPos = (20, self.groundY)
         self.robotBody = canvas.create_polygon(0, 0, 0, 0, 0, 0, 0, 0, fill='green')
 
         # Robot Arm
-        self.armLength = 60
         self.robotArm = canvas.create_line(0, 0, 0, 0, fill='orange', width=5)
 
         # Robot Hand
-        self.handLength = 40
         self.robotHand = canvas.create_line(0, 0, 0, 0, fill='red', width=3)
 
-        self.positions = [0, 0]
-        # self.angleSums = [0, 0]
-
         self.vel_msg = None
         self.velavg_msg = None
         self.pos_msg = None
@@ -403,16 +134,11 @@ class Application(object):
         # Init Gui
         self.__initGUI(win)
 
-        self.robot = CrawlingRobot(self.canvas)
-        self.robotEnvironment = CrawlingRobotEnvironment(self.robot)
-
-        # Init Agent
-        actionFn = lambda state: self.robotEnvironment.getPossibleActions(state)
-        self.learner = QLearningAgent(0, actionFn=actionFn)
-
-        self.learner.setEpsilon(self.epsilon)
-        self.learner.setLearningRate(self.alpha)
-        self.learner.setDiscount(self.gamma)
+        self.simulation = crawler.CrawlerSimulation(CrawlingRobot(self.canvas),
+                epsilon = self.epsilon, gamma = self.gamma, alpha = self.alpha)
+        self.robot = self.simulation.robot
+        self.robotEnvironment = self.simulation.robotEnvironment
+        self.learner = self.simulation.learner
 
         # Start GUI
         self.running = True
@@ -545,23 +271,8 @@ class Application(object):
             self.win = None
 
     def step(self):
-        self.stepCount += 1
-
-        state = self.robotEnvironment.getCurrentState()
-        actions = self.robotEnvironment.getPossibleActions(state)
-
-        if len(actions) == 0.0:
-            self.robotEnvironment.reset()
-            state = self.robotEnvironment.getCurrentState()
-            actions = self.robotEnvironment.getPossibleActions(state)
-            print('Reset!')
-
-        action = self.learner.getAction(state)
-        if (action is None):
-            raise Exception('None action returned: Code Not Complete')
-
-        nextState, reward = self.robotEnvironment.doAction(action)
-        self.learner.observeTransition(state, action, nextState, reward)
+        self.simulation.step()
+        self.stepCount = self.simulation.stepCount
 
     # Run on a different thread.
     def _run_wrapper(self):
@@ -579,7 +290,7 @@ class Application(object):
 
     # Run on a different thread.
     def run(self):
-        self.stepCount = 0
+        self.stepCount = self.simulation.stepCount = 0
         self.learner.startEpisode()
 
         while True:
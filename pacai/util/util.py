@@ -55,6 +55,13 @@ def nearestPoint(pos):
 
     return (grid_row, grid_col)
 
+def parseBool(value):
+    """
+    Interpret a value (possibly a string from the command line) as a boolean.
+    """
+
+    return (str(value).lower() not in ['false', '0', 'no', 'none', ''])
+
 def sign(x):
     """
     Returns 1 or -1 depending on the sign of x
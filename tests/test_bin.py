@@ -1,6 +1,7 @@
 import unittest
 
 from pacai.bin import capture
+from pacai.bin import crawler
 from pacai.bin import gridworld
 from pacai.bin import pacman
 
@@ -41,10 +42,28 @@ class BinTest(unittest.TestCase):
             if status.code != 0:
                 self.fail("Error occured when running --help.")
 
+    def test_crawler(self):
+        # Run the crawler without a window.
+        simulation = crawler.main(['crawler', '--null-graphics', '--seed', '1234', '5000'])
+        self.assertEqual(5000, simulation.stepCount)
+
+        # The robot should learn to crawl forward.
+        self.assertGreater(simulation.robot.getRobotPosition()[0], 20)
+
     def test_gridworld(self):
         # Run game of gridworld with default agents.
         gridworld.main(['--null-graphics'])
 
+    def test_gridworld_solvers(self):
+        for agent in ['value', 'gauss-seidel', 'prioritized', 'policy']:
+            gridworld.main(['--null-graphics', '-a', agent, '-k', '1', '-t', '0.001'])
+
+    def test_gridworld_batch(self):
+        gridworld.main(['--null-graphics', '-a', 'q', '-k', '100', '--batch', '16'])
+
+        # Batched episodes are never displayed.
+        self.assertRaises(ValueError, gridworld.main, ['-a', 'q', '--batch', '16'])
+
     def test_gridworld_help(self):
         # Show all gridworld arguments.
         try:
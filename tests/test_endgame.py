@@ -0,0 +1,103 @@
+import os
+import random
+import tempfile
+import unittest
+
+from pacai.agents.endgame import EndgameAgent
+from pacai.bin import pacman
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import endgame
+from pacai.core.endgame import EndgameTable
+from pacai.core.layout import Layout
+from pacai.core.layout import getLayout
+
+"""
+Test endgame tables against exhaustive minimax.
+"""
+class EndgameTest(unittest.TestCase):
+    def test_values(self):
+        # Without ghosts: eat the right food (1 move) then the left food (3 moves).
+        layout = Layout(['%%%%%%', '%. P.%', '%%%%%%'])
+        table = EndgameTable.build(PacmanGameState(layout))
+        self.assertTrue(table.isConverged())
+        self.assertEqual(2 * pacman.FOOD_POINTS + pacman.BOARD_CLEAR_POINTS - 4,
+                table.getValue(PacmanGameState(layout)))
+
+        layout = Layout(['%%%%%', '%P .%', '%.%G%', '%%%%%'])
+        table = EndgameTable.build(PacmanGameState(layout))
+        self.assertTrue(table.isConverged())
+
+        # Every state along some random games should match a minimax search to the end.
+        random.seed(1234)
+        for i in range(5):
+            state = PacmanGameState(layout)
+            agentIndex = 0
+
+            while (not state.isOver()):
+                self.assertEqual(_minimax(state, agentIndex, 12) - state.getScore(),
+                        table.getValue(state))
+
+                state = state.generateSuccessor(agentIndex,
+                        random.choice(state.getLegalActions(agentIndex)))
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_save_load(self):
+        state = PacmanGameState(getLayout('trappedClassic'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            table = endgame.loadTable(state, directory)
+            self.assertEqual(1, len(os.listdir(directory)))
+
+            loaded = endgame.loadTable(state, directory)
+            self.assertEqual(len(table), len(loaded))
+            self.assertEqual(table._values, loaded._values)
+
+    def test_agent(self):
+        layout = Layout(['%%%%%', '%P .%', '%.%G%', '%%%%%'])
+        state = PacmanGameState(layout)
+
+        agent = EndgameAgent(0)
+        agent.registerInitialState(state)
+
+        # Against a ghost that plays perfectly, Pacman gets exactly the value of the start.
+        expected = agent.getTable().getValue(state)
+        ghostTable = agent.getTable()
+
+        while (not state.isOver()):
+            if (state.getLastAgentMoved() in (None, 1)):
+                state = state.generateSuccessor(0, agent.getAction(state))
+                continue
+
+            actions = state.getLegalActions(1)
+            successors = [state.generateSuccessor(1, action) for action in actions]
+            state = min(successors, key = lambda successor:
+                    successor.getScore() + ghostTable.getValue(successor))
+
+        self.assertEqual(expected, state.getScore())
+
+    def test_capsules(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        self.assertRaises(ValueError, EndgameTable.build, state)
+
+    def test_too_many_states(self):
+        layout = Layout(['%%%%%', '%P .%', '%.%G%', '%%%%%'])
+        state = PacmanGameState(layout)
+        expected = PacmanGameState(layout)
+
+        # Giving up part way through leaves the start state as it was.
+        self.assertRaises(ValueError, EndgameTable.build, state, maxStates = 5)
+        self.assertEqual(expected, state)
+        self.assertEqual(expected.getAgentStates(), state.getAgentStates())
+
+def _minimax(state, agentIndex, depth):
+    if (state.isOver() or depth == 0):
+        return state.getScore()
+
+    nextAgent = (agentIndex + 1) % state.getNumAgents()
+    values = [_minimax(state.generateSuccessor(agentIndex, action), nextAgent, depth - 1)
+            for action in state.getLegalActions(agentIndex)]
+
+    if (agentIndex == 0):
+        return max(values)
+
+    return min(values)
@@ -0,0 +1,61 @@
+import random
+import unittest
+
+from pacai.agents.learning.experience import PrioritizedReplayBuffer
+from pacai.agents.learning.experience import ReplayBuffer
+from pacai.bin import pacman
+
+"""
+Test experience replay buffers and agents that use them.
+"""
+class ExperienceTest(unittest.TestCase):
+    def test_ring(self):
+        buffer = ReplayBuffer(3)
+        for i in range(5):
+            buffer.add(i, 'action', i + 1, float(i))
+
+        # The two oldest transitions were overwritten.
+        self.assertEqual(3, len(buffer))
+        self.assertEqual([2.0, 3.0, 4.0], sorted([buffer.getTransition(slot)[3]
+                for slot in range(3)]))
+
+        random.seed(1234)
+        slots, transitions, weights = buffer.sample(10)
+        self.assertEqual(10, len(transitions))
+        self.assertEqual([1.0] * 10, weights)
+
+        self.assertRaises(ValueError, ReplayBuffer(1).sample, 1)
+
+    def test_prioritized(self):
+        random.seed(1234)
+
+        buffer = PrioritizedReplayBuffer(5, priorityExponent = 1.0)
+        for i in range(5):
+            buffer.add(i, 'action', i + 1, 0.0)
+
+        # Priorities (almost) 1, 2, 3, 4, 0.
+        buffer.updatePriorities(range(5), [1.0, 2.0, 3.0, 4.0, 0.0])
+
+        counts = [0] * 5
+        slots, transitions, weights = buffer.sample(10000)
+        for slot in slots:
+            counts[slot] += 1
+
+        for slot in range(4):
+            self.assertAlmostEqual((slot + 1) / 10.0, counts[slot] / 10000.0, delta = 0.02)
+
+        self.assertEqual(0, counts[4])
+
+        # Rarer transitions get larger weights, and the largest is 1.
+        self.assertEqual(1.0, max(weights))
+        self.assertGreater(weights[slots.index(0)], weights[slots.index(3)])
+
+    def test_agent(self):
+        for replay in ['uniform', 'prioritized']:
+            agentArgs = ('extractor=pacai.core.featureExtractors.SimpleExtractor,'
+                    + 'replayBatchSize=4,replay=' + replay)
+            games = pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                    '-p', 'ApproximateQAgent', '--agent-args', agentArgs,
+                    '--num-training', '2', '-n', '3'])
+
+            self.assertEqual(1, len(games))
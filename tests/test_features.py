@@ -0,0 +1,165 @@
+import random
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.actions import Actions
+from pacai.core import featureExtractors
+from pacai.core.featureExtractors import FeatureInterner
+from pacai.core.featureExtractors import SimpleExtractor
+from pacai.core.featureExtractors import SparseFeatures
+from pacai.core.layout import getLayout
+from pacai.core.search import search
+from pacai.core.search.maze import MazeGraph
+from pacai.core.search.multigoal import NearestTargetDistances
+from pacai.student.qlearningAgents import ApproximateQAgent
+from pacai.student.searchAgents import AnyFoodSearchProblem
+
+"""
+Test sparse feature vectors and the approximate Q-learning agent that uses them.
+"""
+class FeaturesTest(unittest.TestCase):
+    def test_sparse_features(self):
+        interner = FeatureInterner()
+        features = SparseFeatures.fromDict({'a': 1.0, 'b': 2.0}, interner)
+        other = SparseFeatures.fromDict({'c': 3.0, 'a': 4.0}, interner)
+
+        self.assertEqual(3, len(interner))
+        self.assertEqual((2, 0), other.indexes)
+        self.assertEqual({'c': 3.0, 'a': 4.0}, other.toDict(interner))
+
+        weights = [0.0] * len(interner)
+        features.addTo(weights, 0.5)
+        self.assertEqual([0.5, 1.0, 0.0], weights)
+        self.assertEqual(2.5, features.dot(weights))
+        self.assertEqual(2.0, other.dot(weights))
+
+    def test_nearest_target_distances(self):
+        random.seed(1234)
+
+        graph = MazeGraph.get(getLayout('mediumClassic').walls)
+        targets = random.sample(range(len(graph)), 40)
+        mask = sum([1 << target for target in targets])
+
+        distances = NearestTargetDistances(graph, mask)
+        while (len(targets) > 0):
+            # Remove a few targets at a time, then sometimes put one back.
+            for i in range(min(3, len(targets))):
+                mask &= ~(1 << targets.pop())
+
+            if (random.random() < 0.2):
+                target = random.randrange(len(graph))
+                targets.append(target)
+                mask |= (1 << target)
+
+            distances.setTargets(mask)
+            expected = NearestTargetDistances(graph, mask)
+            for index in range(len(graph)):
+                self.assertEqual(expected.getDistance(index), distances.getDistance(index))
+
+    def test_simple_extractor(self):
+        random.seed(1234)
+        extractor = SimpleExtractor()
+
+        for layoutName in ['mediumClassic', 'capsuleClassic']:
+            state = PacmanGameState(getLayout(layoutName))
+            agentIndex = 0
+
+            for i in range(400):
+                if (state.isOver()):
+                    break
+
+                if (agentIndex == 0):
+                    for action in state.getLegalActions(0):
+                        self.assertEqual(_simpleFeatures(state, action),
+                                extractor.getFeatures(state, action))
+
+                state = state.generateSuccessor(agentIndex,
+                        random.choice(state.getLegalActions(agentIndex)))
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+    def test_maze_cache(self):
+        walls = PacmanGameState(getLayout('mediumClassic')).getWalls()
+        features = featureExtractors._getMazeFeatures(walls)
+
+        # Mazes that differ by one wall each.
+        for i in range(featureExtractors.MAX_CACHED_MAZES):
+            otherWalls = walls.copy()
+            otherWalls[i + 1][1] = not otherWalls[i + 1][1]
+            self.assertIsNot(features, featureExtractors._getMazeFeatures(otherWalls))
+
+        self.assertEqual(featureExtractors.MAX_CACHED_MAZES, len(featureExtractors._mazeFeatures))
+
+        # The least recently used maze was dropped.
+        self.assertIsNot(features, featureExtractors._getMazeFeatures(walls))
+
+    def test_approximate_q_agent(self):
+        random.seed(1234)
+
+        agent = ApproximateQAgent(0, extractor = 'pacai.core.featureExtractors.SimpleExtractor',
+                alpha = 0.2, gamma = 0.8)
+        extractor = SimpleExtractor()
+        expectedWeights = {}
+
+        def qValue(state, action):
+            features = extractor.getFeatures(state, action)
+            return sum([expectedWeights.get(feature, 0.0) * value
+                    for (feature, value) in features.items()])
+
+        state = PacmanGameState(getLayout('smallClassic'))
+        for i in range(40):
+            if (state.isOver()):
+                break
+
+            action = random.choice(state.getLegalActions(0))
+            nextState = state.generateSuccessor(0, action)
+            for ghostIndex in range(1, nextState.getNumAgents()):
+                if (not nextState.isOver()):
+                    nextState = nextState.generateSuccessor(ghostIndex,
+                            random.choice(nextState.getLegalActions(ghostIndex)))
+
+            reward = nextState.getScore() - state.getScore()
+
+            # Update the weights directly with dict features.
+            nextValue = 0.0
+            if (not nextState.isOver()):
+                nextValue = max([qValue(nextState, nextAction)
+                        for nextAction in nextState.getLegalActions(0)])
+
+            error = reward + 0.8 * nextValue - qValue(state, action)
+            for (feature, value) in extractor.getFeatures(state, action).items():
+                expectedWeights[feature] = expectedWeights.get(feature, 0.0) + 0.2 * error * value
+
+            agent.update(state, action, nextState, reward)
+
+            weights = agent.getWeights()
+            for (feature, weight) in expectedWeights.items():
+                self.assertAlmostEqual(weight, weights[feature])
+
+            for legalAction in state.getLegalActions(0):
+                self.assertAlmostEqual(qValue(state, legalAction),
+                        agent.getQValue(state, legalAction))
+
+            state = nextState
+
+def _simpleFeatures(state, action):
+    """
+    The simple features, computed with a breadth-first search for the closest food.
+    """
+
+    walls = state.getWalls()
+    features = {'bias': 1.0}
+
+    x, y = state.getPacmanPosition()
+    dx, dy = Actions.directionToVector(action)
+    next_x, next_y = int(x + dx), int(y + dy)
+
+    features['#-of-ghosts-1-step-away'] = sum([(next_x, next_y) in
+            Actions.getLegalNeighbors(ghost, walls) for ghost in state.getGhostPositions()])
+
+    if (not features['#-of-ghosts-1-step-away'] and state.hasFood(next_x, next_y)):
+        features['eats-food'] = 1.0
+
+    dist = len(search.bfs(AnyFoodSearchProblem(state, start = (next_x, next_y))))
+    features['closest-food'] = float(dist) / (walls.getWidth() * walls.getHeight())
+
+    return {key: value / 10.0 for (key, value) in features.items()}
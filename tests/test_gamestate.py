@@ -0,0 +1,107 @@
+import random
+import unittest
+
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+
+"""
+Test that applying and undoing actions in place matches generating successors.
+"""
+class GameStateTest(unittest.TestCase):
+    def test_pacman_apply_action(self):
+        for layoutName in ['smallClassic', 'capsuleClassic', 'trickyClassic']:
+            self._checkRandomGames(lambda: PacmanGameState(getLayout(layoutName)))
+
+    def test_capture_apply_action(self):
+        for layoutName in ['tinyCapture', 'defaultCapture']:
+            self._checkRandomGames(lambda: CaptureGameState(getLayout(layoutName), 300))
+
+    def test_undo_sequence(self):
+        random.seed(1234)
+
+        for state in [PacmanGameState(getLayout('capsuleClassic')),
+                CaptureGameState(getLayout('tinyCapture'), 300)]:
+            original = state.generateSuccessor(0, state.getLegalActions(0)[0])
+            state = original.generateSuccessor(0, original.getLegalActions(0)[0])
+            state.undoAction(state.applyAction(1, state.getLegalActions(1)[0]))
+
+            # Walk down a line of play and all the way back up.
+            expected = _describe(state)
+            originalExpected = _describe(original)
+            undos = []
+            agentIndex = 1
+
+            for i in range(40):
+                if (state.isOver()):
+                    break
+
+                undos.append(state.applyAction(agentIndex,
+                        random.choice(state.getLegalActions(agentIndex))))
+                agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+            for undo in reversed(undos):
+                state.undoAction(undo)
+
+            self.assertEqual(expected, _describe(state))
+
+            # The food and capsules shared with the parent state are never edited.
+            self.assertEqual(originalExpected, _describe(original))
+
+    def _checkRandomGames(self, createState, numGames = 3, maxMoves = 200):
+        random.seed(1234)
+
+        for i in range(numGames):
+            successor = createState()
+            inPlace = createState()
+
+            agentIndex = 0
+            for move in range(maxMoves):
+                if (successor.isOver()):
+                    break
+
+                actions = successor.getLegalActions(agentIndex)
+                self.assertEqual(actions, inPlace.getLegalActions(agentIndex))
+
+                action = random.choice(actions)
+                successor = successor.generateSuccessor(agentIndex, action)
+
+                # Apply and undo once, then apply for real.
+                expected = _describe(inPlace)
+                inPlace.undoAction(inPlace.applyAction(agentIndex, action))
+                self.assertEqual(expected, _describe(inPlace))
+
+                inPlace.applyAction(agentIndex, action)
+
+                self.assertEqual(_describe(successor), _describe(inPlace))
+                self.assertEqual(successor, inPlace)
+                self.assertEqual(hash(successor), hash(inPlace))
+
+                agentIndex = (agentIndex + 1) % successor.getNumAgents()
+
+def _describe(state):
+    description = [
+        state.getScore(),
+        state.isOver(),
+        state.isWin(),
+        state.getLastAgentMoved(),
+        state.getLastFoodEaten(),
+        state.getLastCapsuleEaten(),
+        sorted(state.getFood().asList()),
+        list(state.getCapsules()),
+        [agentState.getSnapshot() for agentState in state.getAgentStates()],
+    ]
+
+    if (isinstance(state, CaptureGameState)):
+        description += [
+            state.getTimeleft(),
+            sorted(state.getRedFood().asList()),
+            sorted(state.getBlueFood().asList()),
+            list(state.getRedCapsules()),
+            list(state.getBlueCapsules()),
+        ]
+
+    return description
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import math
+import random
+import unittest
+
+from pacai.bin import gridworld
+from pacai.student.valueIterationAgent import ValueIterationAgent
+
+"""
+Test running batches of gridworld episodes.
+"""
+class GridworldTest(unittest.TestCase):
+    def test_batch_sampling(self):
+        random.seed(1234)
+
+        mdp = gridworld._getGridWorld('BookGrid')
+        environment = gridworld.BatchGridworldEnvironment(mdp, 10000)
+
+        start = mdp.getStartState()
+        self.assertEqual([start] * 10000, environment.getCurrentStates())
+
+        nextStates, rewards = environment.step(['north'] * 10000)
+        self.assertEqual(nextStates, environment.getCurrentStates())
+
+        for (nextState, probability) in mdp.getTransitionStatesAndProbs(start, 'north'):
+            self.assertAlmostEqual(probability, nextStates.count(nextState) / 10000.0,
+                    delta = 0.02)
+
+        environment.reset(0)
+        self.assertEqual(start, environment.getCurrentState(0))
+
+    def test_batch_returns(self):
+        random.seed(1234)
+
+        for name in ['BookGrid', 'BridgeGrid', 'CliffGrid']:
+            mdp = gridworld._getGridWorld(name)
+            mdp.setLivingReward(-0.1)
+
+            agent = ValueIterationAgent(0, mdp, 0.9, 100)
+            environment = gridworld.BatchGridworldEnvironment(mdp, 64)
+
+            returns = gridworld.runEpisodes(agent, environment, 0.9, agent.getAction, 5000)
+            self.assertEqual(5000, len(returns))
+
+            mean = sum(returns) / len(returns)
+            variance = sum([(value - mean) ** 2 for value in returns]) / len(returns)
+
+            # Following the optimal policy should average the start state's value
+            # (within a few standard errors).
+            self.assertAlmostEqual(agent.getValue(mdp.getStartState()), mean,
+                    delta = 4.0 * math.sqrt(variance / len(returns)) + 1e-9)
@@ -0,0 +1,119 @@
+import random
+import unittest
+
+from pacai.agents.search.mcts import MCTSAgent
+from pacai.agents.search.mcts import MCTSNode
+from pacai.bin.capture import CaptureGameState
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+
+"""
+Test Monte Carlo tree search.
+"""
+class MCTSTest(unittest.TestCase):
+    def test_pacman_tree_reuse(self):
+        random.seed(1234)
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        agent = MCTSAgent(0, moveTime = 60, maxIterations = 200)
+        agent.registerInitialState(state)
+
+        action = agent.getAction(state)
+        self.assertIn(action, state.getLegalActions(0))
+        self.assertEqual(200, agent.getRoot().visits)
+
+        # Play out a round, the next search should start from the matching part of the old tree.
+        state = state.generateSuccessor(0, action)
+        for ghostIndex in range(1, state.getNumAgents()):
+            state = state.generateSuccessor(ghostIndex, state.getLegalActions(ghostIndex)[0])
+
+        action = agent.getAction(state)
+        self.assertIn(action, state.getLegalActions(0))
+        self.assertGreater(agent.getRoot().visits, 200)
+        self.assertEqual(state, agent.getRoot().state)
+
+    def test_capture(self):
+        random.seed(1234)
+        state = CaptureGameState(getLayout('tinyCapture'), 100)
+
+        for rollout in ['random', 'greedy', 'reflex']:
+            for index in [0, 1]:
+                agent = MCTSAgent(index, moveTime = 60, maxIterations = 50, rollout = rollout)
+                agent.registerInitialState(state)
+
+                self.assertIn(agent.getAction(state), state.getLegalActions(index))
+
+    def test_no_iterations(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        for (moveTime, maxIterations) in [(60, 0), (0, None)]:
+            agent = MCTSAgent(0, moveTime = moveTime, maxIterations = maxIterations)
+            agent.registerInitialState(state)
+
+            self.assertIn(agent.getAction(state), state.getLegalActions(0))
+            self.assertEqual(0, agent.getIterations())
+
+    def test_parallel_rollouts(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        agent = MCTSAgent(0, moveTime = 60, maxIterations = 20, workers = 2)
+        agent.registerInitialState(state)
+
+        self.assertIn(agent.getAction(state), state.getLegalActions(0))
+        self.assertEqual(20, agent.getIterations())
+        self.assertEqual(20, agent.getRoot().visits)
+
+        # The last round only runs the rollouts left in the budget.
+        agent = MCTSAgent(0, moveTime = 60, maxIterations = 7, workers = 3)
+        agent.registerInitialState(state)
+
+        agent.getAction(state)
+        self.assertEqual(7, agent.getIterations())
+        self.assertEqual(7, agent.getRoot().visits)
+
+    def test_virtual_loss(self):
+        random.seed(1234)
+        state = PacmanGameState(getLayout('openClassic'))
+
+        agent = MCTSAgent(0, workers = 2)
+        agent.registerInitialState(state)
+
+        # A ghost is to move at the root, and all of its moves look the same so far.
+        root = MCTSNode(state, 1, agent.getSearchActions(state, 1))
+        while (len(root.untried) > 0):
+            agent._expand(root)
+
+        for child in root.children.values():
+            child.visits = 10
+            child.totalValue = 50.0
+            root.visits += 10
+
+        agent._root = root
+        agent._minValue = 0.0
+        agent._maxValue = 10.0
+        self.assertGreater(len(root.children), 1)
+
+        # Pending leaves look bad to the ghost, so each selection tries a different move.
+        losses = agent._getVirtualLosses()
+        leaves = agent._selectLeaves(len(root.children), losses)
+
+        self.assertEqual(len(root.children), len(set(leaves)))
+
+        branches = set()
+        for leaf in leaves:
+            while (leaf.parent is not root):
+                leaf = leaf.parent
+            branches.add(leaf.action)
+
+        self.assertEqual(len(root.children), len(branches))
+
+        # Removing the losses puts the statistics back.
+        for leaf in leaves:
+            agent._addVirtualLoss(leaf, -1, losses)
+
+        for child in root.children.values():
+            self.assertEqual(10, child.visits)
+            self.assertEqual(50.0, child.totalValue)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+import random
+import unittest
+
+from pacai.bin import gridworld
+from pacai.core import mdpsolver
+from pacai.student.valueIterationAgent import ValueIterationAgent
+
+"""
+Test the compiled MDP solvers against a direct implementation on the MDP.
+"""
+class MDPSolverTest(unittest.TestCase):
+    def test_value_iteration(self):
+        for name in ['BookGrid', 'BridgeGrid', 'CliffGrid', 'DiscountGrid', 'MazeGrid']:
+            mdp = gridworld._getGridWorld(name)
+            mdp.setLivingReward(-0.1)
+
+            for iterations in [0, 1, 5, 50]:
+                expected = _valueIteration(mdp, 0.9, iterations)
+                agent = ValueIterationAgent(0, mdp, 0.9, iterations)
+
+                for state in mdp.getStates():
+                    self.assertAlmostEqual(expected[state], agent.getValue(state))
+
+                    for action in mdp.getPossibleActions(state):
+                        self.assertAlmostEqual(_qValue(mdp, expected, state, action, 0.9),
+                                agent.getQValue(state, action))
+
+    def test_early_stopping(self):
+        random.seed(1234)
+
+        rows = [[random.choice([' ', ' ', ' ', '#']) for x in range(12)] for y in range(12)]
+        rows[0][0] = 'S'
+        rows[11][11] = 10
+        mdp = gridworld.Gridworld(rows)
+
+        compiled = mdpsolver.CompiledMDP(mdp)
+        values, sweeps = mdpsolver.valueIteration(compiled, 0.9, 1000, tolerance = 1e-8)
+        self.assertLess(sweeps, 1000)
+
+        # Converged values are a fixed point.
+        nextValues, nextSweeps = mdpsolver.valueIteration(compiled, 0.9, 1, values = values)
+        for (value, nextValue) in zip(values, nextValues):
+            self.assertAlmostEqual(value, nextValue, places = 6)
+
+        agent = ValueIterationAgent(0, mdp, 0.9, 1000, tolerance = 1e-8)
+        self.assertEqual(sweeps, agent.sweeps)
+        self.assertEqual('exit', agent.getPolicy((11, 0)))
+        self.assertIsNone(agent.getPolicy(mdp.grid.terminalState))
+
+    def test_solvers(self):
+        for name in ['BookGrid', 'BridgeGrid', 'CliffGrid', 'DiscountGrid', 'MazeGrid']:
+            mdp = gridworld._getGridWorld(name)
+            mdp.setLivingReward(-0.1)
+
+            compiled = mdpsolver.CompiledMDP(mdp)
+            expected, sweeps = mdpsolver.valueIteration(compiled, 0.9, 1000, tolerance = 1e-12)
+            backups = compiled.backups
+
+            for (solver, solve) in mdpsolver.SOLVERS.items():
+                compiled.backups = 0
+                values, sweeps = solve(compiled, 0.9, 1000, tolerance = 1e-9)
+
+                self.assertLess(sweeps, 1000)
+                self.assertGreater(compiled.backups, 0)
+                for (value, expectedValue) in zip(values, expected):
+                    self.assertAlmostEqual(expectedValue, value, places = 6)
+
+                agent = ValueIterationAgent(0, mdp, 0.9, 1000, 1e-9, solver)
+                for state in mdp.getStates():
+                    self.assertAlmostEqual(expected[compiled.getIndex(state)],
+                            agent.getValue(state), places = 6)
+
+            # Prioritized sweeping skips states that have settled.
+            compiled.backups = 0
+            mdpsolver.prioritizedSweeping(compiled, 0.9, 1000, tolerance = 1e-12)
+            self.assertLessEqual(compiled.backups, backups)
+
+        self.assertRaises(ValueError, ValueIterationAgent, 0, mdp, solver = 'what')
+
+    def test_prioritized_tolerance(self):
+        for name in ['BookGrid', 'BridgeGrid', 'CliffGrid', 'DiscountGrid', 'MazeGrid']:
+            mdp = gridworld._getGridWorld(name)
+            mdp.setNoise(0.2)
+            mdp.setLivingReward(-0.01)
+
+            for tolerance in [0.5, 0.05, 0.001]:
+                compiled = mdpsolver.CompiledMDP(mdp)
+                values, sweeps = mdpsolver.prioritizedSweeping(compiled, 0.9, 1000,
+                        tolerance = tolerance)
+                values = {compiled.getState(index): value for (index, value) in enumerate(values)}
+
+                # No state is left with a Bellman error over the tolerance.
+                for state in mdp.getStates():
+                    actions = mdp.getPossibleActions(state)
+                    if (mdp.isTerminal(state) or len(actions) == 0):
+                        continue
+
+                    best = max([_qValue(mdp, values, state, action, 0.9) for action in actions])
+                    self.assertLessEqual(abs(best - values[state]), tolerance + 1e-12)
+
+def _qValue(mdp, values, state, action, discountRate):
+    return sum([probability * (mdp.getReward(state, action, nextState)
+            + discountRate * values.get(nextState, 0.0))
+            for (nextState, probability) in mdp.getTransitionStatesAndProbs(state, action)])
+
+def _valueIteration(mdp, discountRate, iterations):
+    values = {}
+
+    for i in range(iterations):
+        newValues = {}
+        for state in mdp.getStates():
+            actions = mdp.getPossibleActions(state)
+            if (len(actions) > 0):
+                newValues[state] = max([_qValue(mdp, values, state, action, discountRate)
+                        for action in actions])
+
+        values = newValues
+
+    return {state: values.get(state, 0.0) for state in mdp.getStates()}
@@ -0,0 +1,225 @@
+import random
+import time
+import unittest
+
+from pacai.agents.ghost.directional import DirectionalGhost
+from pacai.agents.search import multiagent
+from pacai.agents.search import parallel
+from pacai.agents.search.evaluation import EvaluationCache
+from pacai.agents.search import transposition
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.eval import score
+from pacai.core.eval import scores
+from pacai.core.layout import getLayout
+from pacai.student.multiagents import MinimaxAgent
+
+"""
+Test the framework adversarial search.
+"""
+class MultiAgentTest(unittest.TestCase):
+    def test_transposition_table_matches(self):
+        state = PacmanGameState(getLayout('smallClassic', maxGhosts = 2))
+
+        for mode in [multiagent.MINIMAX, multiagent.ALPHA_BETA, multiagent.EXPECTIMAX]:
+            plain = MinimaxAgent(0, depth = 3, tableSize = 0)
+            cached = MinimaxAgent(0, depth = 3)
+
+            self.assertEqual(plain.searchRoot(state, mode), cached.searchRoot(state, mode))
+            self.assertLessEqual(cached.getNodesSearched(), plain.getNodesSearched())
+
+            # The table is reused on the next search.
+            cached.searchRoot(state, mode)
+            self.assertGreater(cached.getTranspositionTable().hits, 0)
+
+    def test_alpha_beta_matches_minimax(self):
+        state = PacmanGameState(getLayout('minimaxClassic'))
+
+        agent = MinimaxAgent(0, depth = 3, tableSize = 0)
+        minimaxValue = agent.searchRoot(state, multiagent.MINIMAX)[0]
+        minimaxNodes = agent.getNodesSearched()
+
+        alphaBetaValue = agent.searchRoot(state, multiagent.ALPHA_BETA)[0]
+        self.assertEqual(minimaxValue, alphaBetaValue)
+        self.assertLess(agent.getNodesSearched(), minimaxNodes)
+
+    def test_move_ordering(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        evalFn = 'pacai.student.multiagents.betterEvaluationFunction'
+
+        plain = MinimaxAgent(0, depth = 4, evalFn = evalFn, tableSize = 0, ordering = False)
+        plainResult = plain.searchRoot(state, multiagent.ALPHA_BETA)
+
+        for staticOrdering in [False, True]:
+            ordered = MinimaxAgent(0, depth = 4, evalFn = evalFn, staticOrdering = staticOrdering)
+
+            self.assertEqual(plainResult, ordered.searchRoot(state, multiagent.ALPHA_BETA))
+            self.assertLess(ordered.getNodesSearched(), plain.getNodesSearched())
+
+            orderer = ordered.getMoveOrderer()
+            self.assertGreater(orderer.cutoffs, 0)
+            self.assertGreater(orderer.getFirstMoveCutoffRate(),
+                    plain.getMoveOrderer().getFirstMoveCutoffRate())
+
+    def test_parallel_root_search(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+        evalFn = 'pacai.student.multiagents.betterEvaluationFunction'
+
+        for mode in [multiagent.ALPHA_BETA, multiagent.EXPECTIMAX]:
+            expected = MinimaxAgent(0, depth = 3, evalFn = evalFn).searchRoot(state, mode)
+
+            for youngBrothersWait in [False, True]:
+                agent = MinimaxAgent(0, depth = 3, evalFn = evalFn, workers = 2,
+                        youngBrothersWait = youngBrothersWait)
+
+                self.assertEqual(expected, agent.searchRoot(state, mode))
+                self.assertGreater(agent.getNodesSearched(), 0)
+
+    def test_worker_agents(self):
+        first = MinimaxAgent(0)
+        second = MinimaxAgent(0)
+
+        # Workers keep the first copy of an agent for the rest of its game.
+        key = parallel.newAgentKey()
+        self.assertIs(first, parallel.getWorkerAgent(key, first))
+        self.assertIs(first, parallel.getWorkerAgent(key, second))
+
+        # A new game replaces the old copy.
+        key = parallel.newAgentKey(key)
+        self.assertIs(second, parallel.getWorkerAgent(key, second))
+        self.assertIs(second, parallel.getWorkerAgent(key, first))
+
+        # Each game gets a new key.
+        agent = MinimaxAgent(0, depth = 2, workers = 2)
+        keys = []
+        for name in ['smallClassic', 'mediumClassic']:
+            state = PacmanGameState(getLayout(name))
+            agent.registerInitialState(state)
+            keys.append(agent._agentKey)
+
+            expected = MinimaxAgent(0, depth = 2).searchRoot(state, multiagent.ALPHA_BETA)
+            self.assertEqual(expected[0], agent.searchRoot(state, multiagent.ALPHA_BETA)[0])
+
+        self.assertNotEqual(keys[0], keys[1])
+
+    def test_evaluation_cache(self):
+        state = PacmanGameState(getLayout('smallClassic'))
+
+        for mode in [multiagent.ALPHA_BETA, multiagent.EXPECTIMAX]:
+            plain = MinimaxAgent(0, depth = 4, tableSize = 0)
+            cached = MinimaxAgent(0, depth = 4, tableSize = 0, evalCacheSize = 1000)
+            batched = MinimaxAgent(0, depth = 4, tableSize = 0,
+                    batchEvalFn = 'pacai.core.eval.scores')
+
+            expected = plain.searchRoot(state, mode)
+            self.assertEqual(expected, cached.searchRoot(state, mode))
+            self.assertEqual(expected, batched.searchRoot(state, mode))
+
+            self.assertGreater(cached.getEvaluationCache().hits, 0)
+
+        # The least recently used states are dropped first.
+        cache = EvaluationCache(score, size = 2, batchFunction = scores)
+        states = [state.generateSuccessor(0, action) for action in state.getLegalActions(0)]
+
+        self.assertEqual(scores(states[:2]), cache.evaluateAll(states[:2]))
+        cache(states[0])
+        cache(states[2])
+
+        self.assertEqual(2, len(cache))
+        self.assertEqual(1, cache.evictions)
+        self.assertEqual(1, cache.hits)
+
+    def test_chance_nodes(self):
+        random.seed(1234)
+
+        state = PacmanGameState(getLayout('trickyClassic'))
+        mode = multiagent.EXPECTIMAX
+
+        uniform = MinimaxAgent(0, depth = 2, tableSize = 0)
+        uniformValue = uniform.searchRoot(state, mode)[0]
+
+        # A random ghost model is the same as the uniform default.
+        modeled = MinimaxAgent(0, depth = 2, tableSize = 0,
+                ghostModel = 'pacai.agents.ghost.random.RandomGhost')
+        self.assertAlmostEqual(uniformValue, modeled.searchRoot(state, mode)[0])
+        self.assertEqual(uniform.getNodesSearched(), modeled.getNodesSearched())
+
+        directional = 'pacai.agents.ghost.directional.DirectionalGhost'
+        for kwargs in [{'chanceThreshold': 0.2}, {'chanceSamples': 1}]:
+            agent = MinimaxAgent(0, depth = 2, tableSize = 0, ghostModel = directional, **kwargs)
+            value, action = agent.searchRoot(state, mode)
+
+            self.assertIn(action, state.getLegalActions(0))
+            self.assertLess(agent.getNodesSearched(), uniform.getNodesSearched() / 5)
+
+    def test_ghost_distribution_cache(self):
+        random.seed(1234)
+
+        state = PacmanGameState(getLayout('trickyClassic'))
+        cached = DirectionalGhost(1, cacheDistributions = True)
+        plain = DirectionalGhost(1)
+
+        # Revisit positions with a random walk.
+        for i in range(300):
+            self.assertEqual(plain.getDistribution(state), cached.getCachedDistribution(state))
+
+            agentIndex = i % state.getNumAgents()
+            state = state.generateSuccessor(agentIndex,
+                    random.choice(state.getLegalActions(agentIndex)))
+
+            if (state.isOver()):
+                break
+
+        self.assertGreater(cached.distributionHits, 0)
+        self.assertGreater(cached.distributionMisses, 0)
+
+        # The search gets the same values with and without the cache.
+        state = PacmanGameState(getLayout('trickyClassic'))
+        values = []
+
+        for cache in [False, True]:
+            agent = MinimaxAgent(0, depth = 2, tableSize = 0, ghostModelCache = cache,
+                    ghostModel = 'pacai.agents.ghost.directional.DirectionalGhost')
+            values.append(agent.searchRoot(state, multiagent.EXPECTIMAX))
+
+        self.assertEqual(values[0], values[1])
+        self.assertGreater(agent.getOpponentModel(1).getDistributionHitRate(), 0.5)
+
+    def test_iterative_deepening(self):
+        state = PacmanGameState(getLayout('mediumClassic'))
+
+        agent = MinimaxAgent(0, moveTime = 0.2)
+
+        starttime = time.time()
+        value, action = agent.iterativeDeepening(state, multiagent.ALPHA_BETA, 0.2)
+        elapsed = time.time() - starttime
+
+        self.assertIn(action, state.getLegalActions(0))
+        self.assertGreaterEqual(agent.getDepthReached(), 1)
+        self.assertLess(elapsed, 1.0)
+
+        # The deepest completed iteration matches a fixed depth search.
+        depth = agent.getDepthReached()
+        fixed = MinimaxAgent(0, depth = depth, tableSize = 0)
+        self.assertEqual(value, fixed.searchRoot(state, multiagent.ALPHA_BETA)[0])
+
+    def test_replacement_policy(self):
+        table = transposition.TranspositionTable(1, transposition.REPLACE_DEPTH)
+
+        table.put('a', 3, 1.0, transposition.EXACT)
+        table.put('b', 1, 2.0, transposition.EXACT)
+        self.assertIsNone(table.get('b'))
+        self.assertEqual(1.0, table.get('a').value)
+
+        # Entries from older searches are replaced first.
+        table.newSearch()
+        table.put('b', 1, 2.0, transposition.EXACT)
+        self.assertEqual(2.0, table.get('b').value)
+
+        table = transposition.TranspositionTable(1, transposition.REPLACE_ALWAYS)
+        table.put('a', 3, 1.0, transposition.EXACT)
+        table.put('b', 1, 2.0, transposition.EXACT)
+        self.assertIsNone(table.get('a'))
+        self.assertEqual(2.0, table.get('b').value)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import os
+import random
+import tempfile
+import unittest
+
+from pacai.bin import eightpuzzle
+from pacai.core.search import patterndb
+from pacai.core.search import search
+from pacai.core.search.puzzle import SlidingPuzzleSearchProblem
+from pacai.core.search.puzzle import SlidingPuzzleState
+
+"""
+Test the packed sliding puzzle and its pattern databases.
+"""
+class PuzzleTest(unittest.TestCase):
+    def test_matches_eight_puzzle(self):
+        random.seed(1234)
+
+        puzzle = eightpuzzle.createRandomEightPuzzle(30)
+        numbers = [number for row in puzzle.cells for number in row]
+        packed = SlidingPuzzleState(numbers)
+
+        for i in range(50):
+            self.assertEqual(sorted(puzzle.legalMoves()), sorted(packed.legalMoves()))
+            self.assertEqual(puzzle.isGoal(), packed.isGoal())
+            self.assertEqual(numbers, packed.getNumbers())
+
+            move = random.choice(puzzle.legalMoves())
+            puzzle = puzzle.result(move)
+            packed = packed.result(move)
+            numbers = [number for row in puzzle.cells for number in row]
+
+        self.assertEqual(packed, SlidingPuzzleState(numbers))
+        self.assertEqual(hash(packed), hash(SlidingPuzzleState(numbers)))
+
+    def test_pattern_heuristic_admissible(self):
+        random.seed(4321)
+
+        heuristic = patterndb.loadHeuristic(3, patterndb.defaultPartition(3, 4))
+        self.assertEqual(0, heuristic(SlidingPuzzleState.goal(3)))
+
+        for i in range(5):
+            puzzle = eightpuzzle.createRandomSlidingPuzzle(3, 40)
+            optimal = len(search.bfs(SlidingPuzzleSearchProblem(puzzle)))
+
+            self.assertLessEqual(heuristic(puzzle), optimal)
+            self.assertEqual(optimal, len(search.astar(SlidingPuzzleSearchProblem(puzzle),
+                    heuristic)))
+
+    def test_pattern_database_save_load(self):
+        database = patterndb.PatternDatabase.build(3, (1, 2, 3))
+        path = os.path.join(tempfile.gettempdir(), 'pacai_unittest_pdb.bin')
+
+        database.save(path)
+        loaded = patterndb.PatternDatabase.load(path)
+        os.remove(path)
+
+        self.assertEqual(database.getTiles(), loaded.getTiles())
+        self.assertEqual(len(database), len(loaded))
+
+        puzzle = eightpuzzle.createRandomSlidingPuzzle(3, 20)
+        positions = puzzle.getTilePositions()
+        self.assertEqual(database.getCost(positions), loaded.getCost(positions))
+
+if __name__ == '__main__':
+    unittest.main()
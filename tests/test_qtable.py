@@ -0,0 +1,84 @@
+import os
+import random
+import tempfile
+import unittest
+
+from pacai.bin import gridworld
+from pacai.bin.pacman import PacmanGameState
+from pacai.core import qtable
+from pacai.core.layout import getLayout
+from pacai.student.qlearningAgents import QLearningAgent
+
+"""
+Test the Q-table backends and their use by the Q-learning agent.
+"""
+class QTableTest(unittest.TestCase):
+    def test_tables(self):
+        mdp = gridworld._getGridWorld('BookGrid')
+
+        # The same learning with each table should give the same values.
+        tables = [qtable.DictQTable(), gridworld._getQTable(mdp)]
+        agents = []
+
+        for table in tables:
+            random.seed(1234)
+
+            agent = QLearningAgent(0, actionFn = mdp.getPossibleActions, qTable = table,
+                    epsilon = 0.5, alpha = 0.5, gamma = 0.9)
+            environment = gridworld.GridworldEnvironment(mdp)
+
+            for i in range(50):
+                environment.reset()
+                while (len(mdp.getPossibleActions(environment.getCurrentState())) > 0):
+                    state = environment.getCurrentState()
+                    action = agent.getAction(state)
+                    nextState, reward = environment.doAction(action)
+                    agent.update(state, action, nextState, reward)
+
+            agents.append(agent)
+
+        for state in mdp.getStates():
+            for action in mdp.getPossibleActions(state):
+                self.assertEqual(agents[0].getQValue(state, action),
+                        agents[1].getQValue(state, action))
+
+        self.assertRaises(ValueError, tables[1].setQValue, 'unknown', 'north', 1.0)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for table in tables:
+                path = os.path.join(directory, 'table.bin')
+                table.save(path)
+                loaded = type(table).load(path)
+
+                self.assertEqual(len(table), len(loaded))
+                for state in mdp.getStates():
+                    actions = mdp.getPossibleActions(state)
+                    self.assertEqual(table.getQValues(state, actions),
+                            loaded.getQValues(state, actions))
+
+    def test_zobrist(self):
+        random.seed(1234)
+        encoder = qtable.ZobristKeyEncoder()
+
+        # {key: state}
+        seen = {}
+
+        state = PacmanGameState(getLayout('mediumClassic'))
+        agentIndex = 0
+
+        while (not state.isOver()):
+            key = encoder.encode(state)
+            if (key in seen):
+                self.assertEqual(seen[key].getAgentStates(), state.getAgentStates())
+                self.assertEqual(seen[key].getFood(), state.getFood())
+            else:
+                seen[key] = state
+
+            # A fresh encoder gives the same key.
+            self.assertEqual(key, qtable.ZobristKeyEncoder().encode(state))
+
+            state = state.generateSuccessor(agentIndex,
+                    random.choice(state.getLegalActions(agentIndex)))
+            agentIndex = (agentIndex + 1) % state.getNumAgents()
+
+        self.assertGreater(len(seen), 1)
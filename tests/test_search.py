@@ -0,0 +1,132 @@
+import random
+import unittest
+
+from pacai.bin.pacman import PacmanGameState
+from pacai.core.layout import getLayout
+from pacai.core.search import heuristic
+from pacai.core.search.anytime import AnytimeSearch
+from pacai.core.search import multigoal
+from pacai.core.search import search
+from pacai.core.search import stats
+from pacai.core.search import maze
+from pacai.core.search.food import FoodSearchProblem
+from pacai.core.search.maze import MazeGraph
+from pacai.core.search.position import PositionSearchProblem
+from pacai.student.searchAgents import ClosestDotSearchAgent
+
+"""
+Test the framework search utilities.
+"""
+class SearchTest(unittest.TestCase):
+    def test_iterate_targets_nearest_first(self):
+        state = PacmanGameState(getLayout('mediumSearch'))
+        graph = MazeGraph.get(state.getWalls())
+        start = graph.getIndex(state.getPacmanPosition())
+
+        distances = graph.distancesFrom(start)
+        targets = list(multigoal.iterateTargets(graph, start, graph.maskFromGrid(state.getFood())))
+
+        self.assertEqual(state.getNumFood(), len(targets))
+
+        lengths = [len(path) for (target, path) in targets]
+        self.assertEqual(sorted(lengths), lengths)
+
+        for (target, path) in targets:
+            self.assertEqual(distances[target], len(path))
+
+    def test_graph_cache(self):
+        walls = PacmanGameState(getLayout('mediumSearch')).getWalls()
+        graph = MazeGraph.get(walls)
+
+        # Mazes that differ by one wall each.
+        for i in range(maze.MAX_CACHED_GRAPHS):
+            otherWalls = walls.copy()
+            otherWalls[i + 1][1] = not otherWalls[i + 1][1]
+            self.assertIsNot(graph, MazeGraph.get(otherWalls))
+
+        self.assertEqual(maze.MAX_CACHED_GRAPHS, len(maze._graphCache))
+
+        # The least recently used maze was dropped.
+        self.assertIsNot(graph, MazeGraph.get(walls))
+        self.assertIs(MazeGraph.get(walls), MazeGraph.get(walls.copy()))
+
+    def test_closest_dot_tour(self):
+        for layoutName in ['tinySearch', 'mediumSearch']:
+            state = PacmanGameState(getLayout(layoutName))
+
+            agent = ClosestDotSearchAgent(0)
+            agent.registerInitialState(state)
+
+            # The tour should match the one found by repeatedly searching game states.
+            expected = []
+            while (state.getNumFood() > 0):
+                path = agent.findPathToClosestDot(state)
+                expected += path
+
+                for action in path:
+                    state = state.generateSuccessor(0, action)
+
+            self.assertEqual(expected, agent._actions)
+
+    def test_instrumented_problem(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+
+        queryStats = stats.SearchStats()
+        problem = stats.InstrumentedProblem(PositionSearchProblem(state), queryStats)
+
+        queryStats.start()
+        path = search.astar(problem, problem.instrumentHeuristic(heuristic.manhattan))
+        queryStats.stop(path, problem.actionsCost(path))
+
+        self.assertEqual(problem.getExpandedCount(), queryStats.nodesExpanded)
+        self.assertEqual(len(path), queryStats.pathLength)
+        self.assertGreater(queryStats.heuristicCalls, 0)
+        self.assertGreaterEqual(queryStats.peakVisited, queryStats.peakFrontier)
+        self.assertGreaterEqual(queryStats.nodesGenerated, queryStats.peakVisited - 1)
+
+        total = stats.aggregate([queryStats, queryStats.toDict()])
+        self.assertEqual(2, total['queries'])
+        self.assertEqual(2 * queryStats.nodesExpanded, total['nodesExpanded'])
+        self.assertEqual(queryStats.peakFrontier, total['peakFrontier'])
+
+    def test_anytime_search(self):
+        state = PacmanGameState(getLayout('mediumMaze'))
+        optimal = len(search.bfs(PositionSearchProblem(state)))
+
+        anytime = AnytimeSearch(PositionSearchProblem(state), heuristic.manhattan)
+
+        # A deadline in the past still returns the first path found.
+        firstPath = anytime.run(0, untilFound = True)
+        self.assertIsNotNone(firstPath)
+        self.assertGreaterEqual(len(firstPath), optimal)
+
+        # More time picks up where the last run stopped.
+        self.assertEqual(optimal, len(anytime.run()))
+        self.assertTrue(anytime.isOptimal())
+
+    def test_bidirectional_search(self):
+        random.seed(1234)
+
+        state = PacmanGameState(getLayout('mediumMaze'))
+        cells = state.getWalls().asList(False)
+
+        for i in range(20):
+            start, goal = random.sample(cells, 2)
+
+            bfsProblem = PositionSearchProblem(state, start = start, goal = goal)
+            bidirProblem = PositionSearchProblem(state, start = start, goal = goal)
+
+            expected = search.bfs(bfsProblem)
+            path = search.bidir(bidirProblem)
+
+            self.assertEqual(len(expected), len(path))
+            self.assertEqual(len(path), bidirProblem.actionsCost(path))
+
+    def test_bidirectional_search_needs_goals(self):
+        state = PacmanGameState(getLayout('tinySearch'))
+
+        with self.assertRaises(ValueError):
+            search.bidir(FoodSearchProblem(state))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+from pacai.agents.ghost.random import RandomGhost
+from pacai.agents.learning import checkpoint
+from pacai.agents.learning import parallel
+from pacai.bin import pacman
+from pacai.core.layout import getLayout
+from pacai.student.qlearningAgents import ApproximateQAgent
+from pacai.student.qlearningAgents import PacmanQAgent
+
+"""
+Test training harnesses for learning agents.
+"""
+class TrainingTest(unittest.TestCase):
+    def test_parallel(self):
+        layout = getLayout('smallGrid')
+        ghosts = [RandomGhost(i + 1) for i in range(layout.getNumGhosts())]
+        agent = ApproximateQAgent(0, numTraining = 6,
+                extractor = 'pacai.core.featureExtractors.SimpleExtractor')
+
+        parallel.train(agent, layout, ghosts, pacman.ClassicGameRules(), 6, 2, syncInterval = 2)
+
+        self.assertEqual(6, agent.episodesSoFar)
+        self.assertTrue(agent.isInTesting())
+        # The features from every actor reached the learner.
+        self.assertIn('closest-food', agent.getWeights())
+        self.assertNotEqual(0.0, agent.getWeights()['bias'])
+
+    def test_pacman_actors(self):
+        games = pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                '-p', 'ApproximateQAgent',
+                '--agent-args', 'extractor=pacai.core.featureExtractors.SimpleExtractor',
+                '--num-training', '4', '-n', '6', '--num-actors', '2'])
+
+        self.assertEqual(2, len(games))
+
+        self.assertRaises(ValueError, pacman.main, ['--null-graphics', '-q', '-p', 'GreedyAgent',
+                '--num-training', '1', '-n', '2', '--num-actors', '2'])
+
+        self.assertRaises(ValueError, pacman.main, ['--null-graphics', '-q', '-l', 'smallGrid',
+                '-p', 'ApproximateQAgent', '--agent-args', 'replay=uniform',
+                '--num-training', '1', '-n', '2', '--num-actors', '2'])
+
+    def test_actors_checkpoint(self):
+        save = checkpoint.save
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Record which process saves each checkpoint
+            # (forked actors inherit the wrapper).
+            savers = os.path.join(directory, 'savers')
+            os.mkdir(savers)
+
+            def recordSave(agent, checkpointDir):
+                open(os.path.join(savers, str(os.getpid())), 'w').close()
+                save(agent, checkpointDir)
+
+            checkpointDir = os.path.join(directory, 'checkpoint')
+            with unittest.mock.patch.object(checkpoint, 'save', recordSave):
+                pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                        '-p', 'ApproximateQAgent',
+                        '--agent-args', 'extractor=pacai.core.featureExtractors.SimpleExtractor',
+                        '--num-training', '8', '-n', '8', '--num-actors', '2',
+                        '--checkpoint-dir', checkpointDir, '--checkpoint-interval', '2'])
+
+            # Only the learner saved (and no temp files were left behind).
+            self.assertEqual([str(os.getpid())], os.listdir(savers))
+            self.assertEqual([checkpoint.CHECKPOINT_FILENAME], os.listdir(checkpointDir))
+
+            agent = ApproximateQAgent(0,
+                    extractor = 'pacai.core.featureExtractors.SimpleExtractor')
+            checkpoint.load(agent, checkpointDir)
+            self.assertEqual(8, agent.episodesSoFar)
+            self.assertEqual(8, agent.numTraining)
+
+    def test_resume(self):
+        agentArgs = 'extractor=pacai.core.featureExtractors.SimpleExtractor'
+
+        with tempfile.TemporaryDirectory() as directory:
+            def run(*args):
+                return pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                        '-p', 'ApproximateQAgent', '--agent-args', agentArgs,
+                        '--checkpoint-interval', '2'] + list(args))
+
+            expected = run('--num-training', '6', '-n', '8',
+                    '--checkpoint-dir', os.path.join(directory, 'full'))
+
+            # Stop after 3 training games (with a checkpoint after the first 2),
+            # then run the whole command again.
+            run('--num-training', '6', '-n', '3', '--checkpoint-dir', directory)
+            resumed = run('--num-training', '6', '-n', '8', '--checkpoint-dir', directory,
+                    '--resume')
+
+            self.assertEqual([game.state.getScore() for game in expected],
+                    [game.state.getScore() for game in resumed])
+            self.assertEqual(expected[0].agents[0].getWeights(), resumed[0].agents[0].getWeights())
+
+            # Evaluate the trained agent without training it again (or changing the checkpoint).
+            modified = os.path.getmtime(checkpoint.getPath(directory))
+            games = run('-n', '2', '--checkpoint-dir', directory, '--resume')
+
+            self.assertEqual(2, len(games))
+            self.assertEqual(expected[0].agents[0].getWeights(), games[0].agents[0].getWeights())
+            self.assertEqual(modified, os.path.getmtime(checkpoint.getPath(directory)))
+
+            self.assertRaises(ValueError, run, '-n', '1', '--resume')
+
+    def test_resume_changes_training(self):
+        agentArgs = 'extractor=pacai.core.featureExtractors.SimpleExtractor'
+
+        with tempfile.TemporaryDirectory() as directory:
+            def run(*args):
+                return pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                        '-p', 'ApproximateQAgent', '--agent-args', agentArgs,
+                        '--checkpoint-interval', '2', '--checkpoint-dir', directory]
+                        + list(args))
+
+            # Evaluating from the middle of training neither learns nor saves.
+            run('--num-training', '6', '-n', '3')
+            modified = os.path.getmtime(checkpoint.getPath(directory))
+
+            agent = run('-n', '2', '--resume')[0].agents[0]
+            self.assertEqual(0.0, agent.getEpsilon())
+            self.assertEqual(0.0, agent.getAlpha())
+            self.assertEqual(modified, os.path.getmtime(checkpoint.getPath(directory)))
+
+            # Finish training, then train for longer (with the original rates).
+            trained = run('--num-training', '6', '-n', '7', '--resume')[0].agents[0]
+            self.assertEqual(6, trained.episodesSoFar - 1)
+
+            agent = run('--num-training', '10', '-n', '11', '--resume')[0].agents[0]
+            self.assertEqual(10, agent.numTraining)
+            self.assertEqual(11, agent.episodesSoFar)
+            self.assertNotEqual(trained.getWeights(), agent.getWeights())
+
+            saved = ApproximateQAgent(0,
+                    extractor = 'pacai.core.featureExtractors.SimpleExtractor')
+            checkpoint.load(saved, directory)
+            self.assertEqual(10, saved.episodesSoFar)
+            self.assertEqual(agent.getWeights(), saved.getWeights())
+
+    def test_q_table_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            games = pacman.main(['--null-graphics', '-q', '-s', '1', '-l', 'smallGrid',
+                    '-p', 'PacmanQAgent', '--agent-args', 'qTable=zobrist',
+                    '--num-training', '20', '-n', '20', '--checkpoint-dir', directory])
+            self.assertEqual(0, len(games))
+
+            agent = PacmanQAgent(0, qTable = 'zobrist')
+            checkpoint.load(agent, directory)
+
+            self.assertEqual(20, agent.episodesSoFar)
+            self.assertTrue(agent.isInTesting())
+            self.assertGreater(len(agent.qValues), 0)
+
+            self.assertRaises(ValueError, checkpoint.load, ApproximateQAgent(0), directory)